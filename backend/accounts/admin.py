@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import CustomUser
+from .models import CustomUser, ScoreEntry
 
 
 @admin.register(CustomUser)
@@ -11,3 +11,10 @@ class CustomUserAdmin(UserAdmin):
     )
     list_display = ('username', 'email', 'role', 'eco_score', 'streak_days')
     list_filter = ('role',)
+
+
+@admin.register(ScoreEntry)
+class ScoreEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'delta', 'source', 'compacted', 'created_at')
+    list_filter = ('source', 'compacted')
+    raw_id_fields = ('user',)
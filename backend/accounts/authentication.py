@@ -0,0 +1,166 @@
+"""JWT authentication backed by a cached user snapshot.
+
+``CachedJWTAuthentication`` resolves the token's user from, in order, a
+per-process cache (``AUTH_USER_LOCAL_TTL`` seconds), a snapshot in Redis
+(``AUTH_USER_CACHE_TIMEOUT``) and finally the database, so most requests
+authenticate without a query.
+
+Snapshots are versioned twice: the Redis key carries a hash of the cached
+field names, so a deploy that changes the user model never reads old
+snapshots, and every snapshot records the user's generation counter.
+``invalidate_users`` bumps that counter when a write commits, and a snapshot
+whose generation no longer matches is ignored. A reader that loaded the row
+before the write therefore cannot re-cache stale data. The per-process cache
+is not notified, so other processes see a change within
+``AUTH_USER_LOCAL_TTL``. That includes ``eco_score`` and ``badges``, which
+is why ``accounts.ledger`` reads them from the database rather than from
+``request.user``.
+
+The password hash is never cached. The user is rebuilt with ``password``
+deferred, and simplejwt's revocation check (``CHECK_REVOKE_TOKEN``) compares
+against a digest stored in the snapshot. ``is_active`` is checked on every
+request as usual.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+import orjson
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from redis.exceptions import RedisError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from ecosphere.redis import get_redis
+from ecosphere.renderers import dumps
+from monitoring.authentication import TimedAuthenticationMixin
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+SNAPSHOT_FIELDS = [field for field in User._meta.concrete_fields if field.attname != 'password']
+SCHEMA = hashlib.sha1(','.join(field.attname for field in SNAPSHOT_FIELDS).encode()).hexdigest()[:8]
+
+# user id -> (expires at, snapshot payload)
+_local = {}
+_local_lock = threading.Lock()
+
+
+def _generation_key(user_id):
+    return f'auth:user:gen:{user_id}'
+
+
+def _snapshot_key(user_id):
+    return f'auth:user:{SCHEMA}:{user_id}'
+
+
+def invalidate_users(user_ids):
+    """Drop the cached snapshots of ``user_ids`` once the transaction commits."""
+    user_ids = {str(user_id) for user_id in user_ids}
+    if not user_ids:
+        return
+
+    def publish():
+        with _local_lock:
+            for user_id in user_ids:
+                _local.pop(user_id, None)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.incr(_generation_key(user_id))
+            pipe.execute()
+        except RedisError:
+            logger.warning('Auth snapshot invalidation failed for %s users', len(user_ids), exc_info=True)
+
+    transaction.on_commit(publish)
+
+
+def _revoke_digest(user):
+    return get_md5_hash_password(user.password)
+
+
+def _encode(user, generation):
+    return dumps({
+        'gen': generation,
+        'values': [getattr(user, field.attname) for field in SNAPSHOT_FIELDS],
+        'revoke': _revoke_digest(user),
+    })
+
+
+def _decode(payload):
+    snapshot = orjson.loads(payload)
+    user = User.from_db(
+        'default',
+        [field.attname for field in SNAPSHOT_FIELDS],
+        [field.to_python(value) for field, value in zip(SNAPSHOT_FIELDS, snapshot['values'])],
+    )
+    return user, snapshot
+
+
+def _remember(user_id, payload):
+    expires = time.monotonic() + settings.AUTH_USER_LOCAL_TTL
+    with _local_lock:
+        if len(_local) >= settings.AUTH_USER_LOCAL_MAX_ENTRIES:
+            _local.pop(next(iter(_local)))
+        _local[user_id] = (expires, payload)
+
+
+class CachedJWTAuthentication(TimedAuthenticationMixin, JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_FIELD not in ('id', 'pk'):
+            # snapshots are invalidated by primary key
+            return super().get_user(validated_token)
+        try:
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError as error:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from error
+
+        user, revoke = self._load(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != revoke:
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+    def _load(self, user_id):
+        """``(user, revoke digest)``, or ``(None, None)`` for an unknown user."""
+        with _local_lock:
+            cached = _local.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            user, snapshot = _decode(cached[1])
+            return user, snapshot['revoke']
+
+        try:
+            client = get_redis()
+            generation, payload = client.mget([_generation_key(user_id), _snapshot_key(user_id)])
+        except RedisError:
+            logger.warning('Auth snapshot cache unavailable', exc_info=True)
+            client = None
+            generation = payload = None
+        generation = generation or '0'
+        if payload:
+            user, snapshot = _decode(payload)
+            if snapshot['gen'] == generation:
+                _remember(user_id, payload)
+                return user, snapshot['revoke']
+
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None, None
+        payload = _encode(user, generation)
+        if client is not None:
+            try:
+                client.set(_snapshot_key(user_id), payload, ex=settings.AUTH_USER_CACHE_TIMEOUT)
+            except RedisError:
+                logger.warning('Auth snapshot write failed', exc_info=True)
+        _remember(user_id, payload)
+        return user, _revoke_digest(user)
@@ -0,0 +1,133 @@
+"""Append-only score ledger.
+
+Writers never update ``CustomUser.eco_score`` or ``badges`` directly; they
+insert a ``ScoreEntry``, so concurrent writes for the same user never wait on
+(or overwrite) each other's row update. ``compact`` periodically folds pending
+entries into the materialized columns, and readers add the pending tail on
+top of them via ``current``, always against the row as stored.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from ecosphere import response_cache
+from .authentication import invalidate_users
+from .models import ScoreEntry
+
+User = get_user_model()
+
+
+def append(user_id, delta, source, badges=()):
+    entry = ScoreEntry.objects.create(user_id=user_id, delta=delta, source=source, badges=sorted(badges))
+    response_cache.bump(response_cache.user_scope(user_id))
+    return entry
+
+
+def append_many(user_ids, delta, source, badges=()):
+    """Append the same ``delta`` and ``badges`` for every user in ``user_ids``."""
+    user_ids = sorted(set(user_ids))
+    entries = ScoreEntry.objects.bulk_create([
+        ScoreEntry(user_id=user_id, delta=delta, source=source, badges=sorted(badges)) for user_id in user_ids
+    ], batch_size=1000)
+    response_cache.bump_users(user_ids)
+    return entries
+
+
+def _fold(rows):
+    totals = defaultdict(lambda: [0.0, set()])
+    for user_id, delta, earned in rows:
+        totals[user_id][0] += delta
+        totals[user_id][1].update(earned or ())
+    return totals
+
+
+def pending(entries=None):
+    """``{user_id: [delta, badges]}`` summed over the uncompacted ``entries``."""
+    entries = ScoreEntry.objects.all() if entries is None else entries
+    return _fold(entries.filter(compacted=False).order_by().values_list('user_id', 'delta', 'badges'))
+
+
+def with_pending(users):
+    """Annotate a user queryset with ``current_score``: eco_score plus its pending tail.
+
+    Both come from one statement, so a compaction committing alongside can
+    neither drop the tail nor count it twice.
+    """
+    tail = (
+        ScoreEntry.objects.filter(user_id=OuterRef('pk'), compacted=False)
+        .order_by()
+        .values('user_id')
+        .annotate(total=Sum('delta'))
+        .values('total')
+    )
+    return users.annotate(current_score=F('eco_score') + Coalesce(Subquery(tail), 0.0))
+
+
+def current_many(user_ids):
+    """``{user_id: (eco_score, badges)}`` including entries not compacted yet.
+
+    Always read from the database: a user instance may be a cached auth
+    snapshot taken before the last compaction, and the pending tail only adds
+    up against the row it has not been folded into yet. Pending badges are
+    read before the rows, so a compaction in between can repeat a badge but
+    never lose one.
+    """
+    earned = defaultdict(set)
+    entries = ScoreEntry.objects.filter(user_id__in=user_ids, compacted=False).order_by()
+    for user_id, badges in entries.values_list('user_id', 'badges'):
+        earned[user_id].update(badges or ())
+    rows = with_pending(User.objects.filter(pk__in=user_ids)).values_list('pk', 'current_score', 'badges')
+    return {pk: (score, sorted(set(badges) | earned[pk])) for pk, score, badges in rows}
+
+
+def current(user):
+    """``(eco_score, badges)`` for a user, including entries not compacted yet."""
+    return current_many([user.pk])[user.pk]
+
+
+def score(user):
+    return with_pending(User.objects.filter(pk=user.pk)).values_list('current_score', flat=True).get()
+
+
+def scores(user_ids):
+    """``{user_id: eco_score}`` including entries not compacted yet."""
+    return dict(with_pending(User.objects.filter(pk__in=user_ids)).values_list('pk', 'current_score'))
+
+
+def compact(batch_size=None):
+    """Fold pending entries into the user rows, ``batch_size`` entries per transaction.
+
+    Entries are claimed with SKIP LOCKED, so overlapping runs split the work
+    instead of folding an entry twice.
+    """
+    batch_size = batch_size or settings.SCORE_LEDGER_BATCH_SIZE
+    entries = users = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                ScoreEntry.objects.select_for_update(skip_locked=True)
+                .filter(compacted=False)
+                .order_by('id')
+                .values_list('id', 'user_id', 'delta', 'badges')[:batch_size]
+            )
+            if not rows:
+                break
+            totals = _fold(row[1:] for row in rows)
+            profiles = list(
+                User.objects.select_for_update().filter(pk__in=totals).order_by('pk').only('id', 'eco_score', 'badges')
+            )
+            for profile in profiles:
+                delta, earned = totals[profile.pk]
+                profile.eco_score += delta
+                profile.badges = sorted(set(profile.badges) | earned)
+            User.objects.bulk_update(profiles, ['eco_score', 'badges'])
+            ScoreEntry.objects.filter(id__in=[row[0] for row in rows]).update(compacted=True)
+            # bulk_update sends no post_save, so drop the cached auth snapshots here
+            invalidate_users(totals)
+        entries += len(rows)
+        users += len(profiles)
+    return {'entries': entries, 'users': users}
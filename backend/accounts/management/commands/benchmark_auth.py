@@ -0,0 +1,62 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import authentication
+from monitoring.authentication import JWTAuthentication
+
+User = get_user_model()
+
+MODES = ('database', 'redis', 'local')
+QUERY_SAMPLE = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure per-request JWT authentication overhead: the plain database lookup, '
+        'a Redis snapshot hit and a per-process cache hit.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--user', help='Email of the user to authenticate as; defaults to the first user.')
+        parser.add_argument('--mode', action='append', choices=MODES, help='Repeatable; defaults to all modes.')
+
+    def handle(self, *args, iterations, user, mode, **options):
+        account = User.objects.filter(email=user).first() if user else User.objects.order_by('pk').first()
+        if account is None:
+            raise CommandError('No such user' if user else 'No users; run seed_benchmark_data first')
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(account)}')
+
+        self.stdout.write(f"{'mode':<10}{'p50 us':>10}{'p95 us':>10}{'mean us':>10}{'queries/req':>13}")
+        baseline = None
+        for name in mode or MODES:
+            backend = JWTAuthentication() if name == 'database' else authentication.CachedJWTAuthentication()
+            # warm the Redis snapshot so the cached modes measure hits only
+            authentication.CachedJWTAuthentication().authenticate(request)
+            timings = []
+            for _ in range(iterations):
+                if name == 'redis':
+                    authentication._local.clear()
+                started = time.perf_counter()
+                backend.authenticate(request)
+                timings.append((time.perf_counter() - started) * 1e6)
+            timings.sort()
+            # count queries in a separate pass: capturing them slows every query down
+            with CaptureQueriesContext(connection) as captured:
+                for _ in range(QUERY_SAMPLE):
+                    if name == 'redis':
+                        authentication._local.clear()
+                    backend.authenticate(request)
+            mean = statistics.fmean(timings)
+            baseline = baseline or mean
+            self.stdout.write(
+                f'{name:<10}{statistics.median(timings):>10.1f}{timings[int(len(timings) * 0.95)]:>10.1f}'
+                f'{mean:>10.1f}{len(captured.captured_queries) / QUERY_SAMPLE:>13.2f}  ({baseline / mean:.1f}x)'
+            )
@@ -0,0 +1,91 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+
+from accounts import ledger
+from accounts.models import ScoreEntry
+
+User = get_user_model()
+
+MODES = ('ledger', 'locked', 'unlocked')
+
+
+def _write_ledger(user_id):
+    ledger.append(user_id, 1.0, ScoreEntry.ADJUSTMENT)
+
+
+def _write_locked(user_id):
+    with transaction.atomic():
+        user = User.objects.select_for_update().only('id', 'eco_score').get(pk=user_id)
+        user.eco_score += 1.0
+        user.save(update_fields=['eco_score'])
+
+
+def _write_unlocked(user_id):
+    # the read-modify-write the action and event endpoints used to do
+    user = User.objects.only('id', 'eco_score').get(pk=user_id)
+    user.eco_score += 1.0
+    user.save(update_fields=['eco_score'])
+
+
+WRITERS = {'ledger': _write_ledger, 'locked': _write_locked, 'unlocked': _write_unlocked}
+
+
+class Command(BaseCommand):
+    help = 'Hammer one user with concurrent score writes and report throughput, latency and lost updates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=100, help='Writes per thread.')
+        parser.add_argument('--mode', action='append', choices=MODES, help='Repeatable; defaults to all modes.')
+
+    def handle(self, *args, threads, writes, mode, **options):
+        for name in mode or MODES:
+            user = User.objects.create(username=f'bench-{uuid.uuid4().hex[:12]}', email=f'{uuid.uuid4().hex}@bench.invalid')
+            try:
+                self._run(name, user, threads, writes)
+            finally:
+                user.delete()
+
+    def _run(self, name, user, threads, writes):
+        write = WRITERS[name]
+
+        def worker(_):
+            latencies, errors = [], 0
+            try:
+                for _ in range(writes):
+                    started = time.perf_counter()
+                    try:
+                        write(user.pk)
+                    except Exception:
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            return latencies, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(worker, range(threads)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(value for batch, _ in results for value in batch)
+        errors = sum(count for _, count in results)
+        if name == 'ledger':
+            ledger.compact()
+        user.refresh_from_db(fields=['eco_score'])
+        lost = len(latencies) - round(user.eco_score)
+
+        p50 = statistics.median(latencies) * 1000 if latencies else 0
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+        self.stdout.write(
+            f'{name:>8}: {len(latencies)} writes in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s), '
+            f'p50 {p50:.1f}ms p99 {p99:.1f}ms, {errors} errors, {lost} lost updates'
+        )
@@ -0,0 +1,29 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('accounts', '0002_alter_customuser_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.FloatField(default=0)),
+                ('source', models.CharField(choices=[('action', 'Eco action'), ('event', 'Community event'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('badges', models.JSONField(blank=True, default=list)),
+                ('compacted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'score entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('compacted', False)), fields=['user', 'id'], name='scoreentry_pending')],
+            },
+        ),
+    ]
@@ -16,12 +16,43 @@ class CustomUser(AbstractUser):
     streak_days = models.PositiveIntegerField(default=0)
     profile_meta = models.JSONField(default=dict, blank=True)
 
-<<<<<<< HEAD
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
     email = models.EmailField(unique=True)
 
-=======
->>>>>>> main
     def __str__(self):
         return f"{self.username} ({self.role})"
+
+
+class ScoreEntry(models.Model):
+    """One score change, appended by a writer and later folded into the user row."""
+
+    ACTION = 'action'
+    EVENT = 'event'
+    ADJUSTMENT = 'adjustment'
+    SOURCE_CHOICES = [
+        (ACTION, 'Eco action'),
+        (EVENT, 'Community event'),
+        (ADJUSTMENT, 'Adjustment'),
+    ]
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='score_entries')
+    delta = models.FloatField(default=0)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    badges = models.JSONField(default=list, blank=True)
+    compacted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['user', 'id'],
+                name='scoreentry_pending',
+                condition=models.Q(compacted=False),
+            ),
+        ]
+        verbose_name_plural = 'score entries'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.delta:+.2f} ({self.source})"
@@ -1,15 +1,15 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from monitoring.serializers import TimedSerializerMixin
+from . import ledger
+
 User = get_user_model()
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
-<<<<<<< HEAD
     username = serializers.CharField(required=False, allow_blank=True)
-=======
->>>>>>> main
 
     class Meta:
         model = User
@@ -17,18 +17,15 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         password = validated_data.pop('password')
-<<<<<<< HEAD
         if not validated_data.get('username'):
             validated_data['username'] = validated_data.get('email')
-=======
->>>>>>> main
         user = User(**validated_data)
         user.set_password(password)
         user.save()
         return user
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -41,4 +38,16 @@ class ProfileSerializer(serializers.ModelSerializer):
             'streak_days',
             'profile_meta',
         ]
-        read_only_fields = ['username', 'role']
+        read_only_fields = ['username', 'role', 'eco_score', 'badges']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['eco_score'], data['badges'] = ledger.current(instance)
+        return data
+
+    def update(self, instance, validated_data):
+        # save only what changed so a stale instance cannot undo a ledger compaction
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ecosphere import response_cache
+from .authentication import invalidate_users
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_responses(sender, instance, raw=False, **kwargs):
+    if not raw:
+        response_cache.bump_users([instance.pk])
+        invalidate_users([instance.pk])
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_users([instance.pk])
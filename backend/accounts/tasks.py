@@ -0,0 +1,17 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from monitoring.instrumentation import SKIP, add_rows, instrumented_task
+from . import ledger
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+@instrumented_task(overlap=SKIP)
+def compact_score_ledger(batch_size=None):
+    """Fold pending score entries into eco_score and badges."""
+    result = ledger.compact(batch_size)
+    add_rows(result['entries'])
+    logger.info('Compacted %s score entries for %s user rows', result['entries'], result['users'])
+    return result
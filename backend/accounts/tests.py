@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ecoactions.tests import FakeRedisMixin
+from . import authentication, ledger
+from .models import ScoreEntry
+
+User = get_user_model()
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class LedgerTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ada = User.objects.create_user('ada', 'ada@example.com', 'password', eco_score=10, badges=['Starter'])
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'password')
+
+    def test_readers_add_the_pending_tail(self):
+        ledger.append(self.ada.id, 2.5, ScoreEntry.ACTION, ['Green Commuter'])
+        ledger.append(self.ada.id, -1, ScoreEntry.ACTION)
+        ledger.append_many([self.ada.id, self.bob.id, self.bob.id], 5, ScoreEntry.EVENT, ['Community Hero'])
+
+        self.assertEqual(ScoreEntry.objects.filter(user=self.bob).count(), 1)
+        self.assertEqual(ledger.current(self.ada), (16.5, ['Community Hero', 'Green Commuter', 'Starter']))
+        self.assertEqual(ledger.scores([self.ada.id, self.bob.id]), {self.ada.id: 16.5, self.bob.id: 5.0})
+        # writers never touch the user row
+        self.ada.refresh_from_db()
+        self.assertEqual((self.ada.eco_score, self.ada.badges), (10, ['Starter']))
+
+    def test_compact_folds_every_entry_once(self):
+        for delta in (1, 2, 3):
+            ledger.append(self.ada.id, delta, ScoreEntry.ACTION, ['Starter'] if delta == 1 else [])
+        ledger.append(self.bob.id, -4, ScoreEntry.ADJUSTMENT, ['Recycler'])
+        before = {user.id: ledger.current(user) for user in (self.ada, self.bob)}
+
+        # two batches: ada's three entries, then bob's one
+        self.assertEqual(ledger.compact(batch_size=3), {'entries': 4, 'users': 2})
+
+        self.assertFalse(ScoreEntry.objects.filter(compacted=False).exists())
+        for user in (self.ada, self.bob):
+            user.refresh_from_db()
+            self.assertEqual((user.eco_score, user.badges), before[user.id])
+            self.assertEqual(ledger.current(user), before[user.id])
+        self.assertEqual(ledger.compact(batch_size=3), {'entries': 0, 'users': 0})
+        self.assertEqual(ledger.score(self.ada), 16)
+
+
+@override_settings(REDIS_URL='fakeredis://', AUTH_USER_LOCAL_TTL=60)
+class CachedJWTAuthenticationTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        authentication._local.clear()
+        self.addCleanup(authentication._local.clear)
+        self.user = User.objects.create_user('ada', 'ada@example.com', 'password')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def _user_queries(self):
+        """Queries against the user table while authenticating one request."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/leaderboard/')
+        self.assertEqual(response.status_code, 200)
+        table = User._meta.db_table
+        return [query for query in queries if f'FROM "{table}"' in query['sql'] and 'LIMIT 1' in query['sql']]
+
+    def test_snapshot_serves_later_requests_without_a_query(self):
+        self.assertEqual(len(self._user_queries()), 1)
+        self.assertEqual(self._user_queries(), [])
+        # another process: nothing local, the Redis snapshot is enough
+        authentication._local.clear()
+        self.assertEqual(self._user_queries(), [])
+
+    def test_committed_writes_invalidate_the_snapshot(self):
+        self._user_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            authentication.invalidate_users([self.user.pk])
+        response = self.client.get('/api/leaderboard/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_stale_snapshot_is_not_recached(self):
+        self._user_queries()
+        # a reader built this snapshot before the write's generation bump landed
+        stale = authentication.get_redis().get(authentication._snapshot_key(str(self.user.pk)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Ada'
+            self.user.save()
+        authentication.get_redis().set(authentication._snapshot_key(str(self.user.pk)), stale)
+
+        self.assertEqual(len(self._user_queries()), 1)
+        user = self._authenticate(self.user)
+        self.assertEqual(user.first_name, 'Ada')
+        self.assertIn('password', user.get_deferred_fields())
+
+    @staticmethod
+    def _authenticate(user):
+        backend = authentication.CachedJWTAuthentication()
+        return backend.get_user(backend.get_validated_token(str(AccessToken.for_user(user))))
@@ -1,11 +1,9 @@
 from django.contrib.auth import get_user_model
 from rest_framework import generics, permissions
-<<<<<<< HEAD
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
-=======
->>>>>>> main
 
+from ecosphere import response_cache
 from .serializers import ProfileSerializer, RegisterSerializer
 
 User = get_user_model()
@@ -23,7 +21,10 @@ class ProfileView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         return self.request.user
-<<<<<<< HEAD
+
+    @response_cache.cached_response(response_cache.USER)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -37,5 +38,3 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 class EmailTokenObtainPairView(TokenObtainPairView):
     serializer_class = EmailTokenObtainPairSerializer
-=======
->>>>>>> main
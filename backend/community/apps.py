@@ -5,3 +5,6 @@ class CommunityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'community'
     verbose_name = 'Community & Events'
+
+    def ready(self):
+        from . import signals  # noqa: F401
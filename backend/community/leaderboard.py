@@ -0,0 +1,194 @@
+"""Leaderboards kept in Redis sorted sets.
+
+``alltime`` mirrors ``CustomUser.eco_score`` plus any uncompacted score
+ledger entries; ``weekly`` and ``monthly`` accumulate the score each user
+gained inside the current ISO week or calendar month, one sorted set per
+period. Reads fall back to ordering the database when Redis is down, and a
+cold ``alltime`` board is rebuilt by one request while the others read the
+database.
+"""
+import logging
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from ecoactions.models import EcoAction
+from ecosphere import response_cache
+from ecosphere.redis import get_redis
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+ALLTIME = 'alltime'
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+WINDOWS = (ALLTIME, WEEKLY, MONTHLY)
+
+# keep finished periods around for a while so "last week" can still be read
+PERIOD_TTL = int(timedelta(days=62).total_seconds())
+REBUILD_LOCK_TIMEOUT = 300
+
+
+def window_key(window, when=None):
+    when = timezone.localtime(when or timezone.now())
+    if window == WEEKLY:
+        year, week, _ = when.isocalendar()
+        return f'leaderboard:weekly:{year}-W{week:02d}'
+    if window == MONTHLY:
+        return f'leaderboard:monthly:{when:%Y-%m}'
+    return 'leaderboard:alltime'
+
+
+def window_start(window, when=None):
+    when = timezone.localtime(when or timezone.now())
+    day = when.date()
+    if window == WEEKLY:
+        day -= timedelta(days=day.weekday())
+    elif window == MONTHLY:
+        day = day.replace(day=1)
+    else:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _write(user_scores, deltas, when=None):
+    client = get_redis()
+    pipe = client.pipeline(transaction=False)
+    if user_scores:
+        pipe.zadd(window_key(ALLTIME), {str(user_id): score for user_id, score in user_scores.items()})
+    for window in (WEEKLY, MONTHLY):
+        key = window_key(window, when)
+        for user_id, delta in deltas.items():
+            if delta:
+                pipe.zincrby(key, delta, str(user_id))
+        pipe.expire(key, PERIOD_TTL)
+    pipe.execute()
+    response_cache.bump(response_cache.LEADERBOARD)
+
+
+def record(user_id, delta, eco_score, when=None):
+    """Publish a score change once the surrounding transaction commits."""
+    record_many({user_id: eco_score}, {user_id: delta}, when)
+
+
+def record_many(user_scores, deltas=None, when=None):
+    def publish():
+        try:
+            _write(user_scores, deltas or {}, when)
+        except RedisError:
+            # the boards are derived data; rebuild_leaderboards repairs them
+            logger.warning('Leaderboard update failed for %s users', len(user_scores), exc_info=True)
+
+    transaction.on_commit(publish)
+
+
+def _rows(window):
+    """``(user_id, score)`` rows of a window, computed from the database."""
+    if window == ALLTIME:
+        pending = Sum('score_entries__delta', filter=Q(score_entries__compacted=False))
+        return (
+            User.objects.order_by('id')
+            .annotate(score=F('eco_score') + Coalesce(pending, 0.0))
+            .values_list('id', 'score')
+        )
+    return (
+        EcoAction.objects.filter(created_at__gte=window_start(window))
+        .order_by('user_id')
+        .values('user_id')
+        .annotate(score=Sum(F('estimated_savings_kg') - F('carbon_kg')))
+        .values_list('user_id', 'score')
+    )
+
+
+def _top_from_db(window, limit):
+    # break ties by id so the order is stable
+    rows = _rows(window).order_by('-score', '-id' if window == ALLTIME else '-user_id')[:limit]
+    return [(user_id, score or 0) for user_id, score in rows]
+
+
+def _rank_from_db(user_id, window):
+    rows = _rows(window)
+    field = 'id' if window == ALLTIME else 'user_id'
+    score = rows.filter(**{field: user_id}).values_list('score', flat=True).first()
+    if score is None:
+        return None
+    return {'rank': rows.filter(score__gt=score).count() + 1, 'score': score}
+
+
+def top(window=ALLTIME, limit=10):
+    """``[(user_id, score), ...]`` for the best ``limit`` users in a window."""
+    key = window_key(window)
+    try:
+        client = get_redis()
+        if window == ALLTIME and not client.exists(key):
+            # one request rebuilds the cold board; the rest read the database meanwhile
+            if not client.set(f'{key}:rebuild:lock', '1', nx=True, ex=REBUILD_LOCK_TIMEOUT):
+                return _top_from_db(window, limit)
+            try:
+                rebuild(ALLTIME)
+            finally:
+                client.delete(f'{key}:rebuild:lock')
+        return [(int(member), score) for member, score in client.zrevrange(key, 0, limit - 1, withscores=True)]
+    except RedisError:
+        logger.warning('Leaderboard unavailable; ranking from the database', exc_info=True)
+        return _top_from_db(window, limit)
+
+
+def rank(user_id, window=ALLTIME):
+    """1-based rank and score of a user in a window, or ``None`` if unranked."""
+    key = window_key(window)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.zrevrank(key, str(user_id))
+        pipe.zscore(key, str(user_id))
+        position, score = pipe.execute()
+    except RedisError:
+        logger.warning('Leaderboard unavailable; ranking from the database', exc_info=True)
+        return _rank_from_db(user_id, window)
+    if position is None:
+        return None
+    return {'rank': position + 1, 'score': score}
+
+
+def rebuild(window=ALLTIME, batch_size=5000):
+    """Replace a window's sorted set with scores recomputed from the database.
+
+    Weekly and monthly windows are rebuilt from EcoAction savings minus carbon
+    within the period; event points carry no completion time and are only
+    reflected live. Each rebuild fills its own staging set and renames it into
+    place, so overlapping rebuilds never mix their members.
+    """
+    client = get_redis()
+    key = window_key(window)
+    staging = f'{key}:rebuild:{uuid.uuid4().hex}'
+
+    count = 0
+    try:
+        batch = {}
+        for user_id, score in _rows(window).iterator(chunk_size=batch_size):
+            batch[str(user_id)] = score or 0
+            if len(batch) >= batch_size:
+                client.zadd(staging, batch)
+                count += len(batch)
+                batch = {}
+        if batch:
+            client.zadd(staging, batch)
+            count += len(batch)
+    except BaseException:
+        client.delete(staging)
+        raise
+
+    if count:
+        client.rename(staging, key)
+        if window != ALLTIME:
+            client.expire(key, PERIOD_TTL)
+    else:
+        client.delete(key)
+    response_cache.bump(response_cache.LEADERBOARD)
+    return count
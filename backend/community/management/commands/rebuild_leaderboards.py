@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from community import leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Redis leaderboards from the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('windows', nargs='*', help=f"Any of {', '.join(leaderboard.WINDOWS)}; defaults to all.")
+
+    def handle(self, *args, windows=None, **options):
+        unknown = set(windows or ()) - set(leaderboard.WINDOWS)
+        if unknown:
+            raise CommandError(f"Unknown window(s): {', '.join(sorted(unknown))}")
+        for window in windows or leaderboard.WINDOWS:
+            count = leaderboard.rebuild(window)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {window} leaderboard with {count} users'))
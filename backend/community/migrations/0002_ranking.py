@@ -0,0 +1,77 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_ranking(apps, schema_editor):
+    CommunityEvent = apps.get_model('community', 'CommunityEvent')
+    HostRanking = apps.get_model('community', 'HostRanking')
+    participants = (
+        CommunityEvent.participants.through.objects.filter(communityevent_id=models.OuterRef('pk'))
+        .order_by()
+        .values('communityevent_id')
+        .annotate(total=models.Count('id'))
+        .values('total')
+    )
+    CommunityEvent.objects.update(participant_count=Coalesce(models.Subquery(participants), 0))
+    CommunityEvent.objects.filter(status='completed').update(
+        group_points=models.F('points') * models.F('participant_count'),
+    )
+    rows = (
+        CommunityEvent.objects.order_by()
+        .values('host_id')
+        .annotate(
+            events=models.Count('id'),
+            participants=models.Sum('participant_count'),
+            points=models.Sum('group_points'),
+        )
+    )
+    HostRanking.objects.bulk_create([
+        HostRanking(
+            host_id=row['host_id'],
+            events_hosted=row['events'],
+            participant_count=row['participants'],
+            points=row['points'],
+        )
+        for row in rows
+    ], batch_size=5000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('accounts', '0003_scoreentry'),
+        ('community', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostRanking',
+            fields=[
+                ('host', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='host_ranking', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('events_hosted', models.IntegerField(default=0)),
+                ('participant_count', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='communityevent',
+            name='group_points',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='communityevent',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_ranking, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='communityevent',
+            index=models.Index(fields=['-group_points', 'id'], name='event_group_points'),
+        ),
+        migrations.AddIndex(
+            model_name='hostranking',
+            index=models.Index(fields=['-points', 'host'], name='hostranking_points'),
+        ),
+    ]
@@ -20,9 +20,49 @@ class CommunityEvent(models.Model):
     participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='events', blank=True)
     is_virtual = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # maintained by community.ranking with F() increments; never written by save()
+    participant_count = models.PositiveIntegerField(default=0, editable=False)
+    group_points = models.PositiveIntegerField(default=0, editable=False)
+
+    DENORMALIZED_FIELDS = ('participant_count', 'group_points')
 
     class Meta:
         ordering = ['starts_at']
+        indexes = [
+            models.Index(fields=['-group_points', 'id'], name='event_group_points'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        # a full save would write back stale counters over concurrent joins
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class HostRanking(models.Model):
+    """Running totals over the events a user hosts, for the community ranking.
+
+    ``points`` is the group points of the host's completed events: each
+    event's points times its participants.
+    """
+
+    host = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='host_ranking',
+    )
+    events_hosted = models.IntegerField(default=0)
+    participant_count = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-points', 'host'], name='hostranking_points'),
+        ]
+
+    def __str__(self):
+        return f"{self.host_id}: {self.points} points over {self.events_hosted} events"
@@ -0,0 +1,142 @@
+"""Community ranking of events and hosts by group points.
+
+Every event keeps its participant count and its group points (the event's
+points times its participants, once completed); ``HostRanking`` keeps the
+same totals summed over the events a user hosts. Both are updated with
+``F()`` increments when participants join or leave and when an event is
+saved, so ranking reads never touch the participants table. Writers lock the
+event row, which serializes joins against completion. ``rebuild`` recomputes
+everything from the participants table.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import CommunityEvent, HostRanking
+
+COMPLETED = 'completed'
+
+
+def group_points(status, points, participant_count):
+    return points * participant_count if status == COMPLETED else 0
+
+
+def _apply_hosts(deltas, create=True):
+    # a fixed order keeps concurrent writers from deadlocking on host rows
+    for host_id, (events, participants, points) in sorted(deltas.items()):
+        if not (events or participants or points):
+            continue
+        changes = {
+            'events_hosted': F('events_hosted') + events,
+            'participant_count': F('participant_count') + participants,
+            'points': F('points') + points,
+        }
+        rows = HostRanking.objects.filter(host_id=host_id)
+        if rows.update(**changes) or not create:
+            continue
+        try:
+            with transaction.atomic():
+                HostRanking.objects.create(
+                    host_id=host_id, events_hosted=events, participant_count=participants, points=points,
+                )
+        except IntegrityError:
+            # another writer created the row first; fold into it
+            rows.update(**changes)
+
+
+@transaction.atomic
+def participants_changed(changes):
+    """Apply ``{event_id: participants joined (or, negative, left)}``."""
+    changes = {event_id: count for event_id, count in changes.items() if count}
+    if not changes:
+        return
+    hosts = defaultdict(lambda: [0, 0, 0])
+    events = (
+        CommunityEvent.objects.select_for_update()
+        .filter(pk__in=changes)
+        .order_by('pk')
+        .values('pk', 'host_id', 'status', 'points')
+    )
+    for event in events:
+        count = changes[event['pk']]
+        points = group_points(event['status'], event['points'], count)
+        CommunityEvent.objects.filter(pk=event['pk']).update(
+            participant_count=F('participant_count') + count,
+            group_points=F('group_points') + points,
+        )
+        host = hosts[event['host_id']]
+        host[1] += count
+        host[2] += points
+    _apply_hosts(hosts)
+
+
+def snapshot(event_id):
+    """The stored fields ``event_saved`` compares against; read before saving."""
+    return (
+        CommunityEvent.objects.filter(pk=event_id)
+        .values('host_id', 'status', 'points', 'participant_count', 'group_points')
+        .first()
+    )
+
+
+def event_saved(event, previous=None):
+    """Move an event's contribution after a save; ``previous`` is its ``snapshot``."""
+    if previous is None:
+        _apply_hosts({event.host_id: (1, 0, 0)})
+        return
+    points = group_points(event.status, event.points, previous['participant_count'])
+    if points != previous['group_points']:
+        CommunityEvent.objects.filter(pk=event.pk).update(
+            group_points=Case(
+                When(status=COMPLETED, then=F('points') * F('participant_count')),
+                default=Value(0),
+            ),
+        )
+        event.group_points = points
+    if previous['host_id'] == event.host_id:
+        _apply_hosts({event.host_id: (0, 0, points - previous['group_points'])})
+    else:
+        _apply_hosts({
+            previous['host_id']: (-1, -previous['participant_count'], -previous['group_points']),
+            event.host_id: (1, previous['participant_count'], points),
+        })
+
+
+def event_deleted(event):
+    # never create rows here: during a host cascade theirs may already be gone
+    _apply_hosts({event.host_id: (-1, -event.participant_count, -event.group_points)}, create=False)
+
+
+def rebuild():
+    """Recompute event counters and host totals from the participants table."""
+    Through = CommunityEvent.participants.through
+    participants = (
+        Through.objects.filter(communityevent_id=OuterRef('pk'))
+        .order_by()
+        .values('communityevent_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    with transaction.atomic():
+        CommunityEvent.objects.update(participant_count=Coalesce(Subquery(participants), 0))
+        CommunityEvent.objects.update(group_points=Case(
+            When(status=COMPLETED, then=F('points') * F('participant_count')),
+            default=Value(0),
+        ))
+        HostRanking.objects.all().delete()
+        rows = (
+            CommunityEvent.objects.order_by()
+            .values('host_id')
+            .annotate(events=Count('id'), participants=Sum('participant_count'), points=Sum('group_points'))
+        )
+        HostRanking.objects.bulk_create([
+            HostRanking(
+                host_id=row['host_id'],
+                events_hosted=row['events'],
+                participant_count=row['participants'],
+                points=row['points'],
+            )
+            for row in rows
+        ], batch_size=5000)
@@ -1,21 +1,37 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from .models import CommunityEvent
+from monitoring.serializers import TimedSerializerMixin
+from .models import CommunityEvent, HostRanking
 
 User = get_user_model()
 
 
-class ParticipantSerializer(serializers.ModelSerializer):
+class ParticipantSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """A user with their ledger score and badges; pass ``ledger.current_many`` as ``scores``."""
+
+    class Meta:
+        model = User
+        fields = ['id', 'username']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # a user deleted since the page was read has no row left to score
+        data['eco_score'], data['badges'] = self.context['scores'].get(instance.pk, (0.0, []))
+        return data
+
+
+class HostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'eco_score', 'badges']
+        fields = ['id', 'username']
 
 
-class CommunityEventSerializer(serializers.ModelSerializer):
-    host = ParticipantSerializer(read_only=True)
-    participants = ParticipantSerializer(read_only=True, many=True)
-    participant_count = serializers.SerializerMethodField()
+class CommunityEventSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Compact event representation; participants are listed separately."""
+
+    host = HostSerializer(read_only=True)
+    joined = serializers.SerializerMethodField()
 
     class Meta:
         model = CommunityEvent
@@ -30,13 +46,33 @@ class CommunityEventSerializer(serializers.ModelSerializer):
             'status',
             'is_virtual',
             'host',
-            'participants',
             'participant_count',
+            'group_points',
+            'joined',
         ]
 
-    def get_participant_count(self, obj):
-        return obj.participants.count()
+    # list/detail querysets annotate this; freshly created events fall back
+    def get_joined(self, obj):
+        if hasattr(obj, 'joined'):
+            return obj.joined
+        return obj.participants.filter(pk=self.context['request'].user.pk).exists()
 
     def create(self, validated_data):
         validated_data['host'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class EventRankingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    host = HostSerializer(read_only=True)
+
+    class Meta:
+        model = CommunityEvent
+        fields = ['id', 'name', 'status', 'points', 'host', 'participant_count', 'group_points']
+
+
+class HostRankingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    host = HostSerializer(read_only=True)
+
+    class Meta:
+        model = HostRanking
+        fields = ['host', 'events_hosted', 'participant_count', 'points']
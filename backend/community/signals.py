@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import ranking
+from .models import CommunityEvent
+
+User = get_user_model()
+Participant = CommunityEvent.participants.through
+
+
+@receiver(pre_save, sender=CommunityEvent)
+def remember_previous_event(sender, instance, raw=False, **kwargs):
+    instance._previous = None
+    if not (raw or instance._state.adding or instance.pk is None):
+        instance._previous = ranking.snapshot(instance.pk)
+
+
+@receiver(post_save, sender=CommunityEvent)
+def update_ranking_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    if created or previous is not None:
+        ranking.event_saved(instance, previous)
+    instance._previous = None
+
+
+@receiver(post_delete, sender=CommunityEvent)
+def update_ranking_on_delete(sender, instance, **kwargs):
+    ranking.event_deleted(instance)
+
+
+def _existing(instance, reverse, pk_set):
+    """``{event_id: participant rows}`` a remove or clear is about to delete."""
+    rows = Participant.objects.filter(**{'customuser_id' if reverse else 'communityevent_id': instance.pk})
+    if pk_set is not None:
+        rows = rows.filter(**{'communityevent_id__in' if reverse else 'customuser_id__in': pk_set})
+    return dict(rows.order_by().values('communityevent_id').annotate(total=Count('id')).values_list(
+        'communityevent_id', 'total',
+    ))
+
+
+@receiver(m2m_changed, sender=Participant)
+def update_ranking_on_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add' and pk_set:
+        # Django only reports the participants that were not there already
+        ranking.participants_changed({pk: 1 for pk in pk_set} if reverse else {instance.pk: len(pk_set)})
+    elif action in ('pre_remove', 'pre_clear'):
+        removed = _existing(instance, reverse, pk_set if action == 'pre_remove' else None)
+        ranking.participants_changed({event_id: -total for event_id, total in removed.items()})
+
+
+@receiver(pre_delete, sender=User)
+def leave_events(sender, instance, **kwargs):
+    # the cascade deletes the user's participant rows without m2m signals
+    joined = Participant.objects.filter(customuser_id=instance.pk).values_list('communityevent_id', flat=True)
+    ranking.participants_changed({event_id: -1 for event_id in joined})
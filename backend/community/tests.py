@@ -0,0 +1,246 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from accounts import ledger
+from accounts.models import ScoreEntry
+from ecoactions.models import EcoAction
+from ecoactions.tests import FakeRedisMixin
+from ecosphere.redis import get_redis, reset_redis
+from . import leaderboard, ranking
+from .models import CommunityEvent, HostRanking
+
+User = get_user_model()
+
+
+class EventListQueryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', 'viewer@example.com', 'password')
+        self.host = User.objects.create_user('host', 'host@example.com', 'password')
+        self.members = [
+            User.objects.create_user(f'member{index}', f'member{index}@example.com', 'password')
+            for index in range(5)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def _create_events(self, count):
+        events = [
+            CommunityEvent.objects.create(name=f'Cleanup {index}', host=self.host, points=10)
+            for index in range(count)
+        ]
+        for event in events:
+            event.participants.add(*self.members)
+        return events
+
+    def test_list_costs_the_same_for_one_event_and_many(self):
+        [event] = self._create_events(1)
+        event.participants.add(self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/events/')
+        [row] = response.json()
+        self.assertEqual(row['participant_count'], 6)
+        self.assertTrue(row['joined'])
+        self.assertEqual(row['host'], {'id': self.host.id, 'username': 'host'})
+        self.assertNotIn('participants', row)
+
+        self._create_events(20)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/events/')
+        self.assertEqual(len(response.json()), 21)
+
+    def test_participant_pages_cost_the_same(self):
+        [event] = self._create_events(1)
+        # the event, count, page, then the ledger's pending badges and scores for that page
+        with self.assertNumQueries(5):
+            first = self.client.get(f'/api/events/{event.pk}/participants/', {'page_size': 2}).json()
+        with self.assertNumQueries(5):
+            last = self.client.get(f'/api/events/{event.pk}/participants/', {'page_size': 2, 'page': 3}).json()
+
+        self.assertEqual(first['count'], 5)
+        self.assertEqual([row['username'] for row in first['results']], ['member0', 'member1'])
+        self.assertEqual([row['username'] for row in last['results']], ['member4'])
+        self.assertIsNone(last['next'])
+        self.assertEqual(set(first['results'][0]), {'id', 'username', 'eco_score', 'badges'})
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class EventCompletionTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.host = User.objects.create_user('host', 'host@example.com', 'password')
+        self.members = [
+            User.objects.create_user(f'member{index}', f'member{index}@example.com', 'password')
+            for index in range(3)
+        ]
+        self.outsider = User.objects.create_user('outsider', 'outsider@example.com', 'password')
+        self.event = CommunityEvent.objects.create(name='Cleanup', host=self.host, points=10)
+        self.event.participants.add(*self.members)
+
+    def _complete(self, user):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/events/{self.event.pk}/complete/')
+
+    def test_participants_are_awarded_once(self):
+        response = self._complete(self.outsider)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['eco_score'], 0.0)
+
+        scores = ledger.current_many([user.pk for user in [*self.members, self.outsider, self.host]])
+        for member in self.members:
+            self.assertEqual(scores[member.pk], (10.0, ['Community Hero']))
+        self.assertEqual(scores[self.outsider.pk], (0.0, []))
+        self.assertEqual(scores[self.host.pk], (0.0, []))
+        self.assertEqual(
+            leaderboard.top(leaderboard.WEEKLY),
+            [(member.pk, 10.0) for member in reversed(self.members)],
+        )
+
+        repeat = self._complete(self.members[0])
+        self.assertEqual(repeat.status_code, 409)
+        self.assertEqual(ScoreEntry.objects.count(), 3)
+        self.assertEqual(ledger.score(self.members[0]), 10.0)
+        self.assertEqual(leaderboard.rank(self.members[0].pk, leaderboard.WEEKLY)['score'], 10.0)
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class LeaderboardTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'password')
+        User.objects.filter(pk=self.alice.pk).update(eco_score=30)
+        User.objects.filter(pk=self.bob.pk).update(eco_score=10)
+        ledger.append(self.bob.pk, 25, ScoreEntry.ADJUSTMENT)
+
+    def _act(self, user, savings, created_at=None):
+        action = EcoAction.objects.create(
+            user=user, category='travel', action_type='walk', estimated_savings_kg=savings,
+        )
+        if created_at:
+            EcoAction.objects.filter(pk=action.pk).update(created_at=created_at)
+
+    def test_record_updates_every_window(self):
+        last_week = leaderboard.window_start(leaderboard.WEEKLY) - timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            leaderboard.record(self.alice.pk, 5, 35)
+            leaderboard.record(self.bob.pk, 2, 37)
+            leaderboard.record(self.bob.pk, 4, 41)
+            leaderboard.record(self.alice.pk, 50, 85, when=last_week)
+
+        self.assertEqual(leaderboard.top(), [(self.alice.pk, 85.0), (self.bob.pk, 41.0)])
+        self.assertEqual(leaderboard.top(leaderboard.WEEKLY), [(self.bob.pk, 6.0), (self.alice.pk, 5.0)])
+        self.assertEqual(leaderboard.rank(self.alice.pk, leaderboard.WEEKLY), {'rank': 2, 'score': 5.0})
+        self.assertEqual(leaderboard.rank(self.bob.pk), {'rank': 2, 'score': 41.0})
+        previous_week = leaderboard.window_key(leaderboard.WEEKLY, last_week)
+        self.assertEqual(get_redis().zscore(previous_week, str(self.alice.pk)), 50)
+        self.assertGreater(get_redis().ttl(leaderboard.window_key(leaderboard.MONTHLY)), 0)
+
+    def test_rebuild_reads_the_database(self):
+        self._act(self.alice, 4)
+        self._act(self.bob, 3)
+        self._act(self.bob, 2)
+        self._act(self.alice, 100, created_at=leaderboard.window_start(leaderboard.WEEKLY) - timedelta(hours=1))
+
+        self.assertEqual(leaderboard.rebuild(leaderboard.ALLTIME), 2)
+        self.assertEqual(leaderboard.rebuild(leaderboard.WEEKLY), 2)
+        # the ledger's pending tail counts towards alltime
+        self.assertEqual(leaderboard.top(), [(self.bob.pk, 35.0), (self.alice.pk, 30.0)])
+        self.assertEqual(leaderboard.top(leaderboard.WEEKLY), [(self.bob.pk, 5.0), (self.alice.pk, 4.0)])
+        self.assertEqual(leaderboard.rank(self.alice.pk, leaderboard.WEEKLY), {'rank': 2, 'score': 4.0})
+        self.assertEqual(get_redis().keys('*:rebuild*'), [])
+
+    def test_cold_board_is_rebuilt_once(self):
+        lock = f'{leaderboard.window_key(leaderboard.ALLTIME)}:rebuild:lock'
+        get_redis().set(lock, '1')
+        # another request is rebuilding: read the database, leave the board alone
+        self.assertEqual(leaderboard.top(), [(self.bob.pk, 35.0), (self.alice.pk, 30.0)])
+        self.assertFalse(get_redis().exists(leaderboard.window_key(leaderboard.ALLTIME)))
+
+        get_redis().delete(lock)
+        self.assertEqual(leaderboard.top(), [(self.bob.pk, 35.0), (self.alice.pk, 30.0)])
+        self.assertTrue(get_redis().exists(leaderboard.window_key(leaderboard.ALLTIME)))
+        self.assertFalse(get_redis().exists(lock))
+
+    def test_redis_outage_falls_back_to_the_database(self):
+        self._act(self.alice, 4)
+        reset_redis()
+        with self.settings(REDIS_URL='redis://127.0.0.1:1/0'), self.assertLogs(level='WARNING') as logs:
+            self.assertEqual(leaderboard.top(leaderboard.WEEKLY), [(self.alice.pk, 4.0)])
+            self.assertEqual(leaderboard.rank(self.alice.pk), {'rank': 2, 'score': 30.0})
+            self.assertIsNone(leaderboard.rank(self.bob.pk, leaderboard.MONTHLY))
+            self.client.force_authenticate(self.alice)
+            response = self.client.get('/api/leaderboard/')
+            reset_redis()
+        messages = [record.getMessage() for record in logs.records]
+        self.assertIn('Leaderboard unavailable; ranking from the database', messages)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['username'] for entry in response.json()['leaders']], ['bob', 'alice'])
+        self.assertEqual(response.json()['me'], {'rank': 2, 'score': 30.0})
+
+
+class RankingSignalTests(APITestCase):
+    def setUp(self):
+        self.hosts = [User.objects.create_user(f'host{i}', f'host{i}@example.com', 'password') for i in range(2)]
+        self.people = [User.objects.create_user(f'guest{i}', f'guest{i}@example.com', 'password') for i in range(4)]
+        self.cleanup = CommunityEvent.objects.create(name='Cleanup', host=self.hosts[0], points=10)
+        self.planting = CommunityEvent.objects.create(name='Planting', host=self.hosts[1], points=5)
+
+    def _state(self):
+        events = list(CommunityEvent.objects.order_by('id').values_list('id', 'participant_count', 'group_points'))
+        hosts = list(
+            HostRanking.objects.filter(events_hosted__gt=0).order_by('host_id')
+            .values_list('host_id', 'events_hosted', 'participant_count', 'points')
+        )
+        return events, hosts
+
+    def _save(self, event, **changes):
+        for field, value in changes.items():
+            setattr(event, field, value)
+        event.save()
+
+    def assertMatchesRebuild(self):
+        maintained = self._state()
+        ranking.rebuild()
+        self.assertEqual(maintained, self._state())
+
+    def test_counters_follow_every_write(self):
+        self.cleanup.participants.add(*self.people[:3])
+        self.people[3].events.add(self.cleanup, self.planting)
+        self.assertMatchesRebuild()
+
+        self._save(self.cleanup, status='completed')
+        self.cleanup.refresh_from_db()
+        self.assertEqual((self.cleanup.participant_count, self.cleanup.group_points), (4, 40))
+        self.assertMatchesRebuild()
+
+        # each write moves the counters exactly as far as a full rebuild would
+        for step in [
+            lambda: self.cleanup.participants.remove(self.people[0]),
+            lambda: CommunityEvent.objects.filter(pk=self.cleanup.pk).first().save(update_fields=['name']),
+            lambda: self._save(self.cleanup, points=20),
+            lambda: self._save(self.cleanup, host=self.hosts[1]),
+            lambda: self.people[3].events.clear(),
+            lambda: self.people[1].delete(),
+            lambda: self.planting.delete(),
+            lambda: self.hosts[1].delete(),
+        ]:
+            step()
+            self.assertMatchesRebuild()
+
+    def test_ranking_reads_the_totals(self):
+        self.cleanup.participants.add(*self.people[:2])
+        self.planting.participants.add(*self.people)
+        for event in (self.cleanup, self.planting):
+            self._save(event, status='completed')
+
+        self.client.force_authenticate(self.people[0])
+        hosts = self.client.get('/api/community/ranking/').data['results']
+        self.assertEqual(
+            [(entry['rank'], entry['points']) for entry in hosts], [(1, 20), (2, 20)],
+        )
+        with self.assertNumQueries(2):
+            events = self.client.get('/api/community/ranking/', {'by': 'events'}).data['results']
+        self.assertEqual([entry['group_points'] for entry in events], [20, 20])
@@ -1,27 +1,71 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ecoactions.models import EcoAction
-from .models import CommunityEvent
-from .serializers import CommunityEventSerializer, ParticipantSerializer
+from accounts import ledger
+from accounts.models import ScoreEntry
+from ecosphere import response_cache
+from . import leaderboard
+from .models import CommunityEvent, HostRanking
+from .serializers import (
+    CommunityEventSerializer,
+    EventRankingSerializer,
+    HostRankingSerializer,
+    ParticipantSerializer,
+)
 
 User = get_user_model()
 
 
+class ParticipantPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class RankingPagination(PageNumberPagination):
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
 class CommunityEventViewSet(viewsets.ModelViewSet):
     serializer_class = CommunityEventSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return CommunityEvent.objects.filter(status__in=['open', 'completed']).prefetch_related('participants')
+        memberships = CommunityEvent.participants.through.objects.filter(
+            communityevent_id=OuterRef('pk'),
+            customuser_id=self.request.user.id,
+        )
+        return (
+            CommunityEvent.objects.filter(status__in=['open', 'completed'])
+            .select_related('host')
+            .annotate(joined=Exists(memberships))
+        )
 
     def perform_create(self, serializer):
         serializer.save(host=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def participants(self, request, pk=None):
+        event = self.get_object()
+        paginator = ParticipantPagination()
+        page = paginator.paginate_queryset(
+            event.participants.order_by('id').only('id', 'username'),
+            request,
+            view=self,
+        )
+        scores = ledger.current_many([user.pk for user in page])
+        return paginator.get_paginated_response(
+            ParticipantSerializer(page, many=True, context={'scores': scores}).data,
+        )
+
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
         event = self.get_object()
@@ -31,23 +75,69 @@ class CommunityEventViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         event = self.get_object()
-        event.status = 'completed'
-        event.save(update_fields=['status'])
-        request.user.eco_score += event.points
-        badges = set(request.user.badges)
-        badges.add('Community Hero')
-        request.user.badges = list(badges)
-        request.user.save(update_fields=['eco_score', 'badges'])
-        return Response({'status': 'completed', 'eco_score': request.user.eco_score})
+        with transaction.atomic():
+            # the lock orders completion against concurrent joins and repeated completions
+            event = CommunityEvent.objects.select_for_update().get(pk=event.pk)
+            if event.status == 'completed':
+                return Response({'detail': 'Event already completed.'}, status=status.HTTP_409_CONFLICT)
+            event.status = 'completed'
+            event.save(update_fields=['status'])
+            participant_ids = list(event.participants.values_list('id', flat=True))
+            ledger.append_many(participant_ids, event.points, ScoreEntry.EVENT, ['Community Hero'])
+            scores = ledger.scores(participant_ids)
+            leaderboard.record_many(scores, {user_id: event.points for user_id in scores})
+        return Response({'status': 'completed', 'eco_score': ledger.score(request.user)})
 
 
 class LeaderboardView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @response_cache.cached_response(response_cache.LEADERBOARD)
+    def get(self, request):
+        window = request.query_params.get('window', leaderboard.ALLTIME)
+        if window not in leaderboard.WINDOWS:
+            return Response(
+                {'detail': f"window must be one of {', '.join(leaderboard.WINDOWS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        ranked = leaderboard.top(window)
+        user_ids = [user_id for user_id, _ in ranked]
+        scores = ledger.current_many(user_ids)
+        users = User.objects.only('id', 'username').in_bulk(user_ids)
+        leaders = []
+        for position, (user_id, score) in enumerate(ranked, start=1):
+            if user_id not in users:
+                continue
+            entry = ParticipantSerializer(users[user_id], context={'scores': scores}).data
+            entry.update(rank=position, score=score)
+            leaders.append(entry)
+        return Response({
+            'window': window,
+            'leaders': leaders,
+            'me': leaderboard.rank(request.user.id, window),
+        })
+
+
+class CommunityRankingView(APIView):
+    """Hosts or events ranked by group points, read from the denormalized totals."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
     def get(self, request):
-        top_users = User.objects.annotate(
-            action_count=Count('eco_actions'),
-            total_carbon=Sum('eco_actions__carbon_kg'),
-        ).order_by('-eco_score')[:10]
-        serializer = ParticipantSerializer(top_users, many=True)
-        return Response({'leaders': serializer.data})
+        by = request.query_params.get('by', 'hosts')
+        if by == 'hosts':
+            queryset = HostRanking.objects.filter(events_hosted__gt=0).order_by('-points', 'host_id')
+            serializer_class = HostRankingSerializer
+        elif by == 'events':
+            queryset = CommunityEvent.objects.filter(status__in=['open', 'completed']).order_by('-group_points', 'id')
+            serializer_class = EventRankingSerializer
+        else:
+            return Response({'detail': 'by must be hosts or events'}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = RankingPagination()
+        page = paginator.paginate_queryset(queryset.select_related('host'), request, view=self)
+        entries = serializer_class(page, many=True).data
+        for position, entry in enumerate(entries, start=paginator.page.start_index()):
+            entry['rank'] = position
+        return paginator.get_paginated_response(entries)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import EcoAction, Reminder
+from .models import DailyImpact, EcoAction, ImpactRollup, Receipt, Reminder
 
 
 @admin.register(EcoAction)
@@ -15,3 +15,25 @@ class ReminderAdmin(admin.ModelAdmin):
     list_display = ('user', 'message', 'due_date', 'severity', 'delivered')
     list_filter = ('severity', 'delivered')
     search_fields = ('message', 'user__username')
+
+
+@admin.register(ImpactRollup)
+class ImpactRollupAdmin(admin.ModelAdmin):
+    list_display = ('user', 'category', 'severity', 'action_count', 'carbon_kg', 'savings_kg')
+    list_filter = ('category', 'severity')
+    search_fields = ('user__username',)
+
+
+@admin.register(DailyImpact)
+class DailyImpactAdmin(admin.ModelAdmin):
+    list_display = ('user', 'day', 'category', 'action_count', 'carbon_kg', 'savings_kg')
+    list_filter = ('category',)
+    date_hierarchy = 'day'
+    search_fields = ('user__username',)
+
+
+@admin.register(Receipt)
+class ReceiptAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'content_type', 'size', 'verified', 'uploaded_by', 'created_at')
+    list_filter = ('verified', 'content_type')
+    search_fields = ('sha256', 'key')
@@ -5,3 +5,6 @@ class EcoactionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ecoactions'
     verbose_name = 'Eco Actions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,83 @@
+"""Badge rules shared by the action write path and the periodic recompute.
+
+Each rule is a set of EcoAction field lookups plus a threshold: a user earns
+the badge once at least ``threshold`` of their actions match the lookups.
+All rules compile to filtered ``Count`` aggregates, so any number of rules is
+evaluated in a single query per user or per batch of users.
+"""
+import operator
+
+from django.db.models import Count, Q
+
+from .models import EcoAction
+
+_LOOKUP_TESTS = {
+    'exact': operator.eq,
+    'iexact': lambda value, expected: str(value or '').lower() == str(expected).lower(),
+    'gt': lambda value, expected: value is not None and value > expected,
+    'gte': lambda value, expected: value is not None and value >= expected,
+    'lt': lambda value, expected: value is not None and value < expected,
+    'in': lambda value, expected: value in expected,
+}
+
+
+class BadgeRule:
+    def __init__(self, name, threshold, **lookups):
+        self.name = name
+        self.threshold = threshold
+        self.lookups = lookups
+        self.alias = 'badge_' + ''.join(ch if ch.isalnum() else '_' for ch in name.lower())
+
+    @property
+    def aggregate(self):
+        if not self.lookups:
+            return Count('id')
+        return Count('id', filter=Q(**self.lookups))
+
+    def matches(self, action):
+        """Whether ``action`` counts towards this rule, evaluated without a query."""
+        for lookup, expected in self.lookups.items():
+            field, _, kind = lookup.partition('__')
+            if not _LOOKUP_TESTS[kind or 'exact'](getattr(action, field), expected):
+                return False
+        return True
+
+    def __repr__(self):
+        return f'BadgeRule({self.name!r}, {self.threshold})'
+
+
+BADGE_RULES = [
+    BadgeRule('Zero Waste', 5, category='waste', disposal_method='recycled'),
+    BadgeRule('Transit Champ', 5, category='travel', estimated_savings_kg__gt=0),
+    BadgeRule('Local Shopper', 3, origin__iexact='local'),
+    BadgeRule('Eco Hero', 10),
+]
+
+
+def annotations(rules=None):
+    """Aggregate expressions for ``.annotate()``/``.aggregate()``, one per rule."""
+    return {rule.alias: rule.aggregate for rule in (rules or BADGE_RULES)}
+
+
+def earned(row, rules=None):
+    """Badge names whose thresholds are met by an aggregated ``row``."""
+    return {rule.name for rule in (rules or BADGE_RULES) if (row.get(rule.alias) or 0) >= rule.threshold}
+
+
+def award(user, actions=None, held=None):
+    """Return the user's badge list after evaluating the relevant rules.
+
+    ``held`` defaults to ``user.badges``; writers pass ``ledger.current(user)[1]``
+    so badges still pending in the score ledger count as held. With
+    ``actions`` (the newly written ones) only the rules they count towards and
+    that the user does not hold yet are checked; when none qualify no query is
+    issued.
+    """
+    held = set(user.badges if held is None else held)
+    rules = [rule for rule in BADGE_RULES if rule.name not in held]
+    if actions is not None:
+        rules = [rule for rule in rules if any(rule.matches(action) for action in actions)]
+    if not rules:
+        return sorted(held)
+    row = EcoAction.objects.filter(user=user).aggregate(**annotations(rules))
+    return sorted(held | earned(row, rules))
@@ -0,0 +1,159 @@
+"""Server-side carbon estimation over arrays of inputs.
+
+Emission factors come from a versioned JSON table loaded once per process
+(``settings.EMISSION_FACTORS_PATH``). Inputs are plain dicts shaped like an
+action payload; each batch is turned into NumPy arrays so the arithmetic
+runs vectorized whether it is one API request or a chunk of history.
+
+Supported inputs:
+
+* ``travel``: ``method`` and ``distance_km``; savings are measured against
+  the table's baseline mode (car).
+* ``energy``: ``hours`` with either ``kw`` or a known ``appliance``.
+* ``food``: ``packaging_type`` and delivery ``distance_km``.
+
+Travel and food items need a non-negative ``distance_km``; a missing or
+invalid one is reported as that item's error rather than estimated as 0 km.
+"""
+import functools
+import json
+
+import numpy as np
+from django.conf import settings
+
+ESTIMATED_CATEGORIES = ('travel', 'energy', 'food')
+DISTANCE_CATEGORIES = ('travel', 'food')
+
+
+class FactorTable:
+    def __init__(self, data):
+        self.version = data['version']
+        self.travel = data['travel_kg_per_km']
+        self.baseline_travel = self.travel[data['baseline_travel_mode']]
+        self.grid = data['grid_kg_per_kwh']
+        self.appliance_kw = data['appliance_kw']
+        self.packaging = data['packaging_kg']
+        self.delivery = data['delivery_kg_per_km']
+
+
+@functools.lru_cache(maxsize=1)
+def get_factors():
+    with open(settings.EMISSION_FACTORS_PATH, encoding='utf-8') as handle:
+        return FactorTable(json.load(handle))
+
+
+def _numbers(values):
+    """Float array from user input; blanks and junk become NaN."""
+    out = np.full(len(values), np.nan)
+    for index, value in enumerate(values):
+        try:
+            out[index] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+
+def _lookup(keys, table):
+    """Vectorized dict lookup: factor per key, NaN where the key is unknown."""
+    keys = np.array(['' if key is None else str(key) for key in keys], dtype=object)
+    if not len(keys):
+        return np.empty(0)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    factors = np.array([table.get(key, np.nan) for key in unique], dtype=float)
+    return factors[inverse]
+
+
+def inputs_from_action(category, distance_km, packaging_type, data):
+    """Estimation input for a stored action or action payload."""
+    data = data or {}
+    if distance_km is None:
+        distance_km = data.get('distance_km', data.get('deliveryDistanceKm'))
+    return {
+        'category': category,
+        'method': data.get('method'),
+        'distance_km': distance_km,
+        'appliance': data.get('appliance'),
+        'hours': data.get('hours_used', data.get('hours')),
+        'kw': data.get('kw'),
+        'packaging_type': packaging_type or data.get('packagingType'),
+    }
+
+
+def fill_missing_estimates(items):
+    """Fill ``carbon_kg`` in action payloads that omit it, in place.
+
+    Estimated payloads get ``estimated_savings_kg`` (unless given) and record
+    the factor table version in ``data['factor_version']`` so they can be
+    recomputed when factors change.
+    """
+    targets = [
+        item for item in items
+        if isinstance(item, dict) and 'carbon_kg' not in item and item.get('category') in ESTIMATED_CATEGORIES
+    ]
+    if not targets:
+        return
+    factors = get_factors()
+    carbon, savings, errors = estimate([
+        inputs_from_action(item.get('category'), item.get('distance_km'), item.get('packaging_type'), item.get('data'))
+        for item in targets
+    ], factors)
+    for index, item in enumerate(targets):
+        if index in errors:
+            continue
+        item['carbon_kg'] = float(carbon[index])
+        item.setdefault('estimated_savings_kg', float(savings[index]))
+        item['data'] = {**(item.get('data') or {}), 'factor_version': factors.version}
+
+
+def estimate(items, factors=None):
+    """Estimate ``carbon_kg``/``estimated_savings_kg`` for each input dict.
+
+    Returns ``(carbon, savings, errors)``: two float arrays aligned with
+    ``items`` (NaN where no estimate was possible) and a dict of index to
+    error message.
+    """
+    factors = factors or get_factors()
+    count = len(items)
+    category = np.array([item.get('category') for item in items], dtype=object)
+    distance = _numbers([item.get('distance_km') for item in items])
+    distance[distance < 0] = np.nan
+    carbon = np.full(count, np.nan)
+    savings = np.zeros(count)
+
+    travel = category == 'travel'
+    if travel.any():
+        subset = [items[index] for index in np.flatnonzero(travel)]
+        per_km = _lookup([item.get('method') for item in subset], factors.travel)
+        km = distance[travel]
+        carbon[travel] = km * per_km
+        savings[travel] = np.clip(km * (factors.baseline_travel - per_km), 0, None)
+
+    energy = category == 'energy'
+    if energy.any():
+        subset = [items[index] for index in np.flatnonzero(energy)]
+        kw = _numbers([item.get('kw') for item in subset])
+        kw = np.where(np.isnan(kw), _lookup([item.get('appliance') for item in subset], factors.appliance_kw), kw)
+        hours = _numbers([item.get('hours') for item in subset])
+        carbon[energy] = hours * kw * factors.grid
+
+    food = category == 'food'
+    if food.any():
+        subset = [items[index] for index in np.flatnonzero(food)]
+        packaging = _lookup(
+            [str(item.get('packaging_type') or '').lower() for item in subset],
+            {'': 0.0, **factors.packaging},
+        )
+        carbon[food] = distance[food] * factors.delivery + packaging
+
+    carbon = np.round(carbon, 3)
+    savings = np.where(np.isnan(carbon), np.nan, np.round(savings, 3))
+
+    errors = {}
+    for index in np.flatnonzero(np.isnan(carbon)):
+        if category[index] not in ESTIMATED_CATEGORIES:
+            errors[int(index)] = f'No estimation model for category {category[index]!r}'
+        elif category[index] in DISTANCE_CATEGORIES and np.isnan(distance[index]):
+            errors[int(index)] = 'distance_km must be a non-negative number'
+        else:
+            errors[int(index)] = 'Missing or unknown inputs for this category'
+    return carbon, savings, errors
@@ -0,0 +1,111 @@
+"""Streaming CSV and NDJSON export of a user's action history.
+
+Rows come from a server-side cursor (``iterator(chunk_size=...)``) over
+``readers.action_rows`` and are encoded one at a time, then flushed in
+blocks of about ``BLOCK_SIZE`` bytes, so memory stays flat however long the
+history is. ``stream`` optionally gzips the output as it goes.
+"""
+import csv
+import re
+from datetime import date, datetime
+
+from django.conf import settings
+from django.utils.text import compress_sequence
+from rest_framework.renderers import BaseRenderer
+
+from ecosphere.renderers import dumps
+
+from . import readers
+
+FIELDS = [*readers.ACTION_FIELDS, 'impact_label']
+BLOCK_SIZE = 64 * 1024
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+class _Line:
+    """File-like target that hands back what ``csv.writer`` writes."""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat().replace('+00:00', 'Z')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode()
+    return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(FIELDS).encode()
+    for row in rows:
+        yield writer.writerow([_cell(row[field]) for field in FIELDS]).encode()
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+
+ENCODERS = {'csv': csv_lines, 'ndjson': ndjson_lines}
+
+
+def _blocks(lines):
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def accepts_gzip(request):
+    return bool(_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
+
+def stream(queryset, fmt, gzip=False):
+    """Encoded export of ``queryset`` as an iterator of byte blocks."""
+    rows = readers.action_rows(queryset).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    blocks = _blocks(ENCODERS[fmt](rows))
+    return compress_sequence(blocks) if gzip else blocks
+
+
+class ExportRenderer(BaseRenderer):
+    """Lets ``?format=`` select an export; the body itself is streamed by the view.
+
+    Only non-streamed responses such as errors reach ``render``; they are
+    written as a single record of the export format.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data) + b'\n'
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            return super().render(data, accepted_media_type, renderer_context)
+        writer = csv.writer(_Line())
+        return (writer.writerow(list(data)) + writer.writerow([_cell(value) for value in data.values()])).encode()
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
@@ -0,0 +1,78 @@
+"""Batch ingestion of actions queued by the mobile client while offline."""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from accounts import ledger
+from accounts.models import ScoreEntry
+from community import leaderboard
+from organizations import rollups as org_rollups
+from . import badges, estimation, rollups
+from .models import EcoAction
+
+User = get_user_model()
+
+MAX_BATCH_SIZE = 500
+
+
+def ingest_actions(user, items, serializer_class, context):
+    """Validate and insert ``items`` for ``user`` in one transaction.
+
+    Returns one result per item, in order: ``created`` or ``duplicate`` with
+    the action id, or ``invalid`` with the validation errors. Items whose
+    ``client_key`` is already stored (or repeated in the batch) are reported
+    as duplicates, so retrying a sync is harmless. Items without
+    ``carbon_kg`` are estimated server-side first.
+    """
+    items = [dict(item) if isinstance(item, dict) else item for item in items]
+    estimation.fill_missing_estimates(items)
+
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item, context=context)
+        if serializer.is_valid():
+            pending.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'status': 'invalid', 'errors': serializer.errors}
+
+    with transaction.atomic():
+        # one sync per user at a time keeps the client_key check race-free
+        profile = User.objects.select_for_update().get(pk=user.pk)
+
+        keys = {data['client_key'] for _, data in pending if data.get('client_key')}
+        known = {}
+        if keys:
+            known = dict(EcoAction.objects.filter(user=profile, client_key__in=keys).values_list('client_key', 'id'))
+
+        new_actions, new_indexes, batch_keys, repeats = [], [], {}, []
+        for index, data in pending:
+            key = data.get('client_key')
+            if key in known:
+                results[index] = {'index': index, 'status': 'duplicate', 'client_key': key, 'id': known[key]}
+                continue
+            if key in batch_keys:
+                repeats.append((index, batch_keys[key]))
+                continue
+            action = EcoAction(user=profile, **data)
+            new_actions.append(action)
+            new_indexes.append(index)
+            if key:
+                batch_keys[key] = action
+
+        created = EcoAction.objects.bulk_create(new_actions)
+        for index, action in zip(new_indexes, created):
+            results[index] = {'index': index, 'status': 'created', 'client_key': action.client_key, 'id': action.pk}
+        for index, action in repeats:
+            results[index] = {'index': index, 'status': 'duplicate', 'client_key': action.client_key, 'id': action.pk}
+
+        if created:
+            # bulk_create skips the model signals, so fold the batch in here
+            rollups.apply_deltas(rollups.collect_deltas(added=created))
+            org_rollups.apply_action_deltas(added=created)
+            delta = sum(action.estimated_savings_kg - action.carbon_kg for action in created)
+            held = ledger.current(profile)[1]
+            earned = set(badges.award(profile, created, held)) - set(held)
+            ledger.append(profile.id, delta, ScoreEntry.ACTION, earned)
+            leaderboard.record(profile.id, delta, ledger.score(profile))
+
+    return results
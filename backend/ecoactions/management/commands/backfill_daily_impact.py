@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from ecoactions import rollups
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Backfill per-day impact buckets from EcoAction history, one batch of users at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only backfill these user ids.')
+        parser.add_argument('--since', type=date.fromisoformat, help='Only rebuild buckets on or after this date (YYYY-MM-DD).')
+        parser.add_argument('--batch-size', type=int, default=200, help='Users aggregated per transaction.')
+
+    def handle(self, *args, user_ids=None, since=None, batch_size=200, **options):
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        if user_ids:
+            users = users.filter(id__in=user_ids)
+
+        user_count, bucket_count = 0, 0
+        for batch in rollups.batched(users.iterator(chunk_size=batch_size), batch_size):
+            bucket_count += rollups.rebuild_daily(batch, since=since)
+            user_count += len(batch)
+            self.stdout.write(f'{user_count} users, {bucket_count} buckets')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {bucket_count} daily buckets for {user_count} users'))
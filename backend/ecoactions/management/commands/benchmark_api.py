@@ -0,0 +1,182 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ecoactions.management.commands.seed_benchmark_data import BENCH_DOMAIN
+from ecoactions.models import Reminder
+from ecoactions.tasks import recompute_scores_and_badges, send_due_reminders
+from ecosphere import response_cache
+from organizations.models import Membership
+
+User = get_user_model()
+
+# TaskRun insert and update recorded around every instrumented task
+TASK_RUN_QUERIES = 2
+
+
+class Scenario:
+    def __init__(self, name, run, budget, iterations=None, setup=None):
+        self.name = name
+        self.run = run
+        self.budget = budget
+        self.iterations = iterations
+        self.setup = setup
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure latency percentiles and query counts of the main endpoints and tasks against seeded data '
+        '(see seed_benchmark_data); exits non-zero when a scenario exceeds its query budget.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30, help='Runs per endpoint scenario.')
+        parser.add_argument('--task-iterations', type=int, default=3, help='Runs per task scenario.')
+        parser.add_argument('--user', help='Email of the user to benchmark as; defaults to the busiest seeded user.')
+        parser.add_argument('--only', action='append', help='Run only the named scenario (repeatable).')
+        parser.add_argument('--budget', action='append', default=[], metavar='NAME=QUERIES', help='Override a query budget.')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file.')
+
+    def handle(self, *args, iterations, task_iterations, user, only, budget, json_path, **options):
+        account = self._user(user)
+        overrides = {}
+        for item in budget:
+            name, _, value = item.partition('=')
+            if not value.isdigit():
+                raise CommandError(f'Invalid --budget {item!r}; expected NAME=QUERIES')
+            overrides[name] = int(value)
+
+        setup_test_environment()
+        try:
+            results = self._run_all(account, iterations, task_iterations, only, overrides)
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"{'scenario':<22}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'queries':>9}{'budget':>8}")
+        for row in results:
+            line = (
+                f"{row['name']:<22}{row['runs']:>6}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+                f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}{row['queries']:>9}{row['budget']:>8}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['over_budget'] else line)
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as handle:
+                json.dump({'user': account.email, 'results': results}, handle, indent=2)
+
+        failed = [row['name'] for row in results if row['over_budget']]
+        if failed:
+            raise CommandError(f"Query budget exceeded: {', '.join(failed)}")
+
+    def _user(self, email):
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f'No user {email}')
+        busiest = (
+            User.objects.filter(email__endswith=f'@{BENCH_DOMAIN}')
+            .annotate(actions=Count('eco_actions'))
+            .order_by('-actions')
+            .first()
+        )
+        if busiest is None:
+            raise CommandError('No seeded users; run seed_benchmark_data first')
+        return busiest
+
+    def _scenarios(self, account, iterations, task_iterations):
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(account)}')
+
+        def get(path, **headers):
+            def run():
+                response = client.get(path, **headers)
+                if response.status_code not in (200, 304):
+                    raise CommandError(f'GET {path} returned {response.status_code}')
+            return run
+
+        def create_action():
+            response = client.post(
+                '/api/actions/',
+                {'category': 'travel', 'action_type': 'Bus ride', 'carbon_kg': 1.2, 'estimated_savings_kg': 2.5},
+                content_type='application/json',
+            )
+            if response.status_code != 201:
+                raise CommandError(f'POST /api/actions/ returned {response.status_code}')
+
+        def uncached(scope):
+            # make every run rebuild the response instead of reading the cache
+            return lambda: response_cache.bump(scope)
+
+        # also caches the user's auth snapshot, so the budgets below carry no auth query
+        etag = client.get('/api/impact/').get('ETag', '')
+        user_scope = response_cache.user_scope(account.pk)
+        organization = Membership.objects.filter(user=account).values_list('organization__slug', flat=True).first()
+        organization_scenarios = [
+            Scenario('org_dashboard', get(f'/api/organizations/{organization}/dashboard/'), 5, iterations),
+            Scenario('org_leaderboard', get(f'/api/organizations/{organization}/leaderboard/'), 3, iterations),
+        ] if organization else []
+        return [
+            Scenario('impact_summary', get('/api/impact/'), 5, iterations, uncached(user_scope)),
+            Scenario('impact_summary_304', get('/api/impact/', HTTP_IF_NONE_MATCH=etag), 0, iterations),
+            Scenario('leaderboard', get('/api/leaderboard/'), 4, iterations, uncached(response_cache.LEADERBOARD)),
+            Scenario('actions_list', get('/api/actions/'), 2, iterations),
+            Scenario('events_list', get('/api/events/'), 2, iterations),
+            Scenario('community_ranking', get('/api/community/ranking/?by=hosts'), 2, iterations),
+            *organization_scenarios,
+            Scenario('action_create', create_action, 20, iterations),
+            Scenario(
+                'recompute_scores',
+                lambda: recompute_scores_and_badges(shards=1),
+                12 + 2 * TASK_RUN_QUERIES,
+                task_iterations,
+            ),
+            Scenario(
+                'send_due_reminders',
+                lambda: send_due_reminders(workers=1),
+                # a transaction per claimed chunk plus the final empty claim
+                4 * (Reminder.objects.count() // 200 + 1) + 3 + 2 * TASK_RUN_QUERIES,
+                task_iterations,
+                # re-arm the due reminders so every run delivers the same batch
+                lambda: Reminder.objects.filter(user__email__endswith=f'@{BENCH_DOMAIN}').update(delivered=False),
+            ),
+        ]
+
+    def _run_all(self, account, iterations, task_iterations, only, overrides):
+        results = []
+        for scenario in self._scenarios(account, iterations, task_iterations):
+            if only and scenario.name not in only:
+                continue
+            budget = overrides.get(scenario.name, scenario.budget)
+            timings, queries = [], 0
+            for _ in range(scenario.iterations):
+                if scenario.setup:
+                    scenario.setup()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    scenario.run()
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries = max(queries, len(captured.captured_queries))
+            timings.sort()
+            results.append({
+                'name': scenario.name,
+                'runs': len(timings),
+                'p50_ms': statistics.median(timings),
+                'p95_ms': _percentile(timings, 0.95),
+                'p99_ms': _percentile(timings, 0.99),
+                'max_ms': timings[-1],
+                'queries': queries,
+                'budget': budget,
+                'over_budget': queries > budget,
+            })
+        return results
@@ -0,0 +1,55 @@
+import resource
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ecoactions import exports
+from ecoactions.management.commands.seed_benchmark_data import BENCH_DOMAIN
+from ecoactions.models import EcoAction
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream the action export over growing row counts of seeded data and report peak memory; '
+        'exits non-zero when the peak grows with the row count.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+        parser.add_argument('--format', dest='fmt', choices=sorted(exports.ENCODERS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument(
+            '--tolerance', type=float, default=2.0,
+            help='Largest allowed ratio between the peak of any size and the first size that fills a cursor chunk.',
+        )
+
+    def handle(self, *args, sizes, fmt, gzip, tolerance, **options):
+        queryset = EcoAction.objects.filter(user__email__endswith=f'@{BENCH_DOMAIN}').order_by('created_at', 'id')
+        available = queryset.count()
+        sizes = sorted(size for size in sizes if size <= available)
+        if not sizes:
+            raise CommandError(f'Only {available} seeded actions; run seed_benchmark_data with more users or actions')
+
+        self.stdout.write(f"{'rows':>10}{'bytes':>14}{'seconds':>10}{'peak heap KiB':>15}{'max RSS MiB':>13}")
+        peaks = []
+        for size in sizes:
+            tracemalloc.start()
+            started = time.monotonic()
+            written = sum(len(block) for block in exports.stream(queryset[:size], fmt, gzip=gzip))
+            elapsed = time.monotonic() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peaks.append(peak)
+            # ru_maxrss is KiB on Linux and only ever grows; a flat column means no size needed more
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            self.stdout.write(f'{size:>10}{written:>14}{elapsed:>10.2f}{peak / 1024:>15.0f}{max_rss:>13.1f}')
+
+        # exports shorter than one cursor chunk never hold a full chunk, so they
+        # are reported but not used as the baseline
+        base = next((index for index, size in enumerate(sizes) if size >= settings.EXPORT_CHUNK_SIZE), 0)
+        ratio = max(peaks[base:]) / peaks[base]
+        if ratio > tolerance:
+            raise CommandError(f'Peak heap grew {ratio:.1f}x from {sizes[base]} to {sizes[-1]} rows')
+        self.stdout.write(self.style.SUCCESS(f'Peak heap within {ratio:.2f}x of the {sizes[base]}-row export'))
@@ -0,0 +1,40 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ecoactions import receipts
+
+
+def _extract(path):
+    with open(path, 'rb') as file_obj:
+        text = receipts.extract_text(file_obj, 'application/pdf', max_pages=settings.RECEIPT_EXTRACTION_MAX_PAGES)
+    return receipts.looks_verified(text)
+
+
+class Command(BaseCommand):
+    help = 'Measure receipt text extraction throughput (documents/sec per core) on sample PDFs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Sample PDF receipts.')
+        parser.add_argument('--repeat', type=int, default=20, help='Times each sample is parsed.')
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, paths, repeat, processes, **options):
+        missing = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            raise CommandError(f"Not found: {', '.join(missing)}")
+
+        jobs = [path for path in paths for _ in range(repeat)]
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            verified = sum(pool.map(_extract, jobs, chunksize=max(1, len(jobs) // (processes * 4))))
+        elapsed = time.perf_counter() - started
+
+        rate = len(jobs) / elapsed if elapsed else float(len(jobs))
+        self.stdout.write(
+            f'{len(jobs)} documents in {elapsed:.2f}s on {processes} processes: '
+            f'{rate:.1f} docs/s, {rate / processes:.1f} docs/s per core ({verified} verified)'
+        )
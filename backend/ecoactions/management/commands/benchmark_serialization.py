@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from ecoactions import readers
+from ecoactions.models import EcoAction
+from ecoactions.serializers import EcoActionSerializer
+from ecosphere.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rows/sec per core of the ModelSerializer and .values() action list paths, '
+        'each rendered with the stdlib JSON and the orjson renderer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Actions serialized per run.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, rows, repeat, **options):
+        queryset = EcoAction.objects.order_by('-created_at', '-id')[:rows]
+        count = queryset.count()
+        if not count:
+            raise CommandError('No actions to serialize; run seed_benchmark_data first')
+
+        paths = {
+            'serializer': lambda: EcoActionSerializer(queryset, many=True).data,
+            'values': lambda: list(readers.action_rows(queryset)),
+        }
+        renderers = {'json': JSONRenderer(), 'orjson': ORJSONRenderer()}
+
+        self.stdout.write(f'{count} rows x {repeat} runs; CPU time of this process, so rates are per core')
+        self.stdout.write(f"{'path':<12}{'renderer':<10}{'fetch+build':>14}{'render':>12}{'rows/s':>12}")
+        baseline = None
+        for path, build in paths.items():
+            for name, renderer in renderers.items():
+                build_seconds = render_seconds = 0.0
+                for _ in range(repeat):
+                    started = time.process_time()
+                    data = build()
+                    built = time.process_time()
+                    renderer.render(data)
+                    build_seconds += built - started
+                    render_seconds += time.process_time() - built
+                rate = count * repeat / (build_seconds + render_seconds)
+                baseline = baseline or rate
+                self.stdout.write(
+                    f'{path:<12}{name:<10}{build_seconds / repeat * 1000:>11.1f} ms'
+                    f'{render_seconds / repeat * 1000:>9.1f} ms{rate:>12.0f}  ({rate / baseline:.1f}x)'
+                )
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from ecoactions import rollups
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user impact rollups from the EcoAction table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only rebuild these user ids.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, user_ids=None, batch_size=500, **options):
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        if user_ids:
+            users = users.filter(id__in=user_ids)
+
+        user_count, cell_count = 0, 0
+        for batch in rollups.batched(users.iterator(chunk_size=batch_size), batch_size):
+            cell_count += rollups.rebuild(batch)
+            user_count += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {cell_count} rollup cells for {user_count} users'))
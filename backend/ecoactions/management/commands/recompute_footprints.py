@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ecoactions import estimation, rollups
+from ecoactions.models import EcoAction
+from ecosphere import response_cache
+from organizations import rollups as org_rollups
+
+
+class Command(BaseCommand):
+    help = 'Re-estimate server-estimated actions with the current emission factor table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--all', action='store_true', dest='include_current', help='Also re-estimate rows already on the current version.')
+
+    def handle(self, *args, chunk_size=5000, include_current=False, **options):
+        factors = estimation.get_factors()
+        actions = (
+            EcoAction.objects.filter(data__has_key='factor_version')
+            .only(
+                'id', 'user_id', 'category', 'severity', 'carbon_kg', 'estimated_savings_kg',
+                'distance_km', 'packaging_type', 'data', 'created_at',
+            )
+            .order_by('id')
+        )
+        if not include_current:
+            actions = actions.exclude(data__factor_version=factors.version)
+
+        scanned = updated = 0
+        for chunk in rollups.batched(actions.iterator(chunk_size=chunk_size), chunk_size):
+            scanned += len(chunk)
+            carbon, savings, errors = estimation.estimate([
+                estimation.inputs_from_action(action.category, action.distance_km, action.packaging_type, action.data)
+                for action in chunk
+            ], factors)
+
+            before, after = [], []
+            for index, action in enumerate(chunk):
+                if index in errors:
+                    continue
+                before.append(EcoAction(
+                    user_id=action.user_id,
+                    category=action.category,
+                    severity=action.severity,
+                    carbon_kg=action.carbon_kg,
+                    estimated_savings_kg=action.estimated_savings_kg,
+                    created_at=action.created_at,
+                ))
+                action.carbon_kg = float(carbon[index])
+                action.estimated_savings_kg = float(savings[index])
+                action.data = {**action.data, 'factor_version': factors.version}
+                action.updated_at = timezone.now()
+                after.append(action)
+
+            with transaction.atomic():
+                EcoAction.objects.bulk_update(after, ['carbon_kg', 'estimated_savings_kg', 'data', 'updated_at'])
+                # bulk_update skips the model signals, so move the rollups here
+                rollups.apply_deltas(rollups.collect_deltas(removed=before, added=after))
+                org_rollups.apply_action_deltas(removed=before, added=after)
+                response_cache.bump_users(action.user_id for action in after)
+            updated += len(after)
+            self.stdout.write(f'{scanned} scanned, {updated} re-estimated')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-estimated {updated} of {scanned} actions with factors {factors.version}; '
+            'run recompute_scores_and_badges to refresh eco scores'
+        ))
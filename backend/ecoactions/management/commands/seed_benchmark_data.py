@@ -0,0 +1,200 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from community import leaderboard, ranking
+from community.models import CommunityEvent
+from ecoactions import rollups
+from ecoactions.models import EcoAction, Reminder
+from ecoactions.tasks import recompute_scores_shard
+from organizations import rollups as org_rollups
+from organizations.models import Membership, Organization
+
+User = get_user_model()
+
+BENCH_DOMAIN = 'bench.invalid'
+BENCH_PASSWORD = 'benchmark'
+
+# (category, weight, action types, median kg CO2e)
+CATEGORIES = [
+    ('food', 35, ['Groceries', 'Takeaway', 'Meal prep', 'Farmers market'], 2.0),
+    ('travel', 30, ['Commute', 'Bus ride', 'Train trip', 'Car trip', 'Bike ride'], 4.0),
+    ('energy', 20, ['Laundry', 'Heating', 'Air conditioning', 'Dishwasher'], 1.5),
+    ('waste', 15, ['Recycling run', 'Compost', 'Bulk pickup'], 0.5),
+]
+DISPOSAL = ['recycled', 'recycled', 'composted', 'reused', 'landfill']
+
+
+def _severity(carbon_kg):
+    if carbon_kg < 1:
+        return 'low'
+    if carbon_kg < 5:
+        return 'medium'
+    return 'high'
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic benchmark users, actions, reminders and events with bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--actions', type=int, default=200, help='Actions per user.')
+        parser.add_argument('--reminders', type=int, default=10, help='Reminders per user.')
+        parser.add_argument('--events', type=int, default=50)
+        parser.add_argument('--participants', type=int, default=40, help='Participants per event.')
+        parser.add_argument(
+            '--organizations', type=int, default=0,
+            help='Organizations to spread the seeded users over, for the org dashboards.',
+        )
+        parser.add_argument('--days', type=int, default=365, help='History length actions are spread over.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed, for reproducible data sets.')
+        parser.add_argument('--batch-size', type=int, default=100, help='Users generated per transaction.')
+        parser.add_argument('--flush', action='store_true', help='Delete previously seeded users first.')
+
+    def handle(self, *args, users, actions, reminders, events, participants, organizations, days, seed, batch_size, flush, **options):
+        rng = random.Random(seed)
+        started = time.monotonic()
+        if flush:
+            deleted, _ = User.objects.filter(email__endswith=f'@{BENCH_DOMAIN}').delete()
+            Organization.objects.filter(slug__startswith='bench-org-').delete()
+            self.stdout.write(f'Flushed {deleted} rows from the previous seed')
+
+        offset = User.objects.filter(email__endswith=f'@{BENCH_DOMAIN}').count()
+        password = make_password(BENCH_PASSWORD)
+        user_ids, action_count, reminder_count = [], 0, 0
+        for first in range(0, users, batch_size):
+            count = min(batch_size, users - first)
+            with transaction.atomic():
+                batch = User.objects.bulk_create([
+                    User(
+                        username=f'bench-user-{offset + first + index:06d}',
+                        email=f'bench-user-{offset + first + index:06d}@{BENCH_DOMAIN}',
+                        password=password,
+                    )
+                    for index in range(count)
+                ])
+                ids = [user.pk for user in batch]
+                created = self._seed_actions(rng, ids, actions, days)
+                action_count += len(created)
+                reminder_count += self._seed_reminders(rng, created, reminders)
+                rollups.rebuild(ids)
+                rollups.rebuild_daily(ids)
+            user_ids.extend(ids)
+            self.stdout.write(f'{len(user_ids)}/{users} users seeded')
+
+        if user_ids:
+            self._seed_events(rng, user_ids, events, participants)
+            self._seed_organizations(user_ids, organizations)
+            recompute_scores_shard(min(user_ids), max(user_ids))
+            for window in leaderboard.WINDOWS:
+                leaderboard.rebuild(window)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(user_ids)} users, {action_count} actions, '
+            f'{reminder_count} reminders and {events if user_ids else 0} events '
+            f'in {time.monotonic() - started:.1f}s (password: {BENCH_PASSWORD!r})'
+        ))
+
+    def _seed_actions(self, rng, user_ids, per_user, days):
+        now = timezone.now()
+        weights = [weight for _, weight, _, _ in CATEGORIES]
+        rows = []
+        for user_id in user_ids:
+            for _ in range(per_user):
+                category, _, action_types, median = rng.choices(CATEGORIES, weights)[0]
+                carbon = round(rng.lognormvariate(0, 0.8) * median, 3)
+                # most activity is recent: skew the age towards today
+                created_at = now - timedelta(days=days * rng.random() ** 2, seconds=rng.randrange(86400))
+                rows.append(EcoAction(
+                    user_id=user_id,
+                    category=category,
+                    action_type=rng.choice(action_types),
+                    carbon_kg=carbon,
+                    estimated_savings_kg=round(carbon * rng.uniform(0, 0.6), 3),
+                    origin='local' if category == 'food' and rng.random() < 0.2 else '',
+                    distance_km=round(rng.uniform(1, 40), 1) if category == 'travel' else 0,
+                    disposal_method=rng.choice(DISPOSAL) if category == 'waste' else 'n/a',
+                    expiry_date=(
+                        date.today() + timedelta(days=rng.randint(0, 14))
+                        if category == 'food' and rng.random() < 0.3 else None
+                    ),
+                    severity=_severity(carbon),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+        stamps = [(row.created_at, row.updated_at) for row in rows]
+        created = EcoAction.objects.bulk_create(rows, batch_size=2000)
+        # auto_now/auto_now_add overwrite the timestamps on insert; put the history back
+        for action, (created_at, updated_at) in zip(created, stamps):
+            action.created_at, action.updated_at = created_at, updated_at
+        EcoAction.objects.bulk_update(created, ['created_at', 'updated_at'], batch_size=1000)
+        return created
+
+    def _seed_reminders(self, rng, actions, per_user):
+        by_user = {}
+        for action in actions:
+            by_user.setdefault(action.user_id, []).append(action)
+        today = date.today()
+        rows = []
+        for user_id, owned in by_user.items():
+            for action in rng.sample(owned, min(per_user, len(owned))):
+                due_date = today + timedelta(days=rng.randint(-7, 14))
+                rows.append(Reminder(
+                    user_id=user_id,
+                    action=action,
+                    message=f'Follow up on {action.action_type}',
+                    due_date=due_date,
+                    severity=action.severity,
+                    delivered=due_date < today and rng.random() < 0.5,
+                ))
+        Reminder.objects.bulk_create(rows, batch_size=2000)
+        return len(rows)
+
+    def _seed_events(self, rng, user_ids, count, per_event):
+        now = timezone.now()
+        with transaction.atomic():
+            created = CommunityEvent.objects.bulk_create([
+                CommunityEvent(
+                    name=f'Benchmark event {index + 1}',
+                    location=rng.choice(['Park', 'Library', 'Beach', 'Community hall', '']),
+                    points=rng.choice([10, 20, 25, 50]),
+                    starts_at=now + timedelta(days=rng.randint(-30, 30)),
+                    status='completed' if rng.random() < 0.2 else 'open',
+                    host_id=rng.choice(user_ids),
+                    is_virtual=rng.random() < 0.25,
+                )
+                for index in range(count)
+            ])
+            Through = CommunityEvent.participants.through
+            Through.objects.bulk_create([
+                Through(communityevent_id=event.pk, customuser_id=user_id)
+                for event in created
+                for user_id in rng.sample(user_ids, min(per_event, len(user_ids)))
+            ], batch_size=5000)
+            # bulk_create skips the signals that keep the ranking counters
+            ranking.rebuild()
+
+    def _seed_organizations(self, user_ids, count):
+        if not count:
+            return
+        offset = Organization.objects.filter(slug__startswith='bench-org-').count()
+        created = [
+            Organization.objects.create(
+                name=f'Benchmark organization {offset + index + 1}',
+                slug=f'bench-org-{offset + index + 1}',
+                kind=['campus', 'city', 'enterprise'][index % 3],
+            )
+            for index in range(count)
+        ]
+        # bulk_create skips the membership signals; rebuild folds everyone in at once
+        Membership.objects.bulk_create([
+            Membership(organization=created[index % count], user_id=user_id)
+            for index, user_id in enumerate(user_ids)
+        ], batch_size=5000)
+        org_rollups.rebuild([organization.pk for organization in created])
@@ -0,0 +1,54 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_impact_rollups(apps, schema_editor):
+    EcoAction = apps.get_model('ecoactions', 'EcoAction')
+    ImpactRollup = apps.get_model('ecoactions', 'ImpactRollup')
+    rows = (
+        EcoAction.objects.order_by()
+        .values('user_id', 'category', 'severity')
+        .annotate(
+            count=models.Count('id'),
+            carbon=models.Sum('carbon_kg'),
+            savings=models.Sum('estimated_savings_kg'),
+        )
+    )
+    ImpactRollup.objects.bulk_create([
+        ImpactRollup(
+            user_id=row['user_id'],
+            category=row['category'],
+            severity=row['severity'],
+            action_count=row['count'],
+            carbon_kg=row['carbon'] or 0,
+            savings_kg=row['savings'] or 0,
+        )
+        for row in rows
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('ecoactions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImpactRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('food', 'Food'), ('travel', 'Travel'), ('energy', 'Energy'), ('waste', 'Waste')], max_length=20)),
+                ('severity', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=20)),
+                ('action_count', models.IntegerField(default=0)),
+                ('carbon_kg', models.FloatField(default=0)),
+                ('savings_kg', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='impact_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'category', 'severity'), name='uniq_impact_rollup_cell')],
+            },
+        ),
+        migrations.RunPython(backfill_impact_rollups, migrations.RunPython.noop),
+    ]
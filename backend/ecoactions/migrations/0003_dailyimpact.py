@@ -0,0 +1,66 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def backfill_daily_impact(apps, schema_editor):
+    EcoAction = apps.get_model('ecoactions', 'EcoAction')
+    DailyImpact = apps.get_model('ecoactions', 'DailyImpact')
+    rows = (
+        EcoAction.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'category', 'day')
+        .annotate(
+            count=models.Count('id'),
+            carbon=models.Sum('carbon_kg'),
+            savings=models.Sum('estimated_savings_kg'),
+        )
+    )
+    # stream the grouped rows and insert them a batch at a time, so the
+    # backfill never holds every bucket of the history in memory
+    batch = []
+    for row in rows.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        batch.append(DailyImpact(
+            user_id=row['user_id'],
+            category=row['category'],
+            day=row['day'],
+            action_count=row['count'],
+            carbon_kg=row['carbon'] or 0,
+            savings_kg=row['savings'] or 0,
+        ))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            DailyImpact.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        DailyImpact.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('ecoactions', '0002_impactrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyImpact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('food', 'Food'), ('travel', 'Travel'), ('energy', 'Energy'), ('waste', 'Waste')], max_length=20)),
+                ('day', models.DateField()),
+                ('action_count', models.IntegerField(default=0)),
+                ('carbon_kg', models.FloatField(default=0)),
+                ('savings_kg', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_impacts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['day'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day', 'category'), name='uniq_daily_impact_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_impact, migrations.RunPython.noop),
+    ]
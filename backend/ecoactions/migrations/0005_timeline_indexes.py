@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('ecoactions', '0004_ecoaction_client_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ecoaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='ecoaction_user_timeline'),
+        ),
+        migrations.AddIndex(
+            model_name='ecoaction',
+            index=models.Index(fields=['user', 'category', '-created_at', '-id'], name='ecoaction_user_cat_timeline'),
+        ),
+    ]
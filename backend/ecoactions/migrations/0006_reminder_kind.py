@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('ecoactions', '0005_timeline_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='kind',
+            field=models.CharField(choices=[('custom', 'Custom'), ('expiry_7d', '7 days before expiry'), ('expiry_3d', '3 days before expiry'), ('expiry_day', 'Expiry day')], default='custom', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='ecoaction',
+            index=models.Index(condition=models.Q(('expiry_date__isnull', False)), fields=['expiry_date'], name='ecoaction_expiry'),
+        ),
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'custom'), _negated=True), fields=('action', 'kind'), name='uniq_reminder_expiry_tier'),
+        ),
+    ]
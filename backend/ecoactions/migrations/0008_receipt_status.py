@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+def mark_existing_done(apps, schema_editor):
+    # receipts stored before extraction went async were parsed on upload
+    apps.get_model('ecoactions', 'Receipt').objects.update(status='done')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('ecoactions', '0007_receipt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_done, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_reminder_updated_at(apps, schema_editor):
+    Reminder = apps.get_model('ecoactions', 'Reminder')
+    Reminder.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('ecoactions', '0008_receipt_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_reminder_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ecoaction',
+            index=models.Index(fields=['user', 'updated_at'], name='ecoaction_user_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'updated_at'], name='reminder_user_updated'),
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('action', 'Eco action'), ('reminder', 'Reminder')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted')],
+            },
+        ),
+    ]
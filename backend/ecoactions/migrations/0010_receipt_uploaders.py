@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_uploaders(apps, schema_editor):
+    Receipt = apps.get_model('ecoactions', 'Receipt')
+    Uploader = Receipt.uploaders.through
+    rows = Receipt.objects.exclude(uploaded_by=None).values_list('id', 'uploaded_by_id')
+    batch = []
+    for receipt_id, user_id in rows.iterator(chunk_size=5000):
+        batch.append(Uploader(receipt_id=receipt_id, customuser_id=user_id))
+        if len(batch) >= 5000:
+            Uploader.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Uploader.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('ecoactions', '0009_delta_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='uploaders',
+            field=models.ManyToManyField(blank=True, related_name='uploaded_receipts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_uploaders, migrations.RunPython.noop),
+    ]
@@ -37,27 +37,177 @@ class EcoAction(models.Model):
     estimated_savings_kg = models.FloatField(default=0)
     receipt_url = models.URLField(blank=True)
     data = models.JSONField(default=dict, blank=True)
+    # client-generated id so retried offline syncs do not insert twice
+    client_key = models.CharField(max_length=64, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'client_key'],
+                condition=~models.Q(client_key=''),
+                name='uniq_ecoaction_client_key',
+            ),
+        ]
+        indexes = [
+            # keyset pagination of the timeline, optionally per category
+            models.Index(fields=['user', '-created_at', '-id'], name='ecoaction_user_timeline'),
+            models.Index(fields=['user', 'category', '-created_at', '-id'], name='ecoaction_user_cat_timeline'),
+            # delta sync: rows changed since a client's last sync
+            models.Index(fields=['user', 'updated_at'], name='ecoaction_user_updated'),
+            models.Index(
+                fields=['expiry_date'],
+                condition=models.Q(expiry_date__isnull=False),
+                name='ecoaction_expiry',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.category} ({self.carbon_kg} kg)"
 
 
 class Reminder(models.Model):
+    CUSTOM = 'custom'
+    KIND_CHOICES = [
+        (CUSTOM, 'Custom'),
+        ('expiry_7d', '7 days before expiry'),
+        ('expiry_3d', '3 days before expiry'),
+        ('expiry_day', 'Expiry day'),
+    ]
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reminders')
     action = models.ForeignKey(EcoAction, on_delete=models.CASCADE, related_name='reminders')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=CUSTOM)
     message = models.CharField(max_length=255)
     due_date = models.DateField()
     severity = models.CharField(max_length=20, default='medium')
     delivered = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='reminder_user_updated'),
+        ]
+        constraints = [
+            # one generated reminder per expiry tier, so generation can be re-run
+            models.UniqueConstraint(
+                fields=['action', 'kind'],
+                condition=~models.Q(kind='custom'),
+                name='uniq_reminder_expiry_tier',
+            ),
+        ]
 
     def __str__(self):
         return f"Reminder for {self.action} on {self.due_date}"
+
+
+class Tombstone(models.Model):
+    """Marks a deleted action or reminder so delta sync can tell clients to drop it."""
+
+    ACTION = 'action'
+    REMINDER = 'reminder'
+    KIND_CHOICES = [
+        (ACTION, 'Eco action'),
+        (REMINDER, 'Reminder'),
+    ]
+
+    # no FK constraint: tombstones are written while a user's rows cascade away
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted {self.deleted_at:%Y-%m-%d}"
+
+
+class ImpactRollup(models.Model):
+    """Running per-user totals for one (category, severity) cell.
+
+    Maintained alongside every EcoAction write so the impact summary reads at
+    most a dozen rows instead of scanning the user's full history.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='impact_rollups')
+    category = models.CharField(max_length=20, choices=EcoAction.CATEGORY_CHOICES)
+    severity = models.CharField(max_length=20, choices=EcoAction.SEVERITY_CHOICES)
+    action_count = models.IntegerField(default=0)
+    carbon_kg = models.FloatField(default=0)
+    savings_kg = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category', 'severity'], name='uniq_impact_rollup_cell'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.category}/{self.severity}: {self.action_count} actions"
+
+
+class DailyImpact(models.Model):
+    """Per-user, per-category totals for one calendar day of EcoAction activity."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_impacts')
+    category = models.CharField(max_length=20, choices=EcoAction.CATEGORY_CHOICES)
+    day = models.DateField()
+    action_count = models.IntegerField(default=0)
+    carbon_kg = models.FloatField(default=0)
+    savings_kg = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day', 'category'], name='uniq_daily_impact_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.category} on {self.day}: {self.carbon_kg} kg"
+
+
+class Receipt(models.Model):
+    """An uploaded receipt, stored once per distinct content hash.
+
+    Users see a receipt only if they uploaded its content themselves
+    (``uploaders``) or it is linked to one of their actions.
+    """
+
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    key = models.CharField(max_length=255)
+    url = models.CharField(max_length=500)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(default=0)
+    text_snippet = models.TextField(blank=True)
+    verified = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    error = models.CharField(max_length=255, blank=True)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='receipts'
+    )
+    uploaders = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='uploaded_receipts')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Receipt {self.sha256[:12]} ({self.content_type})"
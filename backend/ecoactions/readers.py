@@ -0,0 +1,29 @@
+"""Read-only fast path for listing actions and reminders.
+
+List endpoints build their rows straight from ``.values()`` instead of
+instantiating a model and running a ``ModelSerializer`` per row. The dicts
+carry the same keys as ``EcoActionSerializer``/``ReminderSerializer``, and
+``impact_label`` is computed by the database.
+"""
+from django.db.models import Case, CharField, Value, When
+
+from .serializers import EcoActionSerializer, ReminderSerializer
+
+# same thresholds as EcoActionSerializer.get_impact_label
+IMPACT_LABEL = Case(
+    When(carbon_kg__lt=1, then=Value('Low')),
+    When(carbon_kg__lt=5, then=Value('Medium')),
+    default=Value('High'),
+    output_field=CharField(),
+)
+
+ACTION_FIELDS = [field for field in EcoActionSerializer.Meta.fields if field != 'impact_label']
+REMINDER_FIELDS = list(ReminderSerializer.Meta.fields)
+
+
+def action_rows(queryset):
+    return queryset.annotate(impact_label=IMPACT_LABEL).values(*ACTION_FIELDS, 'impact_label')
+
+
+def reminder_rows(queryset):
+    return queryset.values(*REMINDER_FIELDS)
@@ -0,0 +1,97 @@
+"""Receipt hashing, text extraction and verification."""
+import hashlib
+import os
+import re
+
+from PyPDF2 import PdfReader
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db.models import Exists, OuterRef, Q
+
+from .models import EcoAction, Receipt
+
+SNIPPET_LENGTH = 500
+TOTAL_PATTERN = re.compile(r"(total|amount due|balance)\s*[:]?\s*([$€£]?\d+[\.,]?\d*)", re.IGNORECASE)
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Computes a SHA-256 of each uploaded file while it streams in.
+
+    Chunks are passed through untouched to the next handler, which still
+    owns spooling the file; digests land on ``request.upload_digests``
+    keyed by form field name.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, 'upload_digests'):
+            self.request.upload_digests = {}
+        self.request.upload_digests[self.field_name] = self.hasher.hexdigest()
+        return None
+
+
+def file_digest(file_obj):
+    """SHA-256 of an uploaded file, read chunk by chunk."""
+    hasher = hashlib.sha256()
+    for chunk in file_obj.chunks():
+        hasher.update(chunk)
+    file_obj.seek(0)
+    return hasher.hexdigest()
+
+
+def storage_key(digest, filename):
+    extension = os.path.splitext(filename or '')[1].lower()[:10]
+    return f"receipts/sha256/{digest[:2]}/{digest}{extension}"
+
+
+def extract_text(file_obj, content_type, max_pages=2):
+    """Extract a small text snippet from PDF or text uploads for receipt verification.
+
+    Reads straight from the file object rather than copying it into memory
+    and reads at most ``max_pages`` PDF pages. Parser errors propagate so the
+    caller can record them.
+    """
+    try:
+        if content_type.startswith('application/pdf'):
+            reader = PdfReader(file_obj)
+            text_chunks = []
+            for page in reader.pages[:max_pages]:
+                text_chunks.append(page.extract_text() or '')
+            return '\n'.join([chunk for chunk in text_chunks if chunk])[:SNIPPET_LENGTH]
+        # For text-based uploads (plain text, json, csv) decode only the snippet
+        if content_type.startswith(('text/', 'application/json', 'application/csv')):
+            return file_obj.read(SNIPPET_LENGTH * 4).decode(errors='ignore')[:SNIPPET_LENGTH]
+    finally:
+        file_obj.seek(0)
+    return ''
+
+
+def looks_verified(text):
+    """Whether the snippet carries a total/amount due line."""
+    return bool(text and TOTAL_PATTERN.search(text))
+
+
+def visible_to(user):
+    """Receipts ``user`` uploaded themselves or has linked to one of their actions."""
+    Uploader = Receipt.uploaders.through
+    uploaded = Uploader.objects.filter(receipt_id=OuterRef('pk'), customuser_id=user.pk)
+    linked = EcoAction.objects.filter(user=user, data__receipt_sha256=OuterRef('sha256'))
+    return Receipt.objects.filter(Q(Exists(uploaded)) | Q(Exists(linked)))
+
+
+def attach(receipt, action):
+    """Copy a receipt's extraction result into the linked action's data."""
+    action.data = {
+        **(action.data or {}),
+        'receipt_sha256': receipt.sha256,
+        'receipt_status': receipt.status,
+        'receipt_text': receipt.text_snippet,
+        'receipt_verified': receipt.verified,
+    }
+    action.save(update_fields=['data', 'updated_at'])
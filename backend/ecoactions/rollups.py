@@ -0,0 +1,178 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DailyImpact, EcoAction, ImpactRollup
+
+PERIODS = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def rollup_cells(action):
+    """The rollup rows an action contributes to, as (model, lookup) pairs."""
+    yield ImpactRollup, (
+        ('user_id', action.user_id),
+        ('category', action.category),
+        ('severity', action.severity),
+    )
+    yield DailyImpact, (
+        ('user_id', action.user_id),
+        ('category', action.category),
+        ('day', timezone.localdate(action.created_at)),
+    )
+
+
+def collect_deltas(removed=(), added=()):
+    """Net (count, carbon, savings) change per rollup row for a set of action writes."""
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for sign, actions in ((-1, removed), (1, added)):
+        for action in actions:
+            for cell in rollup_cells(action):
+                delta = deltas[cell]
+                delta[0] += sign
+                delta[1] += sign * (action.carbon_kg or 0)
+                delta[2] += sign * (action.estimated_savings_kg or 0)
+    return {cell: tuple(value) for cell, value in deltas.items() if any(value)}
+
+
+def apply_deltas(deltas, create=True):
+    """Increment rollup rows in place; must run inside the action's transaction."""
+    for (model, lookup), (count, carbon, savings) in deltas.items():
+        lookup = dict(lookup)
+        cells = model.objects.filter(**lookup)
+        changes = {
+            'action_count': F('action_count') + count,
+            'carbon_kg': F('carbon_kg') + carbon,
+            'savings_kg': F('savings_kg') + savings,
+        }
+        if cells.update(**changes) or not create:
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, action_count=count, carbon_kg=carbon, savings_kg=savings)
+        except IntegrityError:
+            # another writer created the row first; fold into it
+            cells.update(**changes)
+
+
+def summarize(user):
+    """Impact totals for a user, read from their rollup cells."""
+    cells = ImpactRollup.objects.filter(user=user, action_count__gt=0).values(
+        'category', 'severity', 'action_count', 'carbon_kg', 'savings_kg'
+    )
+    breakdown = defaultdict(float)
+    severity = defaultdict(int)
+    totals = {'total_carbon': 0, 'total_savings': 0, 'action_count': 0}
+    for cell in cells:
+        breakdown[cell['category']] += cell['carbon_kg']
+        severity[cell['severity']] += cell['action_count']
+        totals['total_carbon'] += cell['carbon_kg']
+        totals['total_savings'] += cell['savings_kg']
+        totals['action_count'] += cell['action_count']
+    return {**totals, 'breakdown': dict(breakdown), 'severity': dict(severity)}
+
+
+def trends(user, start, end, period='day', category=None):
+    """Per-period totals between two dates (inclusive), read from daily buckets."""
+    buckets = DailyImpact.objects.filter(user=user, day__gte=start, day__lte=end, action_count__gt=0)
+    if category:
+        buckets = buckets.filter(category=category)
+    trunc = PERIODS[period]
+    bucket = trunc('day') if trunc else F('day')
+    rows = (
+        buckets.order_by()
+        .annotate(bucket=bucket)
+        .values('bucket', 'category')
+        .annotate(count=Sum('action_count'), carbon=Sum('carbon_kg'), savings=Sum('savings_kg'))
+        .order_by('bucket')
+    )
+
+    series = {}
+    for row in rows:
+        entry = series.setdefault(row['bucket'], {
+            'start': row['bucket'],
+            'action_count': 0,
+            'total_carbon': 0,
+            'total_savings': 0,
+            'breakdown': {},
+        })
+        entry['action_count'] += row['count']
+        entry['total_carbon'] += row['carbon']
+        entry['total_savings'] += row['savings']
+        entry['breakdown'][row['category']] = row['carbon']
+    return list(series.values())
+
+
+def batched(items, batch_size):
+    """Chunk an iterable, e.g. a queryset iterator, without materialising it."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild(user_ids):
+    """Recompute rollup cells for the given users from their EcoAction rows."""
+    with transaction.atomic():
+        ImpactRollup.objects.filter(user_id__in=user_ids).delete()
+        rows = (
+            EcoAction.objects.filter(user_id__in=user_ids)
+            .order_by()
+            .values('user_id', 'category', 'severity')
+            .annotate(count=Count('id'), carbon=Sum('carbon_kg'), savings=Sum('estimated_savings_kg'))
+        )
+        cells = [
+            ImpactRollup(
+                user_id=row['user_id'],
+                category=row['category'],
+                severity=row['severity'],
+                action_count=row['count'],
+                carbon_kg=row['carbon'] or 0,
+                savings_kg=row['savings'] or 0,
+            )
+            for row in rows
+        ]
+        ImpactRollup.objects.bulk_create(cells)
+    return len(cells)
+
+
+def rebuild_daily(user_ids, since=None, batch_size=2000):
+    """Recompute daily buckets for the given users, optionally from ``since`` on."""
+    with transaction.atomic():
+        stale = DailyImpact.objects.filter(user_id__in=user_ids)
+        actions = EcoAction.objects.filter(user_id__in=user_ids)
+        if since:
+            stale = stale.filter(day__gte=since)
+            actions = actions.filter(created_at__date__gte=since)
+        stale.delete()
+        rows = (
+            actions.order_by()
+            .annotate(day=TruncDate('created_at'))
+            .values('user_id', 'category', 'day')
+            .annotate(count=Count('id'), carbon=Sum('carbon_kg'), savings=Sum('estimated_savings_kg'))
+        )
+        written = 0
+        for chunk in batched(rows.iterator(chunk_size=batch_size), batch_size):
+            DailyImpact.objects.bulk_create([
+                DailyImpact(
+                    user_id=row['user_id'],
+                    category=row['category'],
+                    day=row['day'],
+                    action_count=row['count'],
+                    carbon_kg=row['carbon'] or 0,
+                    savings_kg=row['savings'] or 0,
+                )
+                for row in chunk
+            ])
+            written += len(chunk)
+    return written
@@ -1,9 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 
+from accounts import ledger
+from accounts.models import ScoreEntry
+from community import leaderboard
+from monitoring.serializers import TimedSerializerMixin
+from . import badges
 from .models import EcoAction, Reminder
 
+User = get_user_model()
 
-class EcoActionSerializer(serializers.ModelSerializer):
+
+class EcoActionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     impact_label = serializers.SerializerMethodField()
 
     class Meta:
@@ -22,6 +31,7 @@ class EcoActionSerializer(serializers.ModelSerializer):
             'estimated_savings_kg',
             'receipt_url',
             'data',
+            'client_key',
             'impact_label',
             'created_at',
             'updated_at',
@@ -35,35 +45,31 @@ class EcoActionSerializer(serializers.ModelSerializer):
             return 'Medium'
         return 'High'
 
+    # joins the view's transaction; a savepoint would only add two statements per write
+    @transaction.atomic(savepoint=False)
     def create(self, validated_data):
         user = self.context['request'].user
         validated_data['user'] = user
+        if validated_data.get('client_key'):
+            # the user-row lock batch ingestion takes, so a retry racing a sync waits and finds its action
+            User.objects.select_for_update().only('id').get(pk=user.pk)
+            existing = EcoAction.objects.filter(user=user, client_key=validated_data['client_key']).first()
+            if existing:
+                return existing
         action = super().create(validated_data)
-        profile = user
-        profile.eco_score = profile.eco_score + validated_data.get('estimated_savings_kg', 0) - validated_data.get('carbon_kg', 0)
-        profile.badges = self._derive_badges(profile)
-        profile.save(update_fields=['eco_score', 'badges'])
+        delta = action.estimated_savings_kg - action.carbon_kg
+        held = ledger.current(user)[1]
+        earned = set(badges.award(user, [action], held)) - set(held)
+        ledger.append(user.id, delta, ScoreEntry.ACTION, earned)
+        leaderboard.record(user.id, delta, ledger.score(user))
         return action
 
-    def _derive_badges(self, profile):
-        badges = set(profile.badges)
-        actions = profile.eco_actions.all()
-        if actions.filter(category='waste', disposal_method='recycled').count() >= 5:
-            badges.add('Zero Waste')
-        if actions.filter(category='travel', estimated_savings_kg__gt=0).count() >= 5:
-            badges.add('Transit Champ')
-        if actions.filter(origin__iexact='local').count() >= 3:
-            badges.add('Local Shopper')
-        if actions.count() >= 10:
-            badges.add('Eco Hero')
-        return list(badges)
-
 
-class ReminderSerializer(serializers.ModelSerializer):
+class ReminderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Reminder
-        fields = ['id', 'message', 'due_date', 'severity', 'delivered', 'action']
-        read_only_fields = ['delivered']
+        fields = ['id', 'kind', 'message', 'due_date', 'severity', 'delivered', 'action']
+        read_only_fields = ['kind', 'delivered']
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ecosphere import response_cache
+from organizations import rollups as org_rollups
+from . import rollups
+from .models import EcoAction, Reminder, Tombstone
+
+User = get_user_model()
+
+
+def _deleting_user(origin):
+    return isinstance(origin, User) or (isinstance(origin, QuerySet) and origin.model is User)
+
+
+@receiver(pre_save, sender=EcoAction)
+def remember_previous_action(sender, instance, raw=False, **kwargs):
+    instance._previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous = EcoAction.objects.filter(pk=instance.pk).only(
+        'user_id', 'category', 'severity', 'carbon_kg', 'estimated_savings_kg', 'created_at'
+    ).first()
+
+
+@receiver(post_save, sender=EcoAction)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    removed = [previous] if previous is not None and not created else []
+    rollups.apply_deltas(rollups.collect_deltas(removed=removed, added=[instance]))
+    org_rollups.apply_action_deltas(removed=removed, added=[instance])
+    instance._previous = None
+    response_cache.bump_users([instance.user_id] + ([previous.user_id] if removed else []))
+
+
+@receiver(post_delete, sender=EcoAction)
+def update_rollups_on_delete(sender, instance, origin=None, **kwargs):
+    # never create cells here: during a user cascade they may already be gone
+    rollups.apply_deltas(rollups.collect_deltas(removed=[instance]), create=False)
+    if not _deleting_user(origin):
+        # a deleted user's memberships take their whole history out of the organizations
+        org_rollups.apply_action_deltas(removed=[instance])
+    Tombstone.objects.create(user_id=instance.user_id, kind=Tombstone.ACTION, object_id=instance.pk)
+    response_cache.bump_users([instance.user_id])
+
+
+@receiver(post_save, sender=Reminder)
+@receiver(post_delete, sender=Reminder)
+def invalidate_reminder_owner(sender, instance, raw=False, **kwargs):
+    if not raw:
+        response_cache.bump_users([instance.user_id])
+
+
+@receiver(post_delete, sender=Reminder)
+def record_reminder_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(user_id=instance.user_id, kind=Tombstone.REMINDER, object_id=instance.pk)
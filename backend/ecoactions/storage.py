@@ -0,0 +1,110 @@
+"""Receipt storage backends.
+
+``S3ReceiptStorage`` talks to Cloudflare R2 (or any S3 API) through one
+boto3 client shared by every thread in the process; uploads stream from the
+file object and switch to multipart above ``RECEIPT_MULTIPART_THRESHOLD``.
+``FileSystemReceiptStorage`` writes under ``MEDIA_ROOT`` for local runs.
+"""
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_client = None
+_client_lock = threading.Lock()
+_storage = None
+
+
+def get_s3_client():
+    """Process-wide S3 client; boto3 clients are safe to share across threads."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = boto3.session.Session().client(
+                    's3',
+                    endpoint_url=settings.CLOUDFLARE_R2_ENDPOINT or None,
+                    aws_access_key_id=settings.CLOUDFLARE_R2_ACCESS_KEY,
+                    aws_secret_access_key=settings.CLOUDFLARE_R2_SECRET_KEY,
+                    config=Config(max_pool_connections=settings.RECEIPT_STORAGE_POOL_SIZE),
+                )
+    return _client
+
+
+class S3ReceiptStorage:
+    def __init__(self):
+        self.bucket = settings.CLOUDFLARE_R2_BUCKET
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.RECEIPT_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.RECEIPT_MULTIPART_THRESHOLD,
+            max_concurrency=4,
+        )
+
+    def save(self, file_obj, key, content_type):
+        file_obj.seek(0)
+        get_s3_client().upload_fileobj(
+            file_obj,
+            self.bucket,
+            key,
+            ExtraArgs={'ACL': 'public-read', 'ContentType': content_type},
+            Config=self.transfer_config,
+        )
+
+    def open(self, key):
+        """Download an object into a temp file that spills to disk when large."""
+        file_obj = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        get_s3_client().download_fileobj(self.bucket, key, file_obj, Config=self.transfer_config)
+        file_obj.seek(0)
+        return file_obj
+
+    def exists(self, key):
+        try:
+            get_s3_client().head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def url(self, key):
+        if settings.CLOUDFLARE_R2_ENDPOINT:
+            return f"{settings.CLOUDFLARE_R2_ENDPOINT}/{self.bucket}/{key}"
+        return key
+
+
+class FileSystemReceiptStorage:
+    chunk_size = 1024 * 1024
+
+    def __init__(self):
+        self.root = Path(settings.MEDIA_ROOT)
+
+    def save(self, file_obj, key, content_type):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file_obj.seek(0)
+        with open(path, 'wb') as destination:
+            shutil.copyfileobj(file_obj, destination, self.chunk_size)
+        file_obj.seek(0)
+
+    def open(self, key):
+        return open(self.root / key, 'rb')
+
+    def exists(self, key):
+        return (self.root / key).exists()
+
+    def url(self, key):
+        return f"{settings.MEDIA_URL}{key}"
+
+
+def get_receipt_storage():
+    global _storage
+    if _storage is None:
+        _storage = import_string(settings.RECEIPT_STORAGE_BACKEND)()
+    return _storage
@@ -0,0 +1,69 @@
+"""Delta sync of a user's actions and reminders.
+
+A sync token is an opaque encoding of the server time a sync started at.
+The next sync returns rows whose ``updated_at`` is at or after that time
+(less ``SYNC_OVERLAP_SECONDS``, so writes that committed late are not
+missed) plus tombstones for rows deleted since. Clients upsert by id, so
+the overlap only costs a few repeated rows. Tokens older than the tombstone
+retention window, or missing, get a full snapshot instead.
+"""
+import base64
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import EcoAction, Reminder, Tombstone
+
+TOKEN_VERSION = 'v1'
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def encode_token(when):
+    raw = f'{TOKEN_VERSION}|{when.isoformat()}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_token(token):
+    try:
+        version, when = base64.urlsafe_b64decode(token.encode()).decode().split('|')
+        when = datetime.fromisoformat(when)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidToken(token)
+    if version != TOKEN_VERSION or timezone.is_naive(when):
+        raise InvalidToken(token)
+    return when
+
+
+def changes(user, since=None):
+    """Actions, reminders and deleted ids for ``user`` changed after ``since``.
+
+    Returns a dict with querysets for ``actions`` and ``reminders``, lists of
+    deleted ids per kind, ``full`` (whether this is a snapshot) and the
+    ``token`` for the next call.
+    """
+    now = timezone.now()
+    retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    full = since is None or since < now - retention
+
+    actions = EcoAction.objects.filter(user=user)
+    reminders = Reminder.objects.filter(user=user)
+    deleted = {Tombstone.ACTION: [], Tombstone.REMINDER: []}
+    if not full:
+        since -= timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+        actions = actions.filter(updated_at__gte=since)
+        reminders = reminders.filter(updated_at__gte=since)
+        tombstones = Tombstone.objects.filter(user=user, deleted_at__gte=since).order_by('deleted_at')
+        for kind, object_id in tombstones.values_list('kind', 'object_id'):
+            deleted[kind].append(object_id)
+
+    return {
+        'token': encode_token(now),
+        'full': full,
+        'actions': actions.order_by('updated_at', 'id'),
+        'reminders': reminders.order_by('updated_at', 'id'),
+        'deleted': deleted,
+    }
@@ -1,70 +1,331 @@
-from datetime import date
+import time
+from collections import defaultdict
+from datetime import date, timedelta
 
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.utils.log import get_task_logger
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-<<<<<<< HEAD
-from django.core.mail import send_mail
-=======
->>>>>>> main
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Max, Min, Q, Sum
+from django.utils import timezone
 
-from .models import EcoAction, Reminder
+from accounts import ledger
+from accounts.authentication import invalidate_users
+from accounts.models import ScoreEntry
+from community import leaderboard
+from ecosphere import response_cache
+from monitoring.instrumentation import RECORD, SKIP, add_rows, fan_out, instrumented_task
+from . import badges, receipts
+from .models import EcoAction, Receipt, Reminder, Tombstone
+from .storage import get_receipt_storage
 
 User = get_user_model()
+logger = get_task_logger(__name__)
+
+
+def _reminder_email(reminder):
+    subject = f"EcoSphere reminder: {reminder.action.action_type} due soon"
+    message = (
+        f"Hi {reminder.user.username or reminder.user.email},\n\n"
+        f"This is your EcoSphere reminder for {reminder.action.action_type}.\n"
+        f"Due date: {reminder.due_date}\n"
+        f"Impact: {reminder.action.carbon_kg} kg CO₂e (severity: {reminder.severity}).\n\n"
+        "Log disposal, upload a receipt, or mark as reused/composted to protect your EcoScore.\n\n"
+        "— EcoSphere automations"
+    )
+    return EmailMessage(subject, message, None, [reminder.user.email])
+
+
+@shared_task
+@instrumented_task(overlap=RECORD)
+def send_due_reminders(workers=None):
+    """Deliver due reminders, optionally fanned out over several workers."""
+    workers = workers or settings.REMINDER_DELIVERY_WORKERS
+    if workers > 1:
+        fan_out(deliver_reminders.s() for _ in range(workers))
+        return f'Dispatched {workers} reminder workers'
+    result = deliver_reminders()
+    return f"Delivered {result['delivered']} reminders with notifications"
+
+
+@shared_task
+@instrumented_task(overlap=None)
+def deliver_reminders(chunk_size=None):
+    """Claim due reminders chunk by chunk and deliver them until none are left.
+
+    Each chunk is locked with ``FOR UPDATE SKIP LOCKED``, so concurrent
+    workers claim disjoint chunks; its mail goes out over one connection and
+    its delivered flags are set with a single UPDATE.
+    """
+    chunk_size = chunk_size or settings.REMINDER_CHUNK_SIZE
+    today = date.today()
+    delivered = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                Reminder.objects.filter(due_date__lte=today, delivered=False)
+                .select_related('user', 'action')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('id')[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            messages = [_reminder_email(reminder) for reminder in chunk if reminder.user.email]
+            if messages:
+                with get_connection(fail_silently=True) as connection:
+                    connection.send_messages(messages)
+            Reminder.objects.filter(pk__in=[reminder.pk for reminder in chunk]).update(
+                delivered=True,
+                updated_at=timezone.now(),
+            )
+            response_cache.bump_users(reminder.user_id for reminder in chunk)
+        delivered += len(chunk)
+        add_rows(len(chunk))
+
+    return {'delivered': delivered}
 
 
 @shared_task
-def send_due_reminders():
+@instrumented_task(overlap=SKIP)
+def purge_sync_tombstones(retention_days=None):
+    """Drop tombstones older than the oldest sync token still honoured."""
+    retention_days = retention_days or settings.SYNC_TOMBSTONE_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    add_rows(deleted)
+    return f'Purged {deleted} tombstones older than {retention_days} days'
+
+
+# (kind, days before expiry, severity) for the generated reminder tiers
+EXPIRY_TIERS = [
+    ('expiry_7d', 7, 'low'),
+    ('expiry_3d', 3, 'medium'),
+    ('expiry_day', 0, 'high'),
+]
+
+
+def _expiry_message(action, days_before):
+    if days_before == 0:
+        return f"{action.action_type} expires today"
+    return f"{action.action_type} expires in {days_before} days"
+
+
+@shared_task
+@instrumented_task(overlap=SKIP)
+def generate_expiry_reminders(lookahead_days=None, chunk_size=None):
+    """Create the 7d/3d/expiry-day reminders falling due within the lookahead.
+
+    Actions are found with a range query on the indexed ``expiry_date`` and
+    tiers are inserted with ``ignore_conflicts``, so re-running is harmless.
+    """
+    lookahead_days = settings.EXPIRY_REMINDER_LOOKAHEAD_DAYS if lookahead_days is None else lookahead_days
+    chunk_size = chunk_size or settings.REMINDER_CHUNK_SIZE
     today = date.today()
-    reminders = Reminder.objects.filter(due_date__lte=today, delivered=False)
-<<<<<<< HEAD
-    delivered_count = 0
-
-    for reminder in reminders.select_related('user', 'action'):
-        user_email = reminder.user.email
-        subject = f"EcoSphere reminder: {reminder.action.action_type} due soon"
-        message = (
-            f"Hi {reminder.user.username or reminder.user.email},\n\n"
-            f"This is your EcoSphere reminder for {reminder.action.action_type}.\n"
-            f"Due date: {reminder.due_date}\n"
-            f"Impact: {reminder.action.carbon_kg} kg CO₂e (severity: {reminder.severity}).\n\n"
-            "Log disposal, upload a receipt, or mark as reused/composted to protect your EcoScore.\n\n"
-            "— EcoSphere automations"
+    last_due = today + timedelta(days=lookahead_days)
+    longest_tier = max(days for _, days, _ in EXPIRY_TIERS)
+
+    actions = (
+        EcoAction.objects.filter(
+            expiry_date__gte=today,
+            expiry_date__lte=last_due + timedelta(days=longest_tier),
+            disposal_method='n/a',
         )
+        .only('id', 'user_id', 'action_type', 'expiry_date')
+        .order_by('expiry_date', 'id')
+    )
+
+    pending, considered = [], 0
+    for action in actions.iterator(chunk_size=chunk_size):
+        for kind, days_before, severity in EXPIRY_TIERS:
+            due_date = action.expiry_date - timedelta(days=days_before)
+            if not today <= due_date <= last_due:
+                continue
+            pending.append(Reminder(
+                user_id=action.user_id,
+                action_id=action.id,
+                kind=kind,
+                message=_expiry_message(action, days_before),
+                due_date=due_date,
+                severity=severity,
+            ))
+        if len(pending) >= chunk_size:
+            Reminder.objects.bulk_create(pending, ignore_conflicts=True)
+            response_cache.bump_users(reminder.user_id for reminder in pending)
+            considered += len(pending)
+            pending = []
+    if pending:
+        Reminder.objects.bulk_create(pending, ignore_conflicts=True)
+        response_cache.bump_users(reminder.user_id for reminder in pending)
+        considered += len(pending)
+    add_rows(considered)
 
-        if user_email:
-            send_mail(subject, message, None, [user_email], fail_silently=True)
+    return f'Ensured {considered} expiry reminders due by {last_due}'
 
-        reminder.delivered = True
-        reminder.save(update_fields=['delivered'])
-        delivered_count += 1
 
-    return f"Delivered {delivered_count} reminders with notifications"
-=======
-    delivered_count = reminders.update(delivered=True)
-    return f"Delivered {delivered_count} reminders"
->>>>>>> main
+@shared_task(
+    soft_time_limit=settings.RECEIPT_EXTRACTION_TIMEOUT,
+    time_limit=settings.RECEIPT_EXTRACTION_TIMEOUT + 10,
+)
+def extract_receipt(receipt_id, action_id=None):
+    """Parse a stored receipt and copy the result onto the linked action.
+
+    Routed to the ``receipts`` queue so PDF parsing runs on a dedicated
+    prefork pool instead of inside API workers.
+    """
+    receipt = Receipt.objects.get(pk=receipt_id)
+    if receipt.status == Receipt.PENDING:
+        try:
+            with get_receipt_storage().open(receipt.key) as file_obj:
+                text = receipts.extract_text(
+                    file_obj, receipt.content_type, max_pages=settings.RECEIPT_EXTRACTION_MAX_PAGES
+                )
+        except SoftTimeLimitExceeded:
+            receipt.status, receipt.error = Receipt.FAILED, 'Extraction timed out'
+        except Exception as exc:
+            logger.warning('Receipt %s extraction failed', receipt.sha256, exc_info=True)
+            receipt.status, receipt.error = Receipt.FAILED, str(exc)[:255]
+        else:
+            receipt.status = Receipt.DONE
+            receipt.text_snippet = text
+            receipt.verified = receipts.looks_verified(text)
+        receipt.save(update_fields=['status', 'error', 'text_snippet', 'verified'])
+
+    if action_id:
+        action = EcoAction.objects.filter(pk=action_id).first()
+        if action is not None:
+            receipts.attach(receipt, action)
+    return {'receipt': receipt.sha256, 'status': receipt.status}
+
+
+def _split_id_range(first_id, last_id, shards):
+    span = last_id - first_id + 1
+    step = -(-span // max(1, shards))
+    return [(lo, min(lo + step - 1, last_id)) for lo in range(first_id, last_id + 1, step)]
 
 
 @shared_task
-def recompute_scores_and_badges():
-    for user in User.objects.all():
-        actions = EcoAction.objects.filter(user=user)
-        carbon = actions.aggregate(total=Sum('carbon_kg')).get('total') or 0
-        savings = actions.aggregate(total=Sum('estimated_savings_kg')).get('total') or 0
-        eco_score = max(0, savings - carbon)
-
-        badges = set(user.badges)
-        if actions.filter(disposal_method='recycled').count() >= 5:
-            badges.add('Zero Waste')
-        if actions.filter(origin__iexact='local').count() >= 3:
-            badges.add('Local Shopper')
-        if actions.filter(category='travel', estimated_savings_kg__gt=0).count() >= 5:
-            badges.add('Transit Champ')
-        if actions.count() >= 10:
-            badges.add('Eco Hero')
-
-        user.eco_score = eco_score
-        user.badges = list(badges)
-        user.save(update_fields=['eco_score', 'badges'])
-    return 'Scores and badges updated'
+@instrumented_task(overlap=SKIP)
+def recompute_scores_and_badges(shards=None):
+    """Rebuild every user's eco_score and badges, fanned out over user-id shards."""
+    shards = shards or settings.SCORE_RECOMPUTE_SHARDS
+    bounds = User.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return 'No users to score'
+
+    ranges = _split_id_range(bounds['first'], bounds['last'], shards)
+    if len(ranges) == 1:
+        result = recompute_scores_shard(*ranges[0])
+        return f"Scores and badges updated for {result['users']} users ({result['rows_per_sec']:.0f} rows/s)"
+
+    fan_out(recompute_scores_shard.s(first_id, last_id) for first_id, last_id in ranges)
+    return f'Dispatched {len(ranges)} score shards'
+
+
+@shared_task
+@instrumented_task(overlap=None)
+def recompute_scores_shard(first_id, last_id, chunk_size=None):
+    """Score users with ids in [first_id, last_id] from one conditional-aggregate GROUP BY.
+
+    The score is savings minus carbon plus event and adjustment points, the
+    same unclamped sum the ledger accumulates. Badge criteria come from
+    ``badges.BADGE_RULES`` so they match the write path.
+
+    Locks are taken in ``ledger.compact``'s order: pending ledger entries
+    first, skipping any a running compaction has claimed, then the user rows
+    by primary key. Entries left pending, whether claimed elsewhere or
+    appended meanwhile, are kept out of the stored score so folding them
+    later adds them exactly once; the rest are marked compacted with the
+    rebuild.
+    """
+    chunk_size = chunk_size or settings.SCORE_RECOMPUTE_CHUNK_SIZE
+    started = time.monotonic()
+
+    entries = ScoreEntry.objects.filter(user_id__gte=first_id, user_id__lte=last_id)
+    users = User.objects.filter(id__range=(first_id, last_id)).only('id', 'eco_score', 'badges').order_by('id')
+    pending, scanned, updated, scores = [], 0, 0, []
+    with transaction.atomic():
+        claimed = list(
+            entries.select_for_update(skip_locked=True)
+            .filter(compacted=False)
+            .order_by('id')
+            .values_list('id', 'user_id', 'delta', 'badges', 'source')
+        )
+        # hold every user row before reading totals, so no compaction folds entries in between
+        for _ in users.select_for_update().values_list('id', flat=True).iterator(chunk_size=chunk_size):
+            pass
+
+        # event and adjustment points already folded in or claimed here; action entries
+        # still pending after that are summed from EcoAction below but added again when folded
+        bonus, unfolded, granted = defaultdict(float), defaultdict(float), defaultdict(set)
+        totals = (
+            entries.filter(
+                Q(compacted=True, source__in=[ScoreEntry.EVENT, ScoreEntry.ADJUSTMENT])
+                | Q(compacted=False, source=ScoreEntry.ACTION)
+            )
+            .order_by()
+            .values_list('user_id', 'compacted')
+            .annotate(total=Sum('delta'))
+        )
+        for user_id, compacted, total in totals:
+            (bonus if compacted else unfolded)[user_id] += total
+        for _, user_id, delta, earned, source in claimed:
+            if source == ScoreEntry.ACTION:
+                unfolded[user_id] -= delta
+            else:
+                bonus[user_id] += delta
+            granted[user_id].update(earned or ())
+
+        stats = {
+            row['user_id']: row
+            for row in EcoAction.objects.filter(user_id__gte=first_id, user_id__lte=last_id)
+            .order_by()
+            .values('user_id')
+            .annotate(
+                carbon=Sum('carbon_kg'),
+                savings=Sum('estimated_savings_kg'),
+                **badges.annotations(),
+            )
+        }
+
+        for user in users.iterator(chunk_size=chunk_size):
+            scanned += 1
+            row = stats.get(user.id)
+            eco_score = (row['savings'] or 0) - (row['carbon'] or 0) if row else 0
+            eco_score += bonus.get(user.id, 0) - unfolded.get(user.id, 0)
+
+            held = set(user.badges) | (badges.earned(row) if row else set())
+            held |= granted.get(user.id, set())
+
+            if eco_score == user.eco_score and held == set(user.badges):
+                continue
+            user.eco_score = eco_score
+            user.badges = sorted(held)
+            scores.append(user.id)
+            pending.append(user)
+            if len(pending) >= chunk_size:
+                updated += User.objects.bulk_update(pending, ['eco_score', 'badges'])
+                pending = []
+        if pending:
+            updated += User.objects.bulk_update(pending, ['eco_score', 'badges'])
+        for offset in range(0, len(claimed), chunk_size):
+            chunk = [row[0] for row in claimed[offset:offset + chunk_size]]
+            ScoreEntry.objects.filter(id__in=chunk).update(compacted=True)
+        # cached auth snapshots hold eco_score and badges; bulk_update sends no signals
+        invalidate_users(set(scores) | granted.keys())
+
+        if scores:
+            leaderboard.record_many(ledger.scores(scores))
+            response_cache.bump_users(scores)
+
+    add_rows(scanned)
+    elapsed = time.monotonic() - started
+    rows_per_sec = scanned / elapsed if elapsed else float(scanned)
+    logger.info(
+        'Scored users %s-%s: %s scanned, %s updated in %.2fs (%.0f rows/s)',
+        first_id, last_id, scanned, updated, elapsed, rows_per_sec,
+    )
+    return {'users': scanned, 'updated': updated, 'seconds': elapsed, 'rows_per_sec': rows_per_sec}
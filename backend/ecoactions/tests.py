@@ -0,0 +1,743 @@
+import hashlib
+import os
+import tempfile
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import orjson
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from accounts import ledger
+from accounts.models import ScoreEntry
+from community import leaderboard, ranking
+from community.models import CommunityEvent, HostRanking
+from ecosphere.redis import get_redis, reset_redis
+from ecosphere.renderers import ORJSONRenderer
+from organizations import rollups as org_rollups
+from organizations.models import Membership, Organization
+from . import badges, estimation, exports, receipts, rollups, storage, sync, tasks
+from .management.commands import benchmark_api
+from .models import DailyImpact, EcoAction, ImpactRollup, Receipt, Reminder, Tombstone
+from .serializers import EcoActionSerializer, ReminderSerializer
+from .views import ReceiptStatusView, ReceiptUploadView
+
+User = get_user_model()
+
+
+def _create_actions(user, count, **fields):
+    """Insert ``count`` actions a minute apart, oldest first, keeping their timestamps."""
+    start = timezone.now() - timedelta(minutes=count)
+    created = EcoAction.objects.bulk_create(
+        [EcoAction(user=user, category='travel', action_type='walk', **fields) for _ in range(count)],
+        batch_size=1000,
+    )
+    # auto_now/auto_now_add overwrite the timestamps on insert; spread them out again
+    for offset, action in enumerate(created):
+        action.created_at = action.updated_at = start + timedelta(minutes=offset)
+    EcoAction.objects.bulk_update(created, ['created_at', 'updated_at'], batch_size=1000)
+    return created
+
+
+class FakeRedisMixin:
+    """Point ``get_redis`` at an empty in-process fakeredis for each test."""
+
+    def setUp(self):
+        super().setUp()
+        reset_redis()
+        self.addCleanup(reset_redis)
+        get_redis().flushall()
+
+
+class TimelinePaginationTests(APITestCase):
+    ACTIONS = 5000
+    PAGE_SIZE = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('timeline', 'timeline@example.com', 'password')
+        _create_actions(cls.user, cls.ACTIONS)
+        _create_actions(User.objects.create_user('other', 'other@example.com', 'password'), 500)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def _page(self, cursor=None):
+        params = {'page_size': self.PAGE_SIZE}
+        if cursor:
+            params['cursor'] = cursor
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/actions/', params)
+        self.assertEqual(response.status_code, 200)
+        [sql] = [query['sql'] for query in captured.captured_queries if 'ecoactions_ecoaction' in query['sql']]
+        return response.json(), sql
+
+    def _plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def test_pages_walk_the_timeline_newest_first(self):
+        seen, cursor = [], None
+        for _ in range(3):
+            body, _ = self._page(cursor)
+            seen.extend(row['id'] for row in body['results'])
+            cursor = body['cursor']
+        expected = EcoAction.objects.filter(user=self.user).order_by('-created_at', '-id')
+        self.assertEqual(seen, list(expected.values_list('id', flat=True)[:3 * self.PAGE_SIZE]))
+
+    def test_deep_page_is_an_index_range_scan_like_the_first(self):
+        first, first_sql = self._page()
+        cursor = first['cursor']
+        for _ in range(self.ACTIONS // self.PAGE_SIZE - 2):
+            body, deep_sql = self._page(cursor)
+            cursor = body['cursor']
+        self.assertEqual(len(body['results']), self.PAGE_SIZE)
+
+        for sql in (first_sql, deep_sql):
+            self.assertNotIn('OFFSET', sql.upper())
+            plan = self._plan(sql)
+            self.assertIn('ecoaction_user_timeline', plan)
+            # the index already yields rows in page order
+            self.assertNotIn('TEMP B-TREE', plan.upper())
+            self.assertNotRegex(plan, r'\bSort\b')
+
+
+@override_settings(
+    REDIS_URL='fakeredis://',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class ReminderDeliveryTests(FakeRedisMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        for index in range(5):
+            user = User.objects.create_user(f'due{index}', f'due{index}@example.com', 'password')
+            action = EcoAction.objects.create(user=user, category='food', action_type='milk')
+            Reminder.objects.create(user=user, action=action, message='Use it', due_date=today - timedelta(days=index))
+        cls.later = Reminder.objects.create(user=user, action=action, message='Later', due_date=today + timedelta(days=1))
+        cls.sent = Reminder.objects.create(user=user, action=action, message='Sent', due_date=today, delivered=True)
+
+    def test_chunks_share_one_connection_and_one_update(self):
+        with mock.patch.object(tasks, 'get_connection', wraps=tasks.get_connection) as get_connection:
+            with CaptureQueriesContext(connection) as captured:
+                result = tasks.deliver_reminders(chunk_size=2)
+
+        self.assertEqual(result, {'delivered': 5})
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f'due{index}@example.com' for index in range(5)])
+        # three chunks of at most two reminders, each over its own single connection
+        self.assertEqual(get_connection.call_count, 3)
+        updates = [query for query in captured.captured_queries if query['sql'].startswith('UPDATE "ecoactions_reminder"')]
+        self.assertEqual(len(updates), 3)
+        self.assertFalse(Reminder.objects.filter(due_date__lte=date.today(), delivered=False).exists())
+        self.assertFalse(Reminder.objects.get(pk=self.later.pk).delivered)
+
+    def test_delivered_reminders_are_not_sent_again(self):
+        tasks.send_due_reminders(workers=1)
+        tasks.send_due_reminders(workers=1)
+        self.assertEqual(len(mail.outbox), 5)
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class ExpiryReminderTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('pantry', 'pantry@example.com', 'password')
+        today = date.today()
+        self.milk, self.cheese, self.far, self.binned = [
+            EcoAction.objects.create(
+                user=self.user, category='food', action_type=name, expiry_date=today + timedelta(days=days),
+                disposal_method=disposal,
+            )
+            for name, days, disposal in [
+                ('milk', 0, 'n/a'), ('cheese', 7, 'n/a'), ('jam', 30, 'n/a'), ('bread', 3, 'composted'),
+            ]
+        ]
+
+    def _reminders(self):
+        reminders = Reminder.objects.filter(kind__startswith='expiry')
+        return set(reminders.values_list('action__action_type', 'kind', 'due_date'))
+
+    def test_tiers_falling_due_are_created_once(self):
+        today = date.today()
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks.generate_expiry_reminders(lookahead_days=4, chunk_size=1)
+        expected = {
+            ('milk', 'expiry_day', today),
+            ('cheese', 'expiry_7d', today),
+            ('cheese', 'expiry_3d', today + timedelta(days=4)),
+        }
+        self.assertEqual(self._reminders(), expected)
+        self.assertEqual(Reminder.objects.get(action=self.milk).message, 'milk expires today')
+
+        # nightly re-runs and a longer lookahead only add what is missing
+        tasks.generate_expiry_reminders(lookahead_days=4)
+        tasks.generate_expiry_reminders(lookahead_days=7)
+        self.assertEqual(self._reminders(), expected | {('cheese', 'expiry_day', today + timedelta(days=7))})
+
+
+@override_settings(REDIS_URL='fakeredis://', RECEIPT_STORAGE_BACKEND='ecoactions.storage.FileSystemReceiptStorage')
+class ReceiptUploadTests(FakeRedisMixin, TestCase):
+    SIZE = 16 * 1024 * 1024
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = Path(media.name)
+        overrides = self.settings(MEDIA_ROOT=media.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        patcher = mock.patch.object(storage, '_storage', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('uploader', 'uploader@example.com', 'password')
+
+    def test_large_upload_streams_to_storage_in_bounded_memory(self):
+        content = os.urandom(self.SIZE)
+        upload = SimpleUploadedFile('bill.pdf', content, content_type='application/pdf')
+        request = APIRequestFactory().post('/api/uploads/receipt/', {'file': upload}, format='multipart')
+        force_authenticate(request, self.user)
+        # the request body is built before tracing, so only handling it is measured
+        tracemalloc.start()
+        try:
+            response = ReceiptUploadView.as_view()(request)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(response.status_code, 202)
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(response.data['sha256'], digest)
+        receipt = Receipt.objects.get(sha256=digest)
+        self.assertEqual(receipt.size, self.SIZE)
+        self.assertEqual((self.media_root / receipt.key).read_bytes(), content)
+        # spooled to a temp file and copied in chunks, never held whole
+        self.assertLess(peak, self.SIZE // 4)
+
+    def _upload(self, user, content, **fields):
+        upload = SimpleUploadedFile('bill.pdf', content, content_type='application/pdf')
+        request = APIRequestFactory().post('/api/uploads/receipt/', {'file': upload, **fields}, format='multipart')
+        force_authenticate(request, user)
+        with self.captureOnCommitCallbacks():
+            return ReceiptUploadView.as_view()(request)
+
+    def _status(self, user, digest):
+        request = APIRequestFactory().get(f'/api/uploads/receipt/{digest}/')
+        force_authenticate(request, user)
+        return ReceiptStatusView.as_view()(request, sha256=digest)
+
+    def test_receipts_are_visible_only_to_their_uploaders_and_linked_actions(self):
+        content = b'%PDF-1.4 total 12.50'
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(self._upload(self.user, content).status_code, 202)
+        Receipt.objects.filter(sha256=digest).update(status=Receipt.DONE, text_snippet='Total 12.50')
+        self.assertEqual(self._status(self.user, digest).data['text_snippet'], 'Total 12.50')
+
+        stranger = User.objects.create_user('stranger', 'stranger@example.com', 'password')
+        self.assertEqual(self._status(stranger, digest).status_code, 404)
+        # the same bytes uploaded again reuse the stored receipt for that uploader too
+        self.assertEqual(self._upload(stranger, content).status_code, 200)
+        self.assertEqual(self._status(stranger, digest).status_code, 200)
+        self.assertEqual(Receipt.objects.count(), 1)
+
+        linked = User.objects.create_user('linked', 'linked@example.com', 'password')
+        self.assertEqual(self._status(linked, digest).status_code, 404)
+        action = EcoAction.objects.create(user=linked, category='food', action_type='groceries')
+        receipts.attach(Receipt.objects.get(sha256=digest), action)
+        self.assertEqual(self._status(linked, digest).status_code, 200)
+
+    def test_same_content_is_stored_and_extracted_once(self):
+        content = b'%PDF-1.4 receipt paid 4.20'
+        first, second = [
+            EcoAction.objects.create(user=self.user, category='food', action_type=name) for name in ('lunch', 'dinner')
+        ]
+        with mock.patch.object(tasks.extract_receipt, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self._upload(self.user, content).status_code, 202)
+            with self.captureOnCommitCallbacks(execute=True):
+                # still pending: only the new link is queued
+                self.assertEqual(self._upload(self.user, content, action=first.pk).status_code, 202)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self._upload(self.user, content).status_code, 202)
+        receipt = Receipt.objects.get()
+        self.assertEqual(delay.call_args_list, [mock.call(receipt.pk, None), mock.call(receipt.pk, first.pk)])
+        self.assertEqual(len(list(self.media_root.rglob('*.pdf'))), 1)
+
+        with mock.patch.object(receipts, 'extract_text', return_value='Paid 4.20'):
+            tasks.extract_receipt(receipt.pk, first.pk)
+        first.refresh_from_db()
+        self.assertEqual((first.data['receipt_status'], first.data['receipt_text']), (Receipt.DONE, 'Paid 4.20'))
+
+        # once extracted, a new link is answered and attached without another task
+        with mock.patch.object(tasks.extract_receipt, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._upload(self.user, content, action=second.pk)
+        self.assertEqual((response.status_code, response.data['text_snippet']), (200, 'Paid 4.20'))
+        delay.assert_not_called()
+        second.refresh_from_db()
+        self.assertEqual(second.data['receipt_sha256'], receipt.sha256)
+
+
+class ListReaderTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        for carbon in (0, 0.999, 1, 4.5, 5, 12.25):
+            action = EcoAction.objects.create(
+                user=self.user, category='food', action_type='meal', carbon_kg=carbon, origin='local',
+                expiry_date=date(2026, 11, 1), data={'note': 'é', 'tags': ['a', 1]}, client_key=f'key-{carbon}',
+            )
+            Reminder.objects.create(user=self.user, action=action, message='Eat it', due_date=date(2026, 10, 30))
+
+    def _reference(self, serializer_class, queryset):
+        # what the serializer and DRF's stock JSON renderer would have produced
+        return orjson.loads(JSONRenderer().render(serializer_class(queryset, many=True).data))
+
+    def test_rows_render_like_the_serializers(self):
+        actions = self.client.get('/api/actions/', {'page_size': 50}).json()['results']
+        expected = self._reference(EcoActionSerializer, EcoAction.objects.order_by('-created_at', '-id'))
+        self.assertEqual(actions, expected)
+        self.assertEqual([row['impact_label'] for row in actions], ['High', 'High', 'Medium', 'Medium', 'Low', 'Low'])
+
+        reminders = self.client.get('/api/reminders/').json()
+        self.assertEqual(reminders, self._reference(ReminderSerializer, Reminder.objects.all()))
+
+    def test_renderer_falls_back_to_drf_encoding(self):
+        payload = {
+            'amount': Decimal('1.50'),
+            'day': date(2026, 1, 2),
+            'at': datetime(2026, 1, 2, 3, 4, 5, 600, tzinfo=dt_timezone.utc),
+            'label': gettext_lazy('Low'),
+            1: 'key',
+        }
+        self.assertEqual(
+            orjson.loads(ORJSONRenderer().render(payload)), orjson.loads(JSONRenderer().render(payload)),
+        )
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class ResponseCacheTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('cached', 'cached@example.com', 'password')
+        self.other = User.objects.create_user('bystander', 'bystander@example.com', 'password')
+        _create_actions(self.user, 3)
+        _create_actions(self.other, 3)
+
+    def _impact(self, user, **headers):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/impact/', **headers)
+
+    def test_hit_runs_no_queries(self):
+        miss = self._impact(self.user)
+        self.assertEqual(miss.status_code, 200)
+        with self.assertNumQueries(0):
+            hit = self._impact(self.user)
+        self.assertEqual(hit.status_code, 200)
+        self.assertEqual(hit.content, miss.content)
+        self.assertEqual(hit['ETag'], miss['ETag'])
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self._impact(self.user)['ETag']
+        with self.assertNumQueries(0):
+            response = self._impact(self.user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_write_changes_only_the_writers_etag(self):
+        before = self._impact(self.user)['ETag']
+        bystander = self._impact(self.other)['ETag']
+
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/actions/', {'category': 'travel', 'action_type': 'walk'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        after = self._impact(self.user)
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['ETag'], before)
+        self.assertEqual(self._impact(self.user, HTTP_IF_NONE_MATCH=before).status_code, 200)
+        with self.assertNumQueries(0):
+            unchanged = self._impact(self.other, HTTP_IF_NONE_MATCH=bystander)
+        self.assertEqual(unchanged.status_code, 304)
+
+
+@override_settings(REDIS_URL='fakeredis://', EXPORT_CHUNK_SIZE=100)
+class ExportTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(exports, 'BLOCK_SIZE', 4096)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _export(self, count, fmt):
+        user = User.objects.create_user(f'{fmt}{count}', f'{fmt}{count}@example.com', 'password')
+        _create_actions(user, count, data={'note': 'x' * 200})
+        self.client.force_authenticate(user)
+        tracemalloc.start()
+        try:
+            response = self.client.get('/api/actions/export/', {'format': fmt})
+            lines = sum(block.count(b'\n') for block in response.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(response.status_code, 200)
+        return lines, peak
+
+    def test_memory_stays_flat_as_the_history_grows(self):
+        """Peak Python heap (tracemalloc, not process RSS) for 500 vs 10k rows.
+
+        Each row renders to roughly 250 bytes, so any buffering of the
+        history would show up as hundreds of bytes per extra row; a
+        streamed export stays a few bytes per row apart.
+        """
+        for fmt, header in [('csv', 1), ('ndjson', 0)]:
+            with self.subTest(fmt=fmt):
+                small_lines, small_peak = self._export(500, fmt)
+                large_lines, large_peak = self._export(10000, fmt)
+                self.assertEqual(small_lines, 500 + header)
+                self.assertEqual(large_lines, 10000 + header)
+                self.assertLess((large_peak - small_peak) / 9500, 16)
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class ScoreRecomputeTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('scored', 'scored@example.com', 'password')
+        self.other = User.objects.create_user('idle', 'idle@example.com', 'password')
+        self.client.force_authenticate(self.user)
+
+    def _log(self, carbon, savings):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/actions/', {
+                'category': 'travel', 'action_type': 'drive', 'carbon_kg': carbon, 'estimated_savings_kg': savings,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def _recompute(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return tasks.recompute_scores_shard(self.user.pk, self.other.pk)
+
+    def test_recompute_agrees_with_the_ledger(self):
+        self._log(carbon=10, savings=2)
+        ledger.append(self.user.pk, 5, ScoreEntry.EVENT, ['Community Hero'])
+        ledger.compact()
+        self._log(carbon=1, savings=0)
+        ledger.append(self.user.pk, 3, ScoreEntry.ADJUSTMENT)
+        self.assertEqual(ledger.score(self.user), -1.0)
+
+        self.assertEqual(self._recompute()['users'], 2)
+        # net-negative scores are not clamped, just as the ledger never clamps them
+        self.assertEqual(ledger.current(self.user), (-1.0, ['Community Hero']))
+        self.assertFalse(ScoreEntry.objects.filter(compacted=False).exists())
+        self.assertEqual(ledger.current(self.other), (0.0, []))
+
+        self._log(carbon=0, savings=4)
+        self.assertEqual(self._recompute()['updated'], 1)
+        self.assertEqual(ledger.score(self.user), 3.0)
+        ledger.compact()
+        self.assertEqual(User.objects.get(pk=self.user.pk).eco_score, 3.0)
+        self.assertEqual(self._recompute()['updated'], 0)
+        self.assertEqual(leaderboard.rank(self.user.pk), {'rank': 1, 'score': 3.0})
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class ClientKeyTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('offline', 'offline@example.com', 'password')
+        self.client.force_authenticate(self.user)
+
+    def _post(self, path, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(path, payload, format='json')
+
+    def test_retries_return_the_stored_action(self):
+        item = {'category': 'travel', 'action_type': 'bus', 'carbon_kg': 1, 'client_key': 'trip-1'}
+        response = self._post('/api/actions/bulk/', {'actions': [
+            item, item, {**item, 'client_key': 'trip-2'}, {'category': 'nope', 'action_type': 'x', 'carbon_kg': 1},
+        ]})
+        self.assertEqual(
+            {key: response.data[key] for key in ('created', 'duplicate', 'invalid')},
+            {'created': 2, 'duplicate': 1, 'invalid': 1},
+        )
+        [first, repeat, *_] = response.data['results']
+        self.assertEqual(repeat['id'], first['id'])
+
+        # a single POST retrying the same key gets the synced row back and scores nothing twice
+        retry = self._post('/api/actions/', item)
+        self.assertEqual(retry.data['id'], first['id'])
+        again = self._post('/api/actions/bulk/', {'actions': [item]})
+        self.assertEqual(
+            again.data['results'][0], {'index': 0, 'status': 'duplicate', 'client_key': 'trip-1', 'id': first['id']},
+        )
+        self.assertEqual(EcoAction.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(ledger.score(self.user), -2.0)
+
+
+class BadgeRuleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('badger', 'badger@example.com', 'password')
+
+    def _action(self, **fields):
+        return EcoAction.objects.create(user=self.user, action_type='x', **{'category': 'waste', **fields})
+
+    def test_python_matches_agree_with_the_sql_aggregates(self):
+        actions = [
+            self._action(disposal_method='recycled'),
+            self._action(disposal_method='landfill', origin='LOCAL'),
+            self._action(category='travel', estimated_savings_kg=1.5),
+            self._action(category='travel', estimated_savings_kg=0, origin='Local'),
+            self._action(category='food', origin='imported'),
+        ]
+        row = EcoAction.objects.filter(user=self.user).aggregate(**badges.annotations())
+        for rule in badges.BADGE_RULES:
+            with self.subTest(rule=rule):
+                self.assertEqual(sum(rule.matches(action) for action in actions), row[rule.alias])
+
+    def test_award_checks_only_rules_the_new_actions_count_towards(self):
+        for _ in range(4):
+            self._action(disposal_method='recycled')
+        newest = self._action(disposal_method='recycled')
+        with self.assertNumQueries(1):
+            self.assertEqual(badges.award(self.user, [newest], held=[]), ['Zero Waste'])
+        # nothing new can be earned from a food action once Eco Hero is held
+        food = self._action(category='food')
+        with self.assertNumQueries(0):
+            self.assertEqual(badges.award(self.user, [food], held=['Eco Hero']), ['Eco Hero'])
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class ImpactTrendsTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('trender', 'trender@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        # Monday 2 March to Monday 6 April 2026, backdated and folded into day buckets
+        for day, category, carbon in [
+            (date(2026, 3, 2), 'travel', 2), (date(2026, 3, 2), 'travel', 3), (date(2026, 3, 2), 'food', 1),
+            (date(2026, 3, 4), 'energy', 4), (date(2026, 4, 6), 'travel', 8),
+        ]:
+            action = EcoAction.objects.create(
+                user=self.user, category=category, action_type='x', carbon_kg=carbon, estimated_savings_kg=1,
+            )
+            EcoAction.objects.filter(pk=action.pk).update(
+                created_at=timezone.make_aware(datetime(day.year, day.month, day.day, 12)),
+            )
+        rollups.rebuild_daily([self.user.pk])
+
+    def _trends(self, **params):
+        return self.client.get('/api/impact/trends/', {'start': '2026-03-01', 'end': '2026-04-30', **params})
+
+    def test_periods_sum_the_day_buckets(self):
+        days = self._trends().data['buckets']
+        self.assertEqual(
+            [(bucket['start'], bucket['action_count'], bucket['total_carbon']) for bucket in days],
+            [(date(2026, 3, 2), 3, 6), (date(2026, 3, 4), 1, 4), (date(2026, 4, 6), 1, 8)],
+        )
+        self.assertEqual(days[0]['breakdown'], {'travel': 5, 'food': 1})
+
+        weeks = self._trends(period='week').data['buckets']
+        self.assertEqual(
+            [(str(bucket['start'])[:10], bucket['total_carbon']) for bucket in weeks],
+            [('2026-03-02', 10), ('2026-04-06', 8)],
+        )
+        months = self._trends(period='month', category='travel').data['buckets']
+        self.assertEqual([(bucket['action_count'], bucket['total_savings']) for bucket in months], [(2, 2), (1, 1)])
+
+    def test_writes_keep_the_buckets_in_step_with_a_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/actions/', {
+                'category': 'food', 'action_type': 'veg', 'carbon_kg': 0.5, 'estimated_savings_kg': 2,
+            }, format='json')
+            EcoAction.objects.filter(category='energy').delete()
+        self.assertEqual(response.status_code, 201)
+        maintained = sorted(DailyImpact.objects.filter(action_count__gt=0).values_list(
+            'day', 'category', 'action_count', 'carbon_kg', 'savings_kg',
+        ))
+        rollups.rebuild_daily([self.user.pk])
+        self.assertEqual(maintained, sorted(DailyImpact.objects.values_list(
+            'day', 'category', 'action_count', 'carbon_kg', 'savings_kg',
+        )))
+
+    def test_invalid_parameters(self):
+        for params in [{'period': 'year'}, {'category': 'nope'}, {'start': 'soon'}, {'start': '2026-05-01'}]:
+            with self.subTest(params=params):
+                self.assertEqual(self._trends(**params).status_code, 400)
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class DeltaSyncTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('syncer', 'syncer@example.com', 'password')
+        self.other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.kept, self.dropped = _create_actions(self.user, 2)
+        self.reminder = Reminder.objects.create(
+            user=self.user, action=self.kept, message='Compost', due_date=date.today(),
+        )
+        # everything above predates the first sync by more than the overlap
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        EcoAction.objects.update(updated_at=an_hour_ago)
+        Reminder.objects.update(updated_at=an_hour_ago)
+
+    def _sync(self, token=None):
+        response = self.client.get('/api/sync/', {'since': token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_token_returns_only_changes_and_deletions(self):
+        first = self._sync()
+        self.assertTrue(first['full'])
+        self.assertEqual({row['id'] for row in first['actions']}, {self.kept.id, self.dropped.id})
+        self.assertEqual([row['id'] for row in first['reminders']], [self.reminder.id])
+
+        dropped_id, reminder_id = self.dropped.id, self.reminder.id
+        with self.captureOnCommitCallbacks(execute=True):
+            added = EcoAction.objects.create(user=self.user, category='energy', action_type='led', carbon_kg=1)
+            _create_actions(self.other, 1)
+            self.dropped.delete()
+            self.reminder.delete()
+
+        delta = self._sync(first['token'])
+        self.assertFalse(delta['full'])
+        self.assertEqual([row['id'] for row in delta['actions']], [added.id])
+        self.assertEqual(delta['reminders'], [])
+        self.assertEqual(delta['deleted'], {'actions': [dropped_id], 'reminders': [reminder_id]})
+        self.assertFalse(Tombstone.objects.filter(user=self.other).exists())
+
+        # the overlap window repeats recent changes; clients upsert them by id
+        again = self._sync(delta['token'])
+        self.assertEqual([row['id'] for row in again['actions']], [added.id])
+        with self.settings(SYNC_OVERLAP_SECONDS=0):
+            quiet = self._sync(delta['token'])
+        self.assertEqual((quiet['full'], quiet['actions'], quiet['deleted']['actions']), (False, [], []))
+
+    def test_expired_or_invalid_tokens(self):
+        expired = sync.encode_token(timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+        snapshot = self._sync(expired)
+        self.assertTrue(snapshot['full'])
+        self.assertEqual(len(snapshot['actions']), 2)
+
+        for token in ('garbage', sync.encode_token(datetime(2026, 1, 1))):
+            with self.subTest(token=token):
+                response = self.client.get('/api/sync/', {'since': token})
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class BenchmarkCommandTests(FakeRedisMixin, TransactionTestCase):
+    """Runs outside a test transaction, so query counts match a real deployment."""
+
+    def _seed(self, **options):
+        call_command(
+            'seed_benchmark_data', users=6, actions=5, reminders=2, events=3, participants=3, organizations=2,
+            batch_size=4, stdout=StringIO(), **options,
+        )
+
+    def _snapshot(self, model, *fields):
+        return sorted(model.objects.values_list(*fields))
+
+    def test_seed_is_reproducible_and_consistent(self):
+        self._seed()
+        self.assertEqual(User.objects.filter(email__endswith='@bench.invalid').count(), 6)
+        self.assertEqual(EcoAction.objects.count(), 30)
+        self.assertEqual(Reminder.objects.count(), 12)
+        self.assertEqual(CommunityEvent.objects.count(), 3)
+        fields = ('category', 'action_type', 'carbon_kg', 'created_at')
+        history = self._snapshot(EcoAction, *fields)
+
+        # every denormalized table agrees with a rebuild from the seeded rows
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        organization_ids = list(Organization.objects.values_list('pk', flat=True))
+        for model, columns, rebuild in [
+            (ImpactRollup, ('user_id', 'category', 'severity', 'action_count'), lambda: rollups.rebuild(user_ids)),
+            (DailyImpact, ('user_id', 'category', 'day', 'action_count'), lambda: rollups.rebuild_daily(user_ids)),
+            (HostRanking, ('host_id', 'events_hosted', 'participant_count', 'points'), ranking.rebuild),
+            (Membership, ('user_id', 'action_count', 'carbon_kg'), lambda: org_rollups.rebuild(organization_ids)),
+        ]:
+            with self.subTest(model=model.__name__):
+                seeded = self._snapshot(model, *columns)
+                self.assertTrue(seeded)
+                rebuild()
+                self.assertEqual(seeded, self._snapshot(model, *columns))
+
+        self._seed(flush=True)
+        self.assertEqual(
+            [row[:3] for row in self._snapshot(EcoAction, *fields)], [row[:3] for row in history],
+        )
+
+    def test_benchmark_runs_every_scenario_within_budget(self):
+        self._seed()
+        out = StringIO()
+        # the test runner has already set up the test environment
+        with mock.patch.object(benchmark_api, 'setup_test_environment'), \
+                mock.patch.object(benchmark_api, 'teardown_test_environment'):
+            call_command('benchmark_api', iterations=2, task_iterations=1, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('scenario'))
+        self.assertIn('impact_summary_304', out.getvalue())
+        self.assertIn('org_dashboard', out.getvalue())
+
+
+class EstimationTests(APITestCase):
+    def test_vectorized_estimates_match_the_scalar_formulas(self):
+        factors = estimation.get_factors()
+        cases = [
+            ({'category': 'travel', 'method': 'bus', 'distance_km': 12.5},
+             12.5 * factors.travel['bus'], 12.5 * (factors.baseline_travel - factors.travel['bus'])),
+            ({'category': 'travel', 'method': 'car', 'distance_km': '40'}, 40 * factors.travel['car'], 0),
+            ({'category': 'travel', 'method': 'walking', 'distance_km': 0}, 0, 0),
+            ({'category': 'energy', 'kw': 2, 'hours': 3}, 2 * 3 * factors.grid, 0),
+            ({'category': 'energy', 'appliance': 'Fridge', 'hours': 24},
+             factors.appliance_kw['Fridge'] * 24 * factors.grid, 0),
+            # an explicit kw wins over the appliance default
+            ({'category': 'energy', 'appliance': 'Fridge', 'kw': 1, 'hours': 2}, 1 * 2 * factors.grid, 0),
+            ({'category': 'food', 'packaging_type': 'plastic', 'distance_km': 8},
+             8 * factors.delivery + factors.packaging['plastic'], 0),
+        ]
+        for reverse in (False, True):
+            ordered = cases[::-1] if reverse else cases
+            carbon, savings, errors = estimation.estimate([item for item, _, _ in ordered], factors)
+            self.assertEqual(errors, {})
+            for index, (item, expected_carbon, expected_savings) in enumerate(ordered):
+                with self.subTest(item=item, reverse=reverse):
+                    self.assertAlmostEqual(carbon[index], expected_carbon)
+                    self.assertAlmostEqual(savings[index], expected_savings)
+
+    def test_missing_or_invalid_distance_is_an_item_error(self):
+        user = User.objects.create_user('estimator', 'estimator@example.com', 'password')
+        self.client.force_authenticate(user)
+        response = self.client.post('/api/estimate/batch/', {'items': [
+            {'category': 'travel', 'method': 'car'},
+            {'category': 'travel', 'method': 'car', 'distance_km': 'far'},
+            {'category': 'food', 'packaging_type': 'paper', 'distance_km': -3},
+            {'category': 'travel', 'method': 'bus', 'distance_km': 10},
+            {'category': 'travel', 'method': 'teleport', 'distance_km': 10},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        for index in range(3):
+            self.assertEqual(results[index], {'index': index, 'error': 'distance_km must be a non-negative number'})
+        self.assertAlmostEqual(results[3]['carbon_kg'], 10 * estimation.get_factors().travel['bus'])
+        self.assertEqual(results[4], {'index': 4, 'error': 'Missing or unknown inputs for this category'})
@@ -1,35 +1,109 @@
-<<<<<<< HEAD
-import io
-import re
-import uuid
-
-import boto3
-from PyPDF2 import PdfReader
-from django.conf import settings
-from django.db.models import Count, Sum
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser
-=======
-from django.db.models import Count, Sum
-from rest_framework import permissions, viewsets
->>>>>>> main
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import EcoAction, Reminder
+from accounts import ledger
+from ecosphere import response_cache
+from . import estimation, exports, readers, receipts, rollups, sync
+from .ingest import MAX_BATCH_SIZE, ingest_actions
+from .models import EcoAction, Receipt, Reminder, Tombstone
+from .pagination import TimelineCursorPagination
 from .serializers import EcoActionSerializer, ReminderSerializer
+from .storage import get_receipt_storage
+from .tasks import extract_receipt
 
 
 class EcoActionViewSet(viewsets.ModelViewSet):
     serializer_class = EcoActionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimelineCursorPagination
 
     def get_queryset(self):
-        return EcoAction.objects.filter(user=self.request.user)
+        queryset = EcoAction.objects.filter(user=self.request.user)
+        if self.action not in ('list', 'export'):
+            return queryset
+
+        params = self.request.query_params
+        category = params.get('category')
+        if category:
+            queryset = queryset.filter(category=category)
+        # compare against day boundaries so the timeline index range still applies
+        try:
+            if params.get('since'):
+                since = date.fromisoformat(params['since'])
+                queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+            if params.get('until'):
+                until = date.fromisoformat(params['until']) + timedelta(days=1)
+                queryset = queryset.filter(created_at__lt=timezone.make_aware(datetime.combine(until, time.min)))
+        except ValueError:
+            raise ValidationError({'detail': 'since and until must be YYYY-MM-DD dates'})
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # read-only fast path: dicts from .values() instead of a serializer per row
+        page = self.paginate_queryset(readers.action_rows(self.filter_queryset(self.get_queryset())))
+        return self.get_paginated_response(page)
 
+    # rollups are maintained by signals, so keep each write and its rollup
+    # update in one transaction
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+    @action(detail=False, methods=['get'], renderer_classes=[exports.CSVRenderer, exports.NDJSONRenderer])
+    def export(self, request):
+        # ?format=csv|ndjson (or the Accept header) picks the renderer; the
+        # body streams from a server-side cursor instead of going through it
+        renderer = request.accepted_renderer
+        gzip = exports.accepts_gzip(request)
+        queryset = self.filter_queryset(self.get_queryset()).order_by('created_at', 'id')
+        response = StreamingHttpResponse(
+            exports.stream(queryset, renderer.format, gzip=gzip),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        filename = f'ecosphere-actions-{timezone.localdate().isoformat()}.{renderer.format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        items = request.data.get('actions') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a list of actions'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_SIZE:
+            return Response(
+                {'detail': f'At most {MAX_BATCH_SIZE} actions per request'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = ingest_actions(request.user, items, self.get_serializer_class(), self.get_serializer_context())
+        summary = {
+            outcome: sum(1 for result in results if result['status'] == outcome)
+            for outcome in ('created', 'duplicate', 'invalid')
+        }
+        return Response({**summary, 'results': results})
+
 
 class ReminderViewSet(viewsets.ModelViewSet):
     serializer_class = ReminderSerializer
@@ -38,94 +112,195 @@ class ReminderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Reminder.objects.filter(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        return Response(list(readers.reminder_rows(self.filter_queryset(self.get_queryset()))))
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
+class SyncView(APIView):
+    """Actions and reminders changed since the client's last sync token."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        since = None
+        if request.query_params.get('since'):
+            try:
+                since = sync.decode_token(request.query_params['since'])
+            except sync.InvalidToken:
+                raise ValidationError({'since': 'Invalid sync token'})
+
+        result = sync.changes(request.user, since)
+        return Response({
+            'token': result['token'],
+            'full': result['full'],
+            'actions': list(readers.action_rows(result['actions'])),
+            'reminders': list(readers.reminder_rows(result['reminders'])),
+            'deleted': {
+                'actions': result['deleted'][Tombstone.ACTION],
+                'reminders': result['deleted'][Tombstone.REMINDER],
+            },
+        })
+
+
 class ImpactSummaryView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @response_cache.cached_response(response_cache.USER)
     def get(self, request):
-        actions = EcoAction.objects.filter(user=request.user)
-        totals_by_category = actions.values('category').annotate(total=Sum('carbon_kg'))
-        severity_counts = actions.values('severity').annotate(count=Count('id'))
+        summary = rollups.summarize(request.user)
         reminders = Reminder.objects.filter(user=request.user, delivered=False).order_by('due_date')
 
-        breakdown = {item['category']: item['total'] or 0 for item in totals_by_category}
-        severity = {item['severity']: item['count'] for item in severity_counts}
-
         data = {
-            'total_carbon': actions.aggregate(total=Sum('carbon_kg')).get('total') or 0,
-            'total_savings': actions.aggregate(total=Sum('estimated_savings_kg')).get('total') or 0,
-            'breakdown': breakdown,
-            'severity': severity,
-            'badges': request.user.badges,
-            'reminders': ReminderSerializer(reminders, many=True).data,
+            'total_carbon': summary['total_carbon'],
+            'total_savings': summary['total_savings'],
+            'breakdown': summary['breakdown'],
+            'severity': summary['severity'],
+            'badges': ledger.current(request.user)[1],
+            'reminders': list(readers.reminder_rows(reminders)),
         }
         return Response(data)
-<<<<<<< HEAD
 
 
-class ReceiptUploadView(APIView):
+class ImpactTrendsView(APIView):
+    """Daily, weekly or monthly impact series served from pre-aggregated day buckets."""
+
     permission_classes = [permissions.IsAuthenticated]
-    parser_classes = [MultiPartParser]
 
-    def _extract_text(self, file_obj) -> str:
-        """Extract a small text snippet from PDF or text uploads for receipt verification."""
-        content_type = getattr(file_obj, 'content_type', '') or ''
+    def get(self, request):
+        period = request.query_params.get('period', 'day')
+        if period not in rollups.PERIODS:
+            return Response(
+                {'detail': f"period must be one of {', '.join(rollups.PERIODS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        category = request.query_params.get('category')
+        if category and category not in dict(EcoAction.CATEGORY_CHOICES):
+            return Response({'detail': 'Unknown category'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            if content_type.startswith('application/pdf'):
-                # Read into memory so we can reuse the stream for upload
-                buffer = io.BytesIO(file_obj.read())
-                buffer.seek(0)
-                reader = PdfReader(buffer)
-                text_chunks = []
-                for page in reader.pages[:2]:
-                    text_chunks.append(page.extract_text() or '')
-                file_obj.seek(0)
-                return '\n'.join([chunk for chunk in text_chunks if chunk])[:500]
-            # For text-based uploads (plain text, json, csv) attempt a decode
-            if content_type.startswith(('text/', 'application/json', 'application/csv')):
-                data = file_obj.read().decode(errors='ignore')
-                file_obj.seek(0)
-                return data[:500]
-        except Exception:
-            file_obj.seek(0)
-        return ''
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+            start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else end - timedelta(days=29)
+        except ValueError:
+            return Response({'detail': 'start and end must be YYYY-MM-DD dates'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({'detail': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'period': period,
+            'start': start,
+            'end': end,
+            'category': category,
+            'buckets': rollups.trends(request.user, start, end, period, category),
+        })
+
+
+class EstimateBatchView(APIView):
+    """Carbon estimates for up to ``MAX_ITEMS`` inputs from the server factor table."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_ITEMS = 1000
+
+    def post(self, request):
+        items = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return Response({'detail': 'Expected a list of input objects'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.MAX_ITEMS:
+            return Response({'detail': f'At most {self.MAX_ITEMS} items per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+        factors = estimation.get_factors()
+        carbon, savings, errors = estimation.estimate(items, factors)
+        results = []
+        for index in range(len(items)):
+            if index in errors:
+                results.append({'index': index, 'error': errors[index]})
+            else:
+                results.append({
+                    'index': index,
+                    'carbon_kg': float(carbon[index]),
+                    'estimated_savings_kg': float(savings[index]),
+                })
+        return Response({'factor_version': factors.version, 'results': results})
+
+
+def _receipt_payload(receipt):
+    return {
+        'url': receipt.url,
+        'key': receipt.key,
+        'sha256': receipt.sha256,
+        'status': receipt.status,
+        'text_snippet': receipt.text_snippet,
+        'verified': receipt.verified if receipt.status == Receipt.DONE else None,
+        'error': receipt.error,
+    }
+
+
+class ReceiptUploadView(APIView):
+    """Store a receipt and queue its text extraction.
+
+    Returns 202 with ``status: pending`` until a worker has parsed the file;
+    poll ``/api/uploads/receipt/<sha256>/``. Pass ``action`` to have the
+    result written into that action's ``data``.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
 
     def post(self, request, *args, **kwargs):
+        # hash the upload while Django spools it, before request.data is parsed
+        request.upload_handlers.insert(0, receipts.HashingUploadHandler(request))
         file_obj = request.data.get('file')
         if not file_obj:
             return Response({'detail': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
 
-        extracted_text = self._extract_text(file_obj)
+        action = None
+        if request.data.get('action'):
+            action = EcoAction.objects.filter(user=request.user, pk=request.data['action']).first()
+            if action is None:
+                return Response({'detail': 'Unknown action'}, status=status.HTTP_400_BAD_REQUEST)
 
-        client = boto3.client(
-            's3',
-            endpoint_url=settings.CLOUDFLARE_R2_ENDPOINT or None,
-            aws_access_key_id=settings.CLOUDFLARE_R2_ACCESS_KEY,
-            aws_secret_access_key=settings.CLOUDFLARE_R2_SECRET_KEY,
-        )
+        digest = getattr(request, 'upload_digests', {}).get('file') or receipts.file_digest(file_obj)
+        # stored once per content; whoever uploads the same bytes may read its result
+        receipt = Receipt.objects.filter(sha256=digest).first()
+        created = receipt is None
+        if created:
+            receipt, created = self._store(request.user, file_obj, digest)
+        receipt.uploaders.add(request.user)
 
-        key = f"receipts/{request.user.id}/{uuid.uuid4()}-{file_obj.name}"
-        client.upload_fileobj(
-            file_obj,
-            settings.CLOUDFLARE_R2_BUCKET,
-            key,
-            ExtraArgs={'ACL': 'public-read', 'ContentType': getattr(file_obj, 'content_type', 'application/octet-stream')},
+        if receipt.status == Receipt.PENDING:
+            if created or action:
+                receipt_id, action_id = receipt.id, action.id if action else None
+                transaction.on_commit(lambda: extract_receipt.delay(receipt_id, action_id))
+            return Response(_receipt_payload(receipt), status=status.HTTP_202_ACCEPTED)
+
+        if action:
+            receipts.attach(receipt, action)
+        return Response(_receipt_payload(receipt))
+
+    def _store(self, user, file_obj, digest):
+        content_type = getattr(file_obj, 'content_type', None) or 'application/octet-stream'
+        storage = get_receipt_storage()
+        key = receipts.storage_key(digest, file_obj.name)
+        if not storage.exists(key):
+            storage.save(file_obj, key, content_type)
+
+        return Receipt.objects.get_or_create(
+            sha256=digest,
+            defaults={
+                'key': key,
+                'url': storage.url(key),
+                'content_type': content_type,
+                'size': file_obj.size or 0,
+                'uploaded_by': user,
+            },
         )
 
-        public_url = f"{settings.CLOUDFLARE_R2_ENDPOINT}/{settings.CLOUDFLARE_R2_BUCKET}/{key}" if settings.CLOUDFLARE_R2_ENDPOINT else key
 
-        verified_match = None
-        if extracted_text:
-            verified_match = re.search(r"(total|amount due|balance)\s*[:]?\s*([$€£]?\d+[\.,]?\d*)", extracted_text, re.IGNORECASE)
+class ReceiptStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
 
-        return Response({
-            'url': public_url,
-            'key': key,
-            'text_snippet': extracted_text,
-            'verified': bool(verified_match),
-        })
-=======
->>>>>>> main
+    def get(self, request, sha256):
+        receipt = get_object_or_404(receipts.visible_to(request.user), sha256=sha256)
+        return Response(_receipt_payload(receipt))
@@ -0,0 +1,34 @@
+import threading
+
+import redis
+from django.conf import settings
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_redis():
+    """Process-wide Redis client for ``settings.REDIS_URL``.
+
+    ``fakeredis://`` selects an in-process fakeredis server so features built
+    on Redis can be exercised without a running instance.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                url = settings.REDIS_URL
+                if url.startswith('fakeredis://'):
+                    import fakeredis
+
+                    _client = fakeredis.FakeRedis(decode_responses=True)
+                else:
+                    _client = redis.Redis.from_url(url, decode_responses=True)
+    return _client
+
+
+def reset_redis():
+    """Drop the cached client, e.g. after changing ``REDIS_URL`` in tests."""
+    global _client
+    with _lock:
+        _client = None
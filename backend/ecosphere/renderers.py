@@ -0,0 +1,22 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson handles the common types natively; anything else (Decimal, lazy
+# strings, querysets, ...) falls back to DRF's encoder rules
+_fallback = JSONEncoder()
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(data, indent=False):
+    return orjson.dumps(data, default=_fallback.default, option=OPTIONS | orjson.OPT_INDENT_2 if indent else OPTIONS)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``application/json`` rendered with orjson; orjson only indents by two spaces."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data, indent=bool(self.get_indent(accepted_media_type, renderer_context or {})))
@@ -0,0 +1,126 @@
+"""Per-user response cache with generation counters and strong ETags.
+
+Each cached GET body is stored in Redis under a key derived from the request
+path, the requesting user and the current value of every generation counter
+the view depends on. Writers never delete cache entries; they bump the
+relevant counter (``bump``), which moves readers to a fresh key, and the old
+entries simply expire. Generations:
+
+* ``user_scope(user_id)``: anything a user owns (actions, reminders, score,
+  profile).
+* ``LEADERBOARD``: bumped whenever a leaderboard sorted set changes.
+
+Responses carry an ETag computed from the body and ``If-None-Match`` is
+answered with 304, so an unchanged dashboard costs two Redis round trips and
+no database work. Redis failures fall back to the uncached view.
+"""
+import functools
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from redis.exceptions import RedisError
+
+from .redis import get_redis
+from .renderers import dumps
+
+logger = logging.getLogger(__name__)
+
+USER = 'user'
+LEADERBOARD = 'leaderboard'
+
+
+def user_scope(user_id):
+    return f'{USER}:{user_id}'
+
+
+def _generation_key(scope):
+    return f'cache:gen:{scope}'
+
+
+def bump(*scopes):
+    """Invalidate everything cached under ``scopes`` once the transaction commits."""
+    scopes = [scope for scope in scopes if scope]
+    if not scopes:
+        return
+
+    def publish():
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for scope in scopes:
+                pipe.incr(_generation_key(scope))
+            pipe.execute()
+        except RedisError:
+            logger.warning('Cache generation bump failed for %s scopes', len(scopes), exc_info=True)
+
+    transaction.on_commit(publish)
+
+
+def bump_users(user_ids):
+    bump(*[user_scope(user_id) for user_id in set(user_ids)])
+
+
+def _not_modified(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+    return '*' in candidates or etag in candidates
+
+
+def _respond(request, body, etag):
+    if _not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # clients may keep the body but must revalidate before reusing it
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cached_response(*scopes, timeout=None):
+    """Cache a DRF ``get`` handler's successful responses for the requesting user.
+
+    ``scopes`` name the generations the response depends on; ``USER`` stands
+    for the requesting user's own generation.
+    """
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            user_id = request.user.pk
+            resolved = [user_scope(user_id) if scope == USER else scope for scope in scopes]
+            try:
+                client = get_redis()
+                generations = client.mget([_generation_key(scope) for scope in resolved])
+                fingerprint = '|'.join([request.get_full_path(), str(user_id), *(g or '0' for g in generations)])
+                key = f'cache:resp:{view.__class__.__name__}:{hashlib.sha1(fingerprint.encode()).hexdigest()}'
+                cached = client.hgetall(key)
+            except RedisError:
+                logger.warning('Response cache unavailable', exc_info=True)
+                return handler(view, request, *args, **kwargs)
+            if cached:
+                return _respond(request, cached['body'], cached['etag'])
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = dumps(response.data).decode()
+            etag = '"%s"' % hashlib.sha256(body.encode()).hexdigest()[:32]
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.hset(key, mapping={'body': body, 'etag': etag})
+                pipe.expire(key, timeout or settings.RESPONSE_CACHE_TIMEOUT)
+                pipe.execute()
+            except RedisError:
+                logger.warning('Response cache write failed', exc_info=True)
+            return _respond(request, body, etag)
+
+        return wrapper
+
+    return decorator
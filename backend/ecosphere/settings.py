@@ -3,6 +3,7 @@ from datetime import timedelta
 from pathlib import Path
 
 import dj_database_url
+from celery.schedules import crontab
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -23,9 +24,12 @@ INSTALLED_APPS = [
     'accounts',
     'ecoactions',
     'community',
+    'organizations',
+    'monitoring',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -57,20 +61,13 @@ TEMPLATES = [
 WSGI_APPLICATION = 'ecosphere.wsgi.application'
 ASGI_APPLICATION = 'ecosphere.asgi.application'
 
+DATABASE_URL = os.environ.get('DATABASE_URL', f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
 DATABASES = {
-    'default': dj_database_url.config(
-<<<<<<< HEAD
-        default=os.environ.get(
-            'DATABASE_URL',
-            'postgres://postgres:579eb4a662f601c461659893ccf99e21'
-            '@dgztdaj5.us-west.database.insforge.app:5432/insforge?sslmode=require',
-        ),
+    'default': dj_database_url.parse(
+        DATABASE_URL,
         conn_max_age=600,
-        ssl_require=True,
-=======
-        default=os.environ.get('DATABASE_URL', 'sqlite:///db.sqlite3'),
-        conn_max_age=600,
->>>>>>> main
+        # sslmode is a Postgres connection option; other backends reject it
+        ssl_require=DATABASE_URL.startswith(('postgres://', 'postgresql://', 'pgsql://')),
     )
 }
 
@@ -96,11 +93,20 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'ecosphere.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'ecosphere.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -116,10 +122,47 @@ CLOUDFLARE_R2_BUCKET = os.environ.get('CLOUDFLARE_R2_BUCKET', 'ecosphere-r2')
 CLOUDFLARE_R2_ENDPOINT = os.environ.get('CLOUDFLARE_R2_ENDPOINT', '')
 CLOUDFLARE_R2_ACCESS_KEY = os.environ.get('CLOUDFLARE_R2_ACCESS_KEY', '')
 CLOUDFLARE_R2_SECRET_KEY = os.environ.get('CLOUDFLARE_R2_SECRET_KEY', '')
+# ecoactions.storage.FileSystemReceiptStorage keeps receipts under MEDIA_ROOT
+RECEIPT_STORAGE_BACKEND = os.environ.get('RECEIPT_STORAGE_BACKEND', 'ecoactions.storage.S3ReceiptStorage')
+RECEIPT_STORAGE_POOL_SIZE = int(os.environ.get('RECEIPT_STORAGE_POOL_SIZE', '20'))
+RECEIPT_MULTIPART_THRESHOLD = int(os.environ.get('RECEIPT_MULTIPART_THRESHOLD', str(8 * 1024 * 1024)))
+# per-document limits for the receipt extraction workers
+RECEIPT_EXTRACTION_TIMEOUT = int(os.environ.get('RECEIPT_EXTRACTION_TIMEOUT', '20'))
+RECEIPT_EXTRACTION_MAX_PAGES = int(os.environ.get('RECEIPT_EXTRACTION_MAX_PAGES', '2'))
+
+# leaderboards and other Redis-backed state; 'fakeredis://' runs in-process
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/1')
+# delta sync: re-sent window behind each token, and how long deletes are remembered
+SYNC_OVERLAP_SECONDS = int(os.environ.get('SYNC_OVERLAP_SECONDS', '60'))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+# rows fetched per server-side cursor round trip when streaming exports
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+# request instrumentation: Server-Timing header, /metrics access and sampled slow-query logging
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', '0'))
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_LOG_TOP = int(os.environ.get('SLOW_QUERY_LOG_TOP', '5'))
+# Celery task run history: overlap lock lifetime and how long runs are kept
+TASK_LOCK_TIMEOUT = int(os.environ.get('TASK_LOCK_TIMEOUT', str(60 * 60)))
+TASK_RUN_RETENTION_DAYS = int(os.environ.get('TASK_RUN_RETENTION_DAYS', '30'))
+# seconds a cached dashboard response lives before it must be rebuilt
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', '300'))
+# authenticated user snapshots: Redis lifetime, and how long each process reuses one
+# without asking Redis (other processes see profile changes within this window)
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', '300'))
+AUTH_USER_LOCAL_TTL = float(os.environ.get('AUTH_USER_LOCAL_TTL', '5'))
+AUTH_USER_LOCAL_MAX_ENTRIES = int(os.environ.get('AUTH_USER_LOCAL_MAX_ENTRIES', '10000'))
+
+# versioned emission factor table used by ecoactions.estimation
+EMISSION_FACTORS_PATH = os.environ.get('EMISSION_FACTORS_PATH', str(BASE_DIR / 'ecoactions' / 'emission_factors.json'))
 
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
-<<<<<<< HEAD
+CELERY_TASK_ROUTES = {
+    # CPU-bound PDF parsing gets its own prefork pool: -Q receipts -P prefork
+    'ecoactions.tasks.extract_receipt': {'queue': 'receipts'},
+}
 CELERY_BEAT_SCHEDULE = {
     'send-reminders-daily': {
         'task': 'ecoactions.tasks.send_due_reminders',
@@ -129,8 +172,32 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'ecoactions.tasks.recompute_scores_and_badges',
         'schedule': 60 * 60 * 12,  # twice a day
     },
+    'compact-score-ledger': {
+        'task': 'accounts.tasks.compact_score_ledger',
+        'schedule': 60 * 5,  # every 5 minutes
+    },
+    'purge-sync-tombstones-daily': {
+        'task': 'ecoactions.tasks.purge_sync_tombstones',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'purge-task-runs-daily': {
+        'task': 'monitoring.tasks.purge_task_runs',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'generate-expiry-reminders-nightly': {
+        'task': 'ecoactions.tasks.generate_expiry_reminders',
+        'schedule': crontab(hour=2, minute=0),
+    },
 }
-=======
->>>>>>> main
+# reminders claimed per delivery transaction, and parallel delivery workers
+REMINDER_CHUNK_SIZE = int(os.environ.get('REMINDER_CHUNK_SIZE', '200'))
+REMINDER_DELIVERY_WORKERS = int(os.environ.get('REMINDER_DELIVERY_WORKERS', '1'))
+# generated expiry reminders falling due within this many days are created ahead
+EXPIRY_REMINDER_LOOKAHEAD_DAYS = int(os.environ.get('EXPIRY_REMINDER_LOOKAHEAD_DAYS', '1'))
+# user-id shards the score rebuild is split into, and rows per bulk_update
+SCORE_RECOMPUTE_SHARDS = int(os.environ.get('SCORE_RECOMPUTE_SHARDS', '4'))
+SCORE_RECOMPUTE_CHUNK_SIZE = int(os.environ.get('SCORE_RECOMPUTE_CHUNK_SIZE', '1000'))
+# score ledger entries folded into user rows per compaction transaction
+SCORE_LEDGER_BATCH_SIZE = int(os.environ.get('SCORE_LEDGER_BATCH_SIZE', '5000'))
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
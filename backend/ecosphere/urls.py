@@ -2,37 +2,42 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework import routers
 
-<<<<<<< HEAD
 from accounts.views import EmailTokenObtainPairView, ProfileView, RegisterView
-from ecoactions.views import EcoActionViewSet, ImpactSummaryView, ReceiptUploadView, ReminderViewSet
-from community.views import CommunityEventViewSet, LeaderboardView
+from ecoactions.views import (
+    EcoActionViewSet,
+    EstimateBatchView,
+    ImpactSummaryView,
+    ImpactTrendsView,
+    ReceiptStatusView,
+    ReceiptUploadView,
+    ReminderViewSet,
+    SyncView,
+)
+from community.views import CommunityEventViewSet, CommunityRankingView, LeaderboardView
+from monitoring.views import metrics_view
+from organizations.views import OrganizationViewSet
 from rest_framework_simplejwt.views import TokenRefreshView
-=======
-from accounts.views import ProfileView, RegisterView
-from ecoactions.views import EcoActionViewSet, ImpactSummaryView, ReminderViewSet
-from community.views import CommunityEventViewSet, LeaderboardView
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
->>>>>>> main
 
 router = routers.DefaultRouter()
 router.register(r'actions', EcoActionViewSet, basename='actions')
 router.register(r'reminders', ReminderViewSet, basename='reminders')
 router.register(r'events', CommunityEventViewSet, basename='events')
+router.register(r'organizations', OrganizationViewSet, basename='organizations')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/register/', RegisterView.as_view(), name='register'),
-<<<<<<< HEAD
     path('api/auth/login/', EmailTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/profile/', ProfileView.as_view(), name='profile'),
     path('api/uploads/receipt/', ReceiptUploadView.as_view(), name='receipt-upload'),
-=======
-    path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/auth/profile/', ProfileView.as_view(), name='profile'),
->>>>>>> main
+    path('api/uploads/receipt/<str:sha256>/', ReceiptStatusView.as_view(), name='receipt-status'),
     path('api/leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('api/community/ranking/', CommunityRankingView.as_view(), name='community-ranking'),
     path('api/impact/', ImpactSummaryView.as_view(), name='impact-summary'),
+    path('api/impact/trends/', ImpactTrendsView.as_view(), name='impact-trends'),
+    path('api/estimate/batch/', EstimateBatchView.as_view(), name='estimate-batch'),
+    path('api/sync/', SyncView.as_view(), name='sync'),
     path('api/', include(router.urls)),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import TaskRun
+
+
+@admin.register(TaskRun)
+class TaskRunAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'started_at', 'duration_seconds', 'rows', 'throughput', 'queries', 'overlapped')
+    list_filter = ('task', 'status', 'overlapped')
+    date_hierarchy = 'started_at'
+    readonly_fields = [field.name for field in TaskRun._meta.fields]
+
+    @admin.display(description='rows/s')
+    def throughput(self, obj):
+        rate = obj.rows_per_second
+        return f'{rate:.0f}' if rate is not None else '-'
+
+    def has_add_permission(self, request):
+        return False
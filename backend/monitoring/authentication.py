@@ -0,0 +1,15 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication as BaseJWTAuthentication
+
+from .middleware import timed
+
+
+class TimedAuthenticationMixin:
+    """Reports the time spent authenticating as the ``auth`` span of the request."""
+
+    def authenticate(self, request):
+        with timed('auth'):
+            return super().authenticate(request)
+
+
+class JWTAuthentication(TimedAuthenticationMixin, BaseJWTAuthentication):
+    pass
@@ -0,0 +1,255 @@
+"""Run history, metrics and overlap detection for Celery tasks.
+
+``instrumented_task`` wraps a task body: it records a ``TaskRun`` with the
+duration, the queries issued and the rows the task reports via ``add_rows``,
+and takes a Redis lock per task name to notice a run starting while the
+previous one is still going. Overlapping runs are either skipped
+(``overlap=SKIP``, for jobs that must not run twice at once) or recorded and
+allowed to continue (``overlap=RECORD``, for jobs that are safe to
+parallelise). A task that splits its work into parallel shards dispatches
+them with ``fan_out``: its run stays open and keeps the lock until a chord
+callback sees every shard finish. The latest runs are exported at
+``/metrics``.
+"""
+import contextvars
+import functools
+import logging
+import time
+import uuid
+from contextlib import ExitStack
+
+from celery import chord, current_task, uuid as task_uuid
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from ecosphere.redis import get_redis
+from . import metrics
+from .models import TaskRun
+
+logger = logging.getLogger(__name__)
+
+SKIP = 'skip'
+RECORD = 'record'
+
+_current = contextvars.ContextVar('monitoring_task_run', default=None)
+
+
+class _RunState:
+    def __init__(self, run=None, lock=None):
+        self.run = run
+        self.lock = lock
+        self.rows = 0
+        self.queries = 0
+        self.counting = True
+        self.fanned_out = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.counting:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def add_rows(count):
+    """Report rows processed by the instrumented task currently running."""
+    state = _current.get()
+    if state is not None:
+        state.rows += count
+
+
+def fan_out(signatures):
+    """Run ``signatures`` as parallel shards of the instrumented task calling this.
+
+    The calling run is left open, and its overlap lock held, until every
+    shard has finished; a chord callback then records the run's whole
+    duration and the rows and queries its shards reported.
+    """
+    state = _current.get()
+    if state is None or state.run is None:
+        raise RuntimeError('fan_out() must be called from an instrumented task')
+    from .tasks import fan_out_failed, finish_fan_out
+
+    signatures = [signature.clone().set(task_id=task_uuid()) for signature in signatures]
+    shard_ids = [signature.id for signature in signatures]
+    lock = state.lock or None
+    callback = finish_fan_out.s(state.run.pk, shard_ids, lock)
+    callback.link_error(fan_out_failed.s(state.run.pk, shard_ids, lock))
+    # eager shards run in this process; their runs are counted by the callback, not twice here
+    state.counting = False
+    token = _current.set(None)
+    try:
+        chord(signatures)(callback)
+    finally:
+        _current.reset(token)
+        state.counting = True
+    state.fanned_out = True
+
+
+def close_fan_out(run_id, shard_ids, lock, status, **fields):
+    """Finish a fanned-out run with the totals of its shards and release its lock."""
+    shards = TaskRun.objects.filter(task_id__in=shard_ids).aggregate(rows=Sum('rows'), queries=Sum('queries'))
+    started_at = TaskRun.objects.filter(pk=run_id).values_list('started_at', flat=True).first()
+    if started_at is not None:
+        finished_at = timezone.now()
+        TaskRun.objects.filter(pk=run_id).update(
+            status=status,
+            finished_at=finished_at,
+            duration_seconds=(finished_at - started_at).total_seconds(),
+            rows=F('rows') + (shards['rows'] or 0),
+            queries=F('queries') + (shards['queries'] or 0),
+            **fields,
+        )
+    if lock:
+        _release(*lock)
+
+
+def _task_id():
+    try:
+        return current_task.request.id or ''
+    except AttributeError:
+        return ''
+
+
+def _acquire(name, timeout):
+    """``(key, token)`` when the lock was taken, ``False`` when another run holds it."""
+    key = f'taskrun:lock:{name}'
+    token = uuid.uuid4().hex
+    try:
+        if get_redis().set(key, token, nx=True, ex=timeout or settings.TASK_LOCK_TIMEOUT):
+            return key, token
+        return False
+    except RedisError:
+        logger.warning('Task lock unavailable for %s; running without overlap detection', name, exc_info=True)
+        return None
+
+
+def _release(key, token):
+    try:
+        client = get_redis()
+        if client.get(key) == token:
+            client.delete(key)
+    except RedisError:
+        logger.warning('Could not release task lock %s', key, exc_info=True)
+
+
+def _finish(run, status, started, state=None, **fields):
+    run.status = status
+    run.finished_at = timezone.now()
+    run.duration_seconds = time.perf_counter() - started
+    if state is not None:
+        run.rows, run.queries = state.rows, state.queries
+    for name, value in fields.items():
+        setattr(run, name, value)
+    run.save(update_fields=[
+        'status', 'finished_at', 'duration_seconds', 'rows', 'queries', *fields,
+    ])
+
+
+def instrumented_task(overlap=RECORD, lock_timeout=None):
+    """Record each call of the decorated task function as a ``TaskRun``.
+
+    Apply it under ``@shared_task``. ``overlap=None`` disables the lock, for
+    the shards a locked task dispatches with ``fan_out``.
+    """
+
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            lock = _acquire(name, lock_timeout) if overlap else None
+            run = TaskRun.objects.create(task=name, task_id=_task_id(), overlapped=lock is False)
+            if lock is False:
+                logger.warning('%s started while a previous run was still going', name)
+                if overlap == SKIP:
+                    _finish(run, TaskRun.SKIPPED, started, summary='Previous run still in progress')
+                    return f'Skipped {name}: previous run still in progress'
+
+            state = _RunState(run, lock)
+            parent = _current.get()
+            token = _current.set(state)
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(state))
+                    result = func(*args, **kwargs)
+            except BaseException as exc:
+                _finish(run, TaskRun.FAILED, started, state, error=repr(exc))
+                raise
+            finally:
+                _current.reset(token)
+                if lock and not state.fanned_out:
+                    _release(*lock)
+                if parent is not None:
+                    parent.rows += state.rows
+            if state.fanned_out:
+                # the chord callback finishes the run; add what dispatching cost
+                TaskRun.objects.filter(pk=run.pk).update(
+                    rows=F('rows') + state.rows,
+                    queries=F('queries') + state.queries,
+                    summary=str(result)[:500],
+                )
+                return result
+            _finish(run, TaskRun.SUCCEEDED, started, state, summary=str(result)[:500])
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class TaskRunCollector:
+    """Exports the latest finished run per task and run counts from ``TaskRun``."""
+
+    name = 'celery_task'
+
+    def collect(self):
+        try:
+            latest = TaskRun.objects.filter(id__in=list(
+                TaskRun.objects.filter(status__in=[TaskRun.SUCCEEDED, TaskRun.FAILED])
+                .order_by()
+                .values('task')
+                .annotate(last=Max('id'))
+                .values_list('last', flat=True)
+            ))
+            latest = list(latest)
+            counts = list(
+                TaskRun.objects.order_by()
+                .values_list('task', 'status', 'overlapped')
+                .annotate(runs=Count('id'))
+            )
+        except DatabaseError:
+            logger.warning('Task run metrics unavailable', exc_info=True)
+            return []
+
+        runs, overlapped = {}, {}
+        for task, status, was_overlapped, count in counts:
+            runs[task, status] = runs.get((task, status), 0) + count
+            if was_overlapped:
+                overlapped[task] = overlapped.get(task, 0) + count
+
+        lines = []
+        for metric, help_text, value in [
+            ('celery_task_last_duration_seconds', 'Duration of the latest finished run.', lambda run: run.duration_seconds or 0),
+            ('celery_task_last_rows', 'Rows processed by the latest finished run.', lambda run: run.rows),
+            ('celery_task_last_queries', 'Queries issued by the latest finished run.', lambda run: run.queries),
+            ('celery_task_last_rows_per_second', 'Throughput of the latest finished run.', lambda run: run.rows_per_second or 0),
+            ('celery_task_last_finished_timestamp_seconds', 'When the latest run finished.', lambda run: run.finished_at.timestamp()),
+            ('celery_task_last_succeeded', 'Whether the latest finished run succeeded.', lambda run: int(run.status == TaskRun.SUCCEEDED)),
+        ]:
+            lines.extend(metrics.family(metric, 'gauge', help_text, [({'task': run.task}, value(run)) for run in latest]))
+        lines.extend(metrics.family(
+            'celery_task_runs', 'gauge', 'Recorded runs by status within the retained history.',
+            [({'task': task, 'status': status}, count) for (task, status), count in sorted(runs.items())],
+        ))
+        lines.extend(metrics.family(
+            'celery_task_overlapped_runs', 'gauge', 'Runs that started while a previous run held the lock.',
+            [({'task': task}, count) for task, count in sorted(overlapped.items())],
+        ))
+        return lines
+
+
+metrics.collector(TaskRunCollector())
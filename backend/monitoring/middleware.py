@@ -0,0 +1,140 @@
+"""Per-request instrumentation.
+
+``RequestTimingMiddleware`` counts and times every database query through
+connection execute wrappers, times DRF rendering through the
+template-response hook, and collects named spans such as ``auth`` and
+``serialize`` (see ``timed``). The result goes out as a ``Server-Timing`` header and into
+the per-view histograms served at ``/metrics``.
+
+When a request is sampled (``SLOW_QUERY_SAMPLE_RATE``) the SQL of queries
+slower than ``SLOW_QUERY_THRESHOLD_MS`` is kept and the slowest
+``SLOW_QUERY_LOG_TOP`` are logged; unsampled requests only pay for a counter
+and two clock reads per query.
+"""
+import contextvars
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('monitoring.slow_queries')
+
+_current = contextvars.ContextVar('monitoring_request', default=None)
+
+REQUEST_SECONDS = metrics.histogram(
+    'http_request_duration_seconds', 'Time spent handling a request.', ['view', 'method', 'status'],
+)
+DB_SECONDS = metrics.histogram('http_request_db_seconds', 'Time spent in database queries per request.', ['view'])
+QUERIES = metrics.histogram(
+    'http_request_queries', 'Database queries issued per request.', ['view'], metrics.COUNT_BUCKETS,
+)
+SPAN_SECONDS = metrics.histogram(
+    'http_request_span_seconds', 'Time spent in a named phase (auth, serialize, render) per request.', ['view', 'span'],
+)
+
+
+class RequestMetrics:
+    def __init__(self, sample=False):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.spans = {}
+        self.open = set()
+        self.slow = [] if sample else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            if self.slow is not None and elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self.slow.append((elapsed, sql))
+
+    def add(self, span, seconds):
+        self.spans[span] = self.spans.get(span, 0.0) + seconds
+
+
+def current():
+    """Metrics of the request being handled, or ``None`` outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def timed(span):
+    """Add the enclosed block's wall time to ``span`` of the current request.
+
+    Blocks nested in one already timing the same span (a serializer inside
+    another) are counted once, by the outermost.
+    """
+    recorder = _current.get()
+    if recorder is None or span in recorder.open:
+        yield
+        return
+    recorder.open.add(span)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.open.discard(span)
+        recorder.add(span, time.perf_counter() - started)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    # unresolved paths share one label so scanners cannot blow up cardinality
+    return match.view_name if match else 'unmatched'
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.SLOW_QUERY_SAMPLE_RATE
+        recorder = RequestMetrics(sample=rate > 0 and random.random() < rate)
+        token = _current.set(recorder)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        view = _view_name(request)
+        REQUEST_SECONDS.observe(total, view=view, method=request.method, status=response.status_code)
+        DB_SECONDS.observe(recorder.db_seconds, view=view)
+        QUERIES.observe(recorder.queries, view=view)
+        for span, seconds in recorder.spans.items():
+            SPAN_SECONDS.observe(seconds, view=view, span=span)
+
+        if settings.SERVER_TIMING_ENABLED:
+            entries = [
+                f'total;dur={total * 1000:.1f}',
+                f'db;dur={recorder.db_seconds * 1000:.1f};desc="{recorder.queries} queries"',
+            ]
+            entries.extend(f'{span};dur={seconds * 1000:.1f}' for span, seconds in recorder.spans.items())
+            response['Server-Timing'] = ', '.join(entries)
+
+        if recorder.slow:
+            recorder.slow.sort(key=lambda item: item[0], reverse=True)
+            for elapsed, sql in recorder.slow[:settings.SLOW_QUERY_LOG_TOP]:
+                logger.warning('Slow query in %s (%.1f ms): %s', view, elapsed * 1000, sql)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time that separately
+        recorder = _current.get()
+        if recorder is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: recorder.add('render', time.perf_counter() - started))
+        return response
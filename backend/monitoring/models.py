@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+
+
+class TaskRun(models.Model):
+    """One execution of an instrumented Celery task."""
+
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (SKIPPED, 'Skipped (overlap)'),
+    ]
+
+    task = models.CharField(max_length=200)
+    task_id = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=RUNNING)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+    rows = models.PositiveBigIntegerField(default=0)
+    queries = models.PositiveIntegerField(default=0)
+    # another run of the same task held the overlap lock when this one started
+    overlapped = models.BooleanField(default=False)
+    summary = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['task', '-started_at'], name='taskrun_task_recent'),
+        ]
+
+    @property
+    def rows_per_second(self):
+        if not self.duration_seconds:
+            return None
+        return self.rows / self.duration_seconds
+
+    def __str__(self):
+        return f"{self.task} {self.status} at {self.started_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,12 @@
+from .middleware import timed
+
+
+class TimedSerializerMixin:
+    """Reports the time spent turning objects into primitives as the ``serialize`` span.
+
+    Rendering those primitives to JSON is timed separately as ``render``.
+    """
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
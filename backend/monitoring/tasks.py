@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .instrumentation import SKIP, add_rows, close_fan_out, instrumented_task
+from .models import TaskRun
+
+
+@shared_task
+@instrumented_task(overlap=SKIP)
+def purge_task_runs(retention_days=None):
+    """Drop task run history older than the retention window."""
+    retention_days = retention_days or settings.TASK_RUN_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = TaskRun.objects.filter(started_at__lt=cutoff).delete()
+    add_rows(deleted)
+    return f'Purged {deleted} task runs older than {retention_days} days'
+
+
+@shared_task
+def finish_fan_out(results, run_id, shard_ids, lock=None):
+    """Chord callback closing a ``fan_out`` run once all of its shards finished."""
+    close_fan_out(run_id, shard_ids, lock, TaskRun.SUCCEEDED)
+
+
+@shared_task
+def fan_out_failed(request, exc, traceback, run_id, shard_ids, lock=None):
+    """Chord error callback: close a ``fan_out`` run whose shards did not all succeed."""
+    close_fan_out(run_id, shard_ids, lock, TaskRun.FAILED, error=repr(exc))
@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from community.models import CommunityEvent
+from ecoactions import tasks as ecoaction_tasks
+from ecoactions.tests import FakeRedisMixin
+from ecosphere.celery import app
+from ecosphere.redis import get_redis
+from . import instrumentation, middleware
+from .models import TaskRun
+
+User = get_user_model()
+
+
+@instrumentation.instrumented_task(overlap=instrumentation.SKIP)
+def count_users():
+    instrumentation.add_rows(User.objects.count())
+    list(User.objects.all())
+    return 'counted'
+
+
+@instrumentation.instrumented_task(overlap=instrumentation.RECORD)
+def touch_users():
+    return User.objects.update(streak_days=0)
+
+
+@instrumentation.instrumented_task(overlap=instrumentation.SKIP)
+def broken():
+    User.objects.exists()
+    raise ValueError('boom')
+
+
+@override_settings(SERVER_TIMING_ENABLED=True)
+class RequestTimingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('timed', 'timed@example.com', 'password')
+        CommunityEvent.objects.create(name='Cleanup', host=self.user, points=10)
+        self.client.force_authenticate(self.user)
+
+    def _spans(self, response):
+        return {entry.split(';')[0] for entry in response['Server-Timing'].split(', ')}
+
+    def test_serialization_is_its_own_span(self):
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._spans(response), {'total', 'db', 'serialize', 'render'})
+        self.assertIn('span="serialize"', middleware.metrics.registry.render())
+
+    def test_nested_blocks_of_one_span_count_once(self):
+        recorder = middleware.RequestMetrics()
+        token = middleware._current.set(recorder)
+        try:
+            with middleware.timed('serialize'):
+                with middleware.timed('serialize'):
+                    pass
+                with middleware.timed('auth'):
+                    pass
+        finally:
+            middleware._current.reset(token)
+        self.assertEqual(set(recorder.spans), {'serialize', 'auth'})
+        self.assertGreaterEqual(recorder.spans['serialize'], recorder.spans['auth'])
+        self.assertEqual(recorder.open, set())
+
+
+class MetricsAccessTests(TestCase):
+    @override_settings(DEBUG=True, METRICS_TOKEN='')
+    def test_closed_without_a_token_even_in_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_requires_the_bearer_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_request_duration_seconds', response.content.decode())
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class TaskRunTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            User.objects.create_user(f'runner{index}', f'runner{index}@example.com', 'password')
+
+    def _lock(self, func):
+        return f'taskrun:lock:{func.__module__}.{func.__name__}'
+
+    def test_run_records_rows_queries_and_releases_the_lock(self):
+        self.assertEqual(count_users(), 'counted')
+        run = TaskRun.objects.get(task='monitoring.tests.count_users')
+        self.assertEqual((run.status, run.rows, run.queries, run.summary), (TaskRun.SUCCEEDED, 3, 2, 'counted'))
+        self.assertIsNotNone(run.duration_seconds)
+        self.assertFalse(run.overlapped)
+        self.assertIsNone(get_redis().get(self._lock(count_users)))
+
+    def test_failure_is_recorded_and_reraised(self):
+        with self.assertRaises(ValueError):
+            broken()
+        run = TaskRun.objects.get(task='monitoring.tests.broken')
+        self.assertEqual((run.status, run.queries, run.error), (TaskRun.FAILED, 1, "ValueError('boom')"))
+        self.assertIsNone(get_redis().get(self._lock(broken)))
+
+    def test_overlapping_runs_are_skipped_or_recorded(self):
+        get_redis().set(self._lock(count_users), 'previous')
+        get_redis().set(self._lock(touch_users), 'previous')
+        with self.assertLogs('monitoring.instrumentation', 'WARNING'):
+            self.assertIn('Skipped', count_users())
+            self.assertEqual(touch_users(), 3)
+
+        skipped = TaskRun.objects.get(task='monitoring.tests.count_users')
+        self.assertEqual((skipped.status, skipped.overlapped, skipped.queries), (TaskRun.SKIPPED, True, 0))
+        recorded = TaskRun.objects.get(task='monitoring.tests.touch_users')
+        self.assertEqual((recorded.status, recorded.overlapped), (TaskRun.SUCCEEDED, True))
+        # neither run may release a lock it does not hold
+        self.assertEqual(get_redis().get(self._lock(count_users)), 'previous')
+
+    def test_fan_out_run_closes_when_every_shard_finished(self):
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', eager)
+        with self.captureOnCommitCallbacks(execute=True):
+            ecoaction_tasks.recompute_scores_and_badges(shards=3)
+
+        parent = TaskRun.objects.get(task='ecoactions.tasks.recompute_scores_and_badges')
+        shards = TaskRun.objects.filter(task='ecoactions.tasks.recompute_scores_shard')
+        self.assertEqual(shards.count(), 3)
+        self.assertTrue(all(shard.status == TaskRun.SUCCEEDED for shard in shards))
+        self.assertEqual(parent.status, TaskRun.SUCCEEDED)
+        self.assertEqual(parent.summary, 'Dispatched 3 score shards')
+        self.assertEqual(parent.rows, sum(shard.rows for shard in shards))
+        self.assertEqual(parent.rows, 3)
+        self.assertGreaterEqual(parent.queries, sum(shard.queries for shard in shards))
+        self.assertIsNotNone(parent.finished_at)
+        self.assertIsNone(get_redis().get(self._lock(ecoaction_tasks.recompute_scores_and_badges)))
+
+    def test_fan_out_needs_an_instrumented_task(self):
+        with self.assertRaises(RuntimeError):
+            instrumentation.fan_out([])
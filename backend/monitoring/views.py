@@ -0,0 +1,21 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import never_cache
+
+from . import metrics
+
+
+@never_cache
+def metrics_view(request):
+    """Prometheus text exposition of this process's metrics.
+
+    Scrapers must send ``METRICS_TOKEN`` as a bearer token; while it is
+    unset the endpoint is closed, whatever ``DEBUG`` says.
+    """
+    token = settings.METRICS_TOKEN
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
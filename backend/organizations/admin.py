@@ -0,0 +1,28 @@
+from django.contrib import admin
+
+from .models import Membership, Organization, OrgRollup
+
+
+@admin.register(Organization)
+class OrganizationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'kind', 'member_count', 'created_at')
+    list_filter = ('kind',)
+    search_fields = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(Membership)
+class MembershipAdmin(admin.ModelAdmin):
+    list_display = ('user', 'organization', 'action_count', 'score', 'joined_at')
+    list_filter = ('organization',)
+    search_fields = ('user__email', 'user__username', 'organization__name')
+    raw_id_fields = ('user',)
+    list_select_related = ('user', 'organization')
+    readonly_fields = ('action_count', 'carbon_kg', 'savings_kg', 'score')
+
+
+@admin.register(OrgRollup)
+class OrgRollupAdmin(admin.ModelAdmin):
+    list_display = ('organization', 'category', 'action_count', 'carbon_kg', 'savings_kg')
+    list_filter = ('category',)
+    list_select_related = ('organization',)
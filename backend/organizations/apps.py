@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class OrganizationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'organizations'
+    verbose_name = 'Organizations'
+
+    def ready(self):
+        from . import signals  # noqa: F401
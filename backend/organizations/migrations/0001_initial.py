@@ -0,0 +1,59 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Organization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=180)),
+                ('slug', models.SlugField(max_length=80, unique=True)),
+                ('kind', models.CharField(choices=[('campus', 'Campus'), ('city', 'City'), ('enterprise', 'Enterprise')], default='campus', max_length=20)),
+                ('member_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Membership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('action_count', models.IntegerField(default=0, editable=False)),
+                ('carbon_kg', models.FloatField(default=0, editable=False)),
+                ('savings_kg', models.FloatField(default=0, editable=False)),
+                ('score', models.FloatField(default=0, editable=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to=settings.AUTH_USER_MODEL)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='organizations.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', '-score'], name='membership_org_score')],
+                'constraints': [models.UniqueConstraint(fields=('organization', 'user'), name='uniq_membership')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrgRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('food', 'Food'), ('travel', 'Travel'), ('energy', 'Energy'), ('waste', 'Waste')], max_length=20)),
+                ('action_count', models.IntegerField(default=0)),
+                ('carbon_kg', models.FloatField(default=0)),
+                ('savings_kg', models.FloatField(default=0)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='organizations.organization')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('organization', 'category'), name='uniq_org_rollup_cell')],
+            },
+        ),
+    ]
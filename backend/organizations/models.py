@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db import models
+
+from ecoactions.models import EcoAction
+
+
+class Organization(models.Model):
+    """A campus, city or company whose members share a dashboard."""
+
+    KIND_CHOICES = [
+        ('campus', 'Campus'),
+        ('city', 'City'),
+        ('enterprise', 'Enterprise'),
+    ]
+
+    name = models.CharField(max_length=180)
+    slug = models.SlugField(max_length=80, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='campus')
+    # maintained by the membership signals, so dashboards never count members
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class Membership(models.Model):
+    """A user's membership in an organization and their running contribution to it.
+
+    The totals cover the member's whole action history: their rollups are
+    folded in on joining and every later action write is applied on top.
+    ``score`` (savings minus carbon) orders the organization leaderboard.
+    """
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='memberships')
+    joined_at = models.DateTimeField(auto_now_add=True)
+    action_count = models.IntegerField(default=0, editable=False)
+    carbon_kg = models.FloatField(default=0, editable=False)
+    savings_kg = models.FloatField(default=0, editable=False)
+    score = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'user'], name='uniq_membership'),
+        ]
+        indexes = [
+            models.Index(fields=['organization', '-score'], name='membership_org_score'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.organization_id}"
+
+
+class OrgRollup(models.Model):
+    """Running totals of one category for all members of an organization.
+
+    One row per category is created with the organization, so action writes
+    only ever update rows in place.
+    """
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='rollups')
+    category = models.CharField(max_length=20, choices=EcoAction.CATEGORY_CHOICES)
+    action_count = models.IntegerField(default=0)
+    carbon_kg = models.FloatField(default=0)
+    savings_kg = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'category'], name='uniq_org_rollup_cell'),
+        ]
+
+    def __str__(self):
+        return f"{self.organization_id} {self.category}: {self.action_count} actions"
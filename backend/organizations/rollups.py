@@ -0,0 +1,185 @@
+"""Organization totals maintained incrementally from action writes.
+
+Each membership carries the member's running totals and each organization
+one ``OrgRollup`` row per category, so a dashboard reads a handful of rows
+whatever the member count. Action writes call ``apply_action_deltas`` in
+their transaction; members without an organization cost a single indexed
+lookup. Joining folds the member's per-user rollups in and leaving takes
+them out again. ``rebuild`` recomputes everything from the per-user rollups.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from ecoactions.models import EcoAction, ImpactRollup
+from ecoactions.rollups import batched
+from .models import Membership, Organization, OrgRollup
+
+
+def _increments(count, carbon, savings):
+    return {
+        'action_count': F('action_count') + count,
+        'carbon_kg': F('carbon_kg') + carbon,
+        'savings_kg': F('savings_kg') + savings,
+    }
+
+
+def _add(total, count, carbon, savings):
+    total[0] += count
+    total[1] += carbon
+    total[2] += savings
+
+
+def ensure_cells(organization_ids):
+    OrgRollup.objects.bulk_create(
+        [
+            OrgRollup(organization_id=organization_id, category=category)
+            for organization_id in organization_ids
+            for category, _ in EcoAction.CATEGORY_CHOICES
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def apply_action_deltas(removed=(), added=()):
+    """Fold action writes into their owners' memberships and organization rollups.
+
+    Must run inside the action's transaction, like ``ecoactions.rollups.apply_deltas``.
+    """
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for sign, actions in ((-1, removed), (1, added)):
+        for action in actions:
+            _add(
+                deltas[action.user_id, action.category],
+                sign,
+                sign * (action.carbon_kg or 0),
+                sign * (action.estimated_savings_kg or 0),
+            )
+    deltas = {cell: value for cell, value in deltas.items() if any(value)}
+    if not deltas:
+        return
+
+    organizations = defaultdict(list)
+    memberships = Membership.objects.filter(user_id__in={user_id for user_id, _ in deltas})
+    for user_id, organization_id in memberships.values_list('user_id', 'organization_id'):
+        organizations[user_id].append(organization_id)
+    if not organizations:
+        return
+
+    cells = defaultdict(lambda: [0, 0.0, 0.0])
+    members = defaultdict(lambda: [0, 0.0, 0.0])
+    for (user_id, category), value in deltas.items():
+        if user_id not in organizations:
+            continue
+        _add(members[user_id], *value)
+        for organization_id in organizations[user_id]:
+            _add(cells[organization_id, category], *value)
+
+    # a fixed order keeps concurrent writers to the same organization from deadlocking
+    for (organization_id, category), value in sorted(cells.items()):
+        OrgRollup.objects.filter(organization_id=organization_id, category=category).update(**_increments(*value))
+    for user_id, (count, carbon, savings) in sorted(members.items()):
+        Membership.objects.filter(user_id=user_id).update(
+            **_increments(count, carbon, savings),
+            score=F('score') + (savings - carbon),
+        )
+
+
+def _user_totals(user_id):
+    return (
+        ImpactRollup.objects.filter(user_id=user_id)
+        .order_by()
+        .values('category')
+        .annotate(count=Sum('action_count'), carbon=Sum('carbon_kg'), savings=Sum('savings_kg'))
+    )
+
+
+def _move_member(membership, sign):
+    totals = [0, 0.0, 0.0]
+    for row in _user_totals(membership.user_id):
+        value = (sign * row['count'], sign * row['carbon'], sign * row['savings'])
+        _add(totals, *value)
+        OrgRollup.objects.filter(
+            organization_id=membership.organization_id, category=row['category'],
+        ).update(**_increments(*value))
+    Organization.objects.filter(pk=membership.organization_id).update(member_count=F('member_count') + sign)
+    return totals
+
+
+@transaction.atomic
+def add_member(membership):
+    """Fold a new member's history into their organization."""
+    count, carbon, savings = _move_member(membership, 1)
+    Membership.objects.filter(pk=membership.pk).update(
+        action_count=count, carbon_kg=carbon, savings_kg=savings, score=savings - carbon,
+    )
+    membership.action_count, membership.carbon_kg, membership.savings_kg = count, carbon, savings
+    membership.score = savings - carbon
+
+
+@transaction.atomic
+def remove_member(membership):
+    """Take a departing member's history out of their organization."""
+    _move_member(membership, -1)
+
+
+def rebuild(organization_ids, batch_size=2000):
+    """Recompute memberships, rollups and member counts from the per-user rollups."""
+    with transaction.atomic():
+        ensure_cells(organization_ids)
+        members = Membership.objects.filter(organization_id__in=organization_ids)
+        totals = {
+            row['user_id']: row
+            for row in ImpactRollup.objects.filter(user_id__in=members.values('user_id'))
+            .order_by()
+            .values('user_id')
+            .annotate(count=Sum('action_count'), carbon=Sum('carbon_kg'), savings=Sum('savings_kg'))
+        }
+        empty = {'count': 0, 'carbon': 0, 'savings': 0}
+        for chunk in batched(members.only('id', 'user_id').iterator(chunk_size=batch_size), batch_size):
+            for membership in chunk:
+                row = totals.get(membership.user_id, empty)
+                membership.action_count = row['count']
+                membership.carbon_kg = row['carbon']
+                membership.savings_kg = row['savings']
+                membership.score = row['savings'] - row['carbon']
+            Membership.objects.bulk_update(chunk, ['action_count', 'carbon_kg', 'savings_kg', 'score'])
+
+        OrgRollup.objects.filter(organization_id__in=organization_ids).update(
+            action_count=0, carbon_kg=0, savings_kg=0,
+        )
+        cells = (
+            ImpactRollup.objects.filter(user__memberships__organization_id__in=organization_ids)
+            .order_by()
+            .values('user__memberships__organization_id', 'category')
+            .annotate(count=Sum('action_count'), carbon=Sum('carbon_kg'), savings=Sum('savings_kg'))
+        )
+        for row in cells:
+            OrgRollup.objects.filter(
+                organization_id=row['user__memberships__organization_id'], category=row['category'],
+            ).update(action_count=row['count'], carbon_kg=row['carbon'], savings_kg=row['savings'])
+
+        member_count = (
+            Membership.objects.filter(organization_id=OuterRef('pk'))
+            .order_by()
+            .values('organization_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        Organization.objects.filter(pk__in=organization_ids).update(
+            member_count=Coalesce(Subquery(member_count), 0),
+        )
+
+
+def summarize(organization):
+    """Totals and per-category breakdown for an organization, read from its rollup rows."""
+    totals = {'total_carbon': 0, 'total_savings': 0, 'action_count': 0}
+    breakdown = {}
+    for cell in organization.rollups.values('category', 'action_count', 'carbon_kg', 'savings_kg'):
+        breakdown[cell['category']] = cell['carbon_kg']
+        totals['total_carbon'] += cell['carbon_kg']
+        totals['total_savings'] += cell['savings_kg']
+        totals['action_count'] += cell['action_count']
+    return {**totals, 'breakdown': breakdown}
@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+from monitoring.serializers import TimedSerializerMixin
+from .models import Membership, Organization
+
+
+class OrganizationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Organization
+        fields = ['id', 'name', 'slug', 'kind', 'member_count']
+
+
+class MemberSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    user_id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Membership
+        fields = ['user_id', 'username', 'action_count', 'carbon_kg', 'savings_kg', 'score', 'joined_at']
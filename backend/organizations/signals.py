@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from . import rollups
+from .models import Membership, Organization
+
+
+@receiver(post_save, sender=Organization)
+def create_rollup_cells(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.ensure_cells([instance.pk])
+
+
+@receiver(post_save, sender=Membership)
+def add_member_totals(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.add_member(instance)
+
+
+@receiver(pre_delete, sender=Membership)
+def remove_member_totals(sender, instance, **kwargs):
+    # every pre_delete of a cascade runs before its first DELETE, so the
+    # member's rollups are still there even when their user is being deleted
+    rollups.remove_member(instance)
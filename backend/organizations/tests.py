@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from ecoactions.models import EcoAction
+from ecoactions.tests import FakeRedisMixin
+from . import rollups
+from .models import Membership, Organization
+
+User = get_user_model()
+
+
+def _act(user, category, carbon, savings=0):
+    return EcoAction.objects.create(
+        user=user, category=category, action_type='log', carbon_kg=carbon, estimated_savings_kg=savings,
+    )
+
+
+def _state(organization):
+    """Everything the rollups maintain for ``organization``, as plain values."""
+    organization.refresh_from_db()
+    cells = sorted(organization.rollups.values_list('category', 'action_count', 'carbon_kg', 'savings_kg'))
+    members = sorted(
+        organization.memberships.values_list('user_id', 'action_count', 'carbon_kg', 'savings_kg', 'score')
+    )
+    return organization.member_count, cells, members
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class OrganizationRollupTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.campus = Organization.objects.create(name='Campus', slug='campus')
+        self.city = Organization.objects.create(name='City', slug='city', kind='city')
+        self.ada = User.objects.create_user('ada', 'ada@example.com', 'password')
+        self.bo = User.objects.create_user('bo', 'bo@example.com', 'password')
+        _act(self.ada, 'travel', 4, 1)
+        _act(self.ada, 'food', 2)
+        _act(self.bo, 'travel', 1, 3)
+
+    def assertMatchesRebuild(self, *organizations):
+        maintained = [_state(organization) for organization in organizations]
+        rollups.rebuild([organization.pk for organization in organizations])
+        self.assertEqual(maintained, [_state(organization) for organization in organizations])
+
+    def test_joining_folds_in_history_and_later_writes_follow(self):
+        Membership.objects.create(organization=self.campus, user=self.ada)
+        Membership.objects.create(organization=self.campus, user=self.bo)
+        Membership.objects.create(organization=self.city, user=self.ada)
+        self.assertEqual(rollups.summarize(self.campus)['total_carbon'], 7)
+
+        action = _act(self.bo, 'energy', 5)
+        action.carbon_kg = 2
+        action.save()
+        _act(self.ada, 'food', 1).delete()
+        self.assertEqual(rollups.summarize(self.campus)['total_carbon'], 9)
+        self.assertEqual(Membership.objects.get(organization=self.campus, user=self.bo).score, 0)
+        self.assertMatchesRebuild(self.campus, self.city)
+
+    def test_leaving_takes_history_out(self):
+        Membership.objects.create(organization=self.campus, user=self.ada)
+        Membership.objects.create(organization=self.campus, user=self.bo)
+        Membership.objects.get(organization=self.campus, user=self.ada).delete()
+
+        self.assertEqual(_state(self.campus)[0], 1)
+        self.assertEqual(rollups.summarize(self.campus)['total_carbon'], 1)
+        self.assertMatchesRebuild(self.campus)
+
+    def test_deleting_a_user_leaves_every_organization(self):
+        Membership.objects.create(organization=self.campus, user=self.ada)
+        Membership.objects.create(organization=self.campus, user=self.bo)
+        Membership.objects.create(organization=self.city, user=self.ada)
+        self.ada.delete()
+
+        self.assertEqual(_state(self.campus)[0], 1)
+        self.assertEqual(_state(self.city), (0, _state(self.city)[1], []))
+        self.assertEqual(rollups.summarize(self.city)['action_count'], 0)
+        self.assertMatchesRebuild(self.campus, self.city)
+
+    def test_rolled_back_delete_leaves_totals_alone(self):
+        Membership.objects.create(organization=self.campus, user=self.ada)
+        before = _state(self.campus)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            User.objects.get(pk=self.ada.pk).delete()
+            raise RuntimeError
+        self.assertEqual(_state(self.campus), before)
+        # and a later delete of the same user is still taken out exactly once
+        self.ada.delete()
+        self.assertEqual(rollups.summarize(self.campus)['action_count'], 0)
+        self.assertMatchesRebuild(self.campus)
+
+
+@override_settings(REDIS_URL='fakeredis://')
+class DashboardTests(FakeRedisMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.organization = Organization.objects.create(name='Campus', slug='campus')
+        self.me = User.objects.create_user('me', 'me@example.com', 'password')
+        _act(self.me, 'travel', 1, 6)
+        Membership.objects.create(organization=self.organization, user=self.me)
+        self.client.force_authenticate(self.me)
+
+    def _add_members(self, scores):
+        start = Membership.objects.count()
+        for index, score in enumerate(scores, start=start):
+            user = User.objects.create_user(f'member{index}', f'member{index}@example.com', 'password')
+            _act(user, 'food', 0, score)
+            Membership.objects.create(organization=self.organization, user=user)
+
+    def _dashboard(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(f'/api/organizations/{self.organization.slug}/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), captured.captured_queries
+
+    def test_query_count_does_not_grow_with_members(self):
+        self._add_members([9, 2])
+        small, small_queries = self._dashboard()
+        self.assertEqual(small['me'], {'rank': 2, 'score': 5.0, 'action_count': 1})
+        self.assertEqual([member['username'] for member in small['top_members']], ['member1', 'me', 'member2'])
+
+        self._add_members([1] * 40)
+        large, large_queries = self._dashboard()
+        self.assertEqual(len(large_queries), len(small_queries))
+        self.assertEqual(large['me']['rank'], 2)
+        self.assertEqual(large['organization']['member_count'], 43)
+        self.assertEqual(large['action_count'], 43)
+        self.assertEqual(len(large['top_members']), 10)
+
+    def test_rank_counts_along_the_score_index(self):
+        _, queries = self._dashboard()
+        [sql] = [query['sql'] for query in queries if 'COUNT(' in query['sql']]
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+        # the count walks only the index entries above the member's score
+        self.assertIn('membership_org_score', plan)
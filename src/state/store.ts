@@ -1,31 +1,20 @@
-<<<<<<< HEAD
 import AsyncStorage from '@react-native-async-storage/async-storage';
 import { format } from 'date-fns';
 import { create } from 'zustand';
 
 import { actionsApi, authApi, eventsApi, impactApi, leaderboardApi } from '@/api/client';
-=======
-import { format } from 'date-fns';
-import { create } from 'zustand';
->>>>>>> main
 import {
   AlertItem,
   CommunityEvent,
   EcoAction,
-<<<<<<< HEAD
   EnergyUse,
   FoodOrder,
   LeaderboardEntry,
   ImpactLevel,
-=======
-  FoodOrder,
-  LeaderboardEntry,
->>>>>>> main
   ScanAction,
   TravelLog,
   UserProfile,
   WasteAction,
-<<<<<<< HEAD
 } from '@/types';
 
 type Role = 'user' | 'admin';
@@ -34,18 +23,10 @@ interface EcoSphereState {
   user: UserProfile | null;
   accessToken: string | null;
   refreshToken: string | null;
-=======
-  EnergyUse
-} from '@/types';
-
-interface EcoSphereState {
-  user: UserProfile | null;
->>>>>>> main
   ecoActions: EcoAction[];
   alerts: AlertItem[];
   leaderboard: LeaderboardEntry[];
   communityEvents: CommunityEvent[];
-<<<<<<< HEAD
   loading: boolean;
   login: (email: string, password: string, role?: Role) => Promise<void>;
   register: (email: string, password: string, role?: Role) => Promise<void>;
@@ -71,20 +52,6 @@ const toImpactLevel = (value?: string): ImpactLevel => {
   if (normalized === 'high') return 'High';
   return 'Low';
 };
-=======
-  login: (email: string, role?: 'user' | 'admin') => void;
-  addScanAction: (payload: Omit<ScanAction, 'id' | 'date' | 'impactLevel'>) => void;
-  logTravel: (payload: Omit<TravelLog, 'id' | 'date' | 'impactLevel' | 'category'>) => void;
-  logEnergyUse: (payload: Omit<EnergyUse, 'id' | 'date' | 'impactLevel' | 'category'>) => void;
-  logFoodOrder: (payload: Omit<FoodOrder, 'id' | 'date' | 'impactLevel' | 'category'>) => void;
-  logWasteAction: (payload: Omit<WasteAction, 'id' | 'date' | 'impactLevel' | 'category'>) => void;
-  computeEcoScore: () => number;
-  addAlert: (alert: Omit<AlertItem, 'id'>) => void;
-  completeEvent: (eventId: string) => void;
-}
-
-const randomId = () => Math.random().toString(36).slice(2, 10);
->>>>>>> main
 
 const impactFromKg = (kg: number): EcoAction['impactLevel'] => {
   if (kg < 1) return 'Low';
@@ -92,7 +59,6 @@ const impactFromKg = (kg: number): EcoAction['impactLevel'] => {
   return 'High';
 };
 
-<<<<<<< HEAD
 const mapProfile = (profile: any): UserProfile => ({
   id: String(profile.id),
   name: profile.username || profile.email,
@@ -103,6 +69,21 @@ const mapProfile = (profile: any): UserProfile => ({
   streak: profile.streak_days ?? profile.profile_meta?.streak ?? 0,
 });
 
+// follow the timeline cursor so hydration sees the whole history, not just page one
+const fetchAllActions = async () => {
+  const rows: any[] = [];
+  let cursor: string | undefined;
+  do {
+    const { data } = await actionsApi.list(cursor);
+    if (!data?.results) {
+      return data ?? [];
+    }
+    rows.push(...data.results);
+    cursor = data.cursor ?? undefined;
+  } while (cursor);
+  return rows;
+};
+
 const mapAction = (apiAction: any): EcoAction => ({
   id: String(apiAction.id ?? randomId()),
   title: apiAction.action_type || apiAction.title || 'Eco action',
@@ -158,25 +139,17 @@ const computeEcoScoreFromActions = (actions: EcoAction[]) => {
   }, 620);
   return Math.max(scoreFromActions, 0);
 };
-=======
-const today = () => format(new Date(), 'yyyy-MM-dd');
->>>>>>> main
 
 const initialLeaderboard: LeaderboardEntry[] = [
   { name: 'Ava Green', ecoScore: 860, city: 'Portland' },
   { name: 'Luis Torres', ecoScore: 820, city: 'Austin' },
   { name: 'Priya Nair', ecoScore: 790, city: 'Bangalore' },
-<<<<<<< HEAD
   { name: 'You', ecoScore: 640, city: 'Remote' },
-=======
-  { name: 'You', ecoScore: 640, city: 'Remote' }
->>>>>>> main
 ];
 
 const initialEvents: CommunityEvent[] = [
   { id: randomId(), name: 'Downtown Cleanup', location: 'Riverside Park', date: today(), points: 80 },
   { id: randomId(), name: 'Bike-to-Work Week', location: 'Citywide', date: today(), points: 50 },
-<<<<<<< HEAD
   { id: randomId(), name: 'Composting 101', location: 'Community Hub', date: today(), points: 40 },
 ];
 
@@ -230,12 +203,12 @@ export const useEcoSphereStore = create<EcoSphereState>((set, get) => ({
     try {
       const [profile, actions, impact, events, leaders] = await Promise.all([
         authApi.profile(),
-        actionsApi.list(),
+        fetchAllActions(),
         impactApi.summary(),
         eventsApi.list(),
         leaderboardApi.list(),
       ]);
-      const ecoActions = (actions.data || []).map(mapAction);
+      const ecoActions = actions.map(mapAction);
       const reminders = (impact.data?.reminders || []).map((rem: any) =>
         addAlertFromReminder({
           message: rem.message,
@@ -437,178 +410,6 @@ export const useEcoSphereStore = create<EcoSphereState>((set, get) => ({
     } catch (err) {
       // best-effort offline fallback
     }
-=======
-  { id: randomId(), name: 'Composting 101', location: 'Community Hub', date: today(), points: 40 }
-];
-
-export const useEcoSphereStore = create<EcoSphereState>((set, get) => ({
-  user: null,
-  ecoActions: [
-    {
-      id: randomId(),
-      title: 'Farmers market veggies',
-      date: today(),
-      category: 'food',
-      impactKg: 0.4,
-      impactLevel: 'Low',
-      packaging: 'paper',
-      origin: 'local',
-      expiryPredictionDays: 5
-    },
-    {
-      id: randomId(),
-      title: 'EV commute',
-      date: today(),
-      category: 'travel',
-      impactKg: 0.8,
-      impactLevel: 'Low',
-      method: 'ev',
-      distanceKm: 12,
-      savingsKg: 1.1
-    },
-    {
-      id: randomId(),
-      title: 'Air fryer dinner',
-      date: today(),
-      category: 'energy',
-      impactKg: 1.2,
-      impactLevel: 'Medium',
-      appliance: 'Air Fryer',
-      hoursUsed: 0.6,
-      suggestion: 'Batch cook to maximize efficiency.'
-    },
-    {
-      id: randomId(),
-      title: 'Plastic bottles recycled',
-      date: today(),
-      category: 'waste',
-      impactKg: 0.5,
-      impactLevel: 'Low',
-      disposal: 'recycled',
-      reminder: 'expiry',
-      penalty: 0
-    }
-  ],
-  alerts: [
-    { id: randomId(), message: 'Oat milk expires in 3 days — finish or freeze.', category: 'EcoCycle', severity: 'Medium' },
-    { id: randomId(), message: 'Bus saved 2.4kg CO₂ vs. car this week.', category: 'EcoMiles', severity: 'Low' },
-    { id: randomId(), message: 'Try composting veggie scraps to earn a Zero Waste badge.', category: 'EcoCycle', severity: 'Low' }
-  ],
-  leaderboard: initialLeaderboard,
-  communityEvents: initialEvents,
-  login: (email, role = 'user') =>
-    set({
-      user: {
-        id: randomId(),
-        name: email.split('@')[0] || 'Explorer',
-        email,
-        role,
-        ecoScore: 640,
-        badges: ['Local Shopper'],
-        streak: 5
-      }
-    }),
-  addScanAction: payload =>
-    set(state => ({
-      ecoActions: [
-        {
-          ...payload,
-          id: randomId(),
-          date: today(),
-          category: 'food',
-          impactLevel: impactFromKg(payload.impactKg)
-        },
-        ...state.ecoActions
-      ],
-      alerts: [
-        {
-          id: randomId(),
-          message: `Expiry predicted in ${payload.expiryPredictionDays} days for ${payload.title}`,
-          category: 'EcoCycle',
-          severity: payload.expiryPredictionDays <= 3 ? 'High' : 'Medium'
-        },
-        ...state.alerts
-      ]
-    })),
-  logTravel: payload =>
-    set(state => ({
-      ecoActions: [
-        {
-          ...payload,
-          id: randomId(),
-          date: today(),
-          category: 'travel',
-          impactLevel: impactFromKg(payload.impactKg)
-        },
-        ...state.ecoActions
-      ],
-      alerts: [
-        { id: randomId(), message: `${payload.method} saved ${payload.savingsKg.toFixed(1)}kg CO₂.`, category: 'EcoMiles', severity: 'Low' },
-        ...state.alerts
-      ]
-    })),
-  logEnergyUse: payload =>
-    set(state => ({
-      ecoActions: [
-        {
-          ...payload,
-          id: randomId(),
-          date: today(),
-          category: 'energy',
-          impactLevel: impactFromKg(payload.impactKg)
-        },
-        ...state.ecoActions
-      ],
-      alerts: [
-        { id: randomId(), message: `Reduce ${payload.appliance} runtime to save more energy.`, category: 'EcoWatt', severity: 'Medium' },
-        ...state.alerts
-      ]
-    })),
-  logFoodOrder: payload =>
-    set(state => ({
-      ecoActions: [
-        {
-          ...payload,
-          id: randomId(),
-          date: today(),
-          category: 'food',
-          impactLevel: impactFromKg(payload.impactKg)
-        },
-        ...state.ecoActions
-      ],
-      alerts: [
-        { id: randomId(), message: `${payload.title} packaged in ${payload.packagingType}. Consider ${payload.alternative ?? 'reusable containers'}.`, category: 'EcoPlate', severity: 'Medium' },
-        ...state.alerts
-      ]
-    })),
-  logWasteAction: payload =>
-    set(state => ({
-      ecoActions: [
-        {
-          ...payload,
-          id: randomId(),
-          date: today(),
-          category: 'waste',
-          impactLevel: impactFromKg(payload.impactKg)
-        },
-        ...state.ecoActions
-      ],
-      alerts: [
-        { id: randomId(), message: `${payload.disposal} logged for ${payload.title}.`, category: 'EcoCycle', severity: payload.disposal === 'landfill' ? 'High' : 'Low' },
-        ...state.alerts
-      ]
-    })),
-  computeEcoScore: () => {
-    const { ecoActions } = get();
-    const scoreFromActions = ecoActions.reduce((sum, action) => {
-      const multiplier = action.impactLevel === 'Low' ? 30 : action.impactLevel === 'Medium' ? 15 : -20;
-      return sum + multiplier;
-    }, 600);
-    return Math.max(scoreFromActions, 0);
-  },
-  addAlert: alert => set(state => ({ alerts: [{ ...alert, id: randomId() }, ...state.alerts] })),
-  completeEvent: eventId =>
->>>>>>> main
     set(state => {
       const event = state.communityEvents.find(e => e.id === eventId);
       const currentScore = state.user?.ecoScore ?? 0;
@@ -616,7 +417,6 @@ export const useEcoSphereStore = create<EcoSphereState>((set, get) => ({
         communityEvents: state.communityEvents.filter(e => e.id !== eventId),
         user: state.user
           ? { ...state.user, ecoScore: currentScore + (event?.points ?? 0), badges: [...state.user.badges, 'Community Builder'] }
-<<<<<<< HEAD
           : null,
       };
     });
@@ -660,9 +460,3 @@ const addActionOffline = (
   const ecoActions = [action, ...state.ecoActions];
   set({ ecoActions, user: withUpdatedProfile(state, ecoActions) });
 };
-=======
-          : null
-      };
-    })
-}));
->>>>>>> main